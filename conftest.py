@@ -0,0 +1,13 @@
+"""Test configuration for running every test suite from the repository root.
+
+The scanners are packages whose modules import each other by name (e.g. python port_scanner.py),
+    so their directories are added to the import path, as pytest already does for cracker/zip.
+
+"""
+
+import os
+import sys
+
+
+for _directory in ("ftpscanner", "portscanner"):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), _directory))
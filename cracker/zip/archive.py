@@ -0,0 +1,609 @@
+"""
+Archive context shared by all the passwords verified by a cracking process.
+
+Parsing the central directory and the local file headers of a ZIP file is done once per process,
+    so verifying a password is done entirely in memory without reopening the file.
+
+The context keeps:
+    - The central directory (list of zipfile.ZipInfo).
+    - The encryption header, check byte and CRC-32 of every encrypted member.
+    - The data of the cheapest member to confirm (smallest stored/deflated member), which is the only
+        member data loaded in memory.
+
+Archives encrypted with WinZip AES only have their own context (see AesArchiveContext), with the
+    same interface, so the chunks and the processes verify passwords the same way. Archives mixing
+    both encryptions are verified with their ZipCrypto members first, and the passwords passing
+    them are confirmed against a WinZip AES member as well.
+
+"""
+
+import os
+import zipfile
+
+import batchverifier
+
+from winzipaes import KEY_LENGTHS, PBKDF2_ITERATIONS, WinZipAesEntry, is_aes_encrypted
+from zipcrypto import FLAG_ENCRYPTED, ZipCryptoEntry, check_header, init_keys
+
+
+# Compression methods preferred to confirm a password, cheapest first
+_CONFIRMATION_COMPRESS_TYPES = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2)
+
+# Smallest block of passwords worth packing for the vectorized batch verification
+_MIN_BATCH_SIZE = 64
+
+# Number of passwords verified between two checks of the stop flag (see chunks), by encryption.
+#   PBKDF2 makes a WinZip AES password ~1000 times more expensive to verify than a ZipCrypto one
+ZIPCRYPTO_BATCH_SIZE = 4096
+AES_BATCH_SIZE = 64
+
+# Max number of passwords per chunk for WinZip AES archives, so the chunks take seconds (not
+#   minutes) and are spread evenly across the processes
+AES_CHUNK_SIZE = 16384
+
+# Archive contexts already loaded by the current process, keyed by ZIP file path
+_archive_contexts = {}
+
+
+def _get_confirmation_cost(zip_info):
+    """Returns a sort key representing how expensive it is to confirm a password with a member
+
+    Args:
+        zip_info (zipfile.ZipInfo): The encrypted member entry from the central directory.
+
+    Returns:
+        tuple: The sort key (lower is cheaper).
+    """
+    # Empty members have a CRC-32 of 0 that any password passing the check byte would match
+    is_empty = zip_info.file_size == 0
+
+    return (is_empty,
+            _CONFIRMATION_COMPRESS_TYPES.index(zip_info.compress_type),
+            zip_info.compress_size)
+
+
+class ArchiveContext:
+    """ZIP file parsed once and kept in memory to verify passwords
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+        zip_infos (list): The central directory entries (zipfile.ZipInfo).
+        confirmation_entry (ZipCryptoEntry): The encrypted member (with data) used to confirm the
+            passwords passing all the check bytes.
+        entries (list): The other encrypted members (headers only, ZipCryptoEntry).
+        aes_entry (WinZipAesEntry): Optional WinZip AES member of an archive mixing both
+            encryptions, confirming the passwords that decrypt the ZipCrypto members.
+    """
+
+    is_aes = False
+    batch_size = ZIPCRYPTO_BATCH_SIZE
+
+    def __init__(self, zip_file_path, zip_infos, confirmation_entry, entries, aes_entry=None):
+        self.zip_file_path = zip_file_path
+        self.zip_infos = zip_infos
+        self.confirmation_entry = confirmation_entry
+        self.entries = entries
+        self.aes_entry = aes_entry
+
+        # Number of passwords verified in batches (see verify_batch and verify_packed)
+        self.verified_count = 0
+
+        # Number of passwords passing all the check bytes rejected by the confirmation member
+        self.false_positive_count = 0
+
+    @classmethod
+    def load(cls, zip_file_path):
+        """Parses the central directory and the encrypted members of a ZIP file
+
+        Args:
+            zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+
+        Returns:
+            ArchiveContext: The archive context.
+        """
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            zip_infos = zip_file.infolist()
+
+            encrypted_zip_infos = [i for i in zip_infos if i.flag_bits & FLAG_ENCRYPTED
+                                   and i.compress_type in _CONFIRMATION_COMPRESS_TYPES]
+
+            if not encrypted_zip_infos:
+                raise ValueError("Zip file '{0}' has no supported encrypted member."
+                                 .format(zip_file_path))
+
+            encrypted_zip_infos.sort(key=_get_confirmation_cost)
+
+            confirmation_entry = ZipCryptoEntry.from_zip_info(zip_file.fp, encrypted_zip_infos[0])
+            entries = [ZipCryptoEntry.from_zip_info(zip_file.fp, i, load_data=False)
+                       for i in encrypted_zip_infos[1:]]
+
+            aes_zip_infos = [i for i in zip_infos if is_aes_encrypted(i)]
+            aes_entry = WinZipAesEntry.from_zip_info(
+                zip_file.fp, min(aes_zip_infos, key=lambda i: i.compress_size)) \
+                if aes_zip_infos else None
+
+        return cls(zip_file_path, zip_infos, confirmation_entry, entries, aes_entry)
+
+    def verify(self, password, keys=None):
+        """Verifies a candidate password against the cached headers and confirmation member
+
+        The check byte of every encrypted member must match before the confirmation member is
+            decrypted, so each additional member rejects ~255/256 of the remaining false positives.
+
+        Args:
+            password (bytes): The candidate password.
+            keys (tuple): The key state after the password (see init_keys), if already computed
+                (e.g. shared by several archives).
+
+        Returns:
+            bool: True if the password decrypts the archive. Otherwise, False.
+        """
+        if keys is None:
+            keys = init_keys(password)
+
+        confirmation_entry = self.confirmation_entry
+        confirmation_keys = check_header(keys, confirmation_entry.encryption_header,
+                                         confirmation_entry.check_byte)
+
+        if confirmation_keys is None:
+            return False
+
+        for entry in self.entries:
+            if check_header(keys, entry.encryption_header, entry.check_byte) is None:
+                return False
+
+        if not confirmation_entry.confirm(password, confirmation_keys):
+            self.false_positive_count = self.false_positive_count + 1
+            return False
+
+        # The WinZip AES members of a mixed archive must be decrypted by the same password
+        if self.aes_entry is not None:
+            aes_keys = self.aes_entry.check(password)
+
+            return aes_keys is not None and self.aes_entry.confirm(password, aes_keys)
+
+        return True
+
+    def verify_batch(self, passwords):
+        """Verifies a block of candidate passwords
+
+        The check bytes are verified for the whole block at once with NumPy when it is available,
+            and only the survivors are confirmed one at a time.
+
+        Args:
+            passwords (list): The candidate passwords (bytes).
+
+        Returns:
+            list: The passwords that decrypt the archive.
+        """
+        if not batchverifier.is_available() or len(passwords) < _MIN_BATCH_SIZE:
+            self.verified_count = self.verified_count + len(passwords)
+            return [password for password in passwords if self.verify(password)]
+
+        candidates, lengths = batchverifier.pack_candidates(passwords)
+
+        return [passwords[i] for i in self.verify_packed(candidates, lengths)]
+
+    def verify_packed(self, candidates, lengths=None, keys=None):
+        """Verifies a block of candidate passwords packed into a fixed-width uint8 array
+
+        Args:
+            candidates (numpy.ndarray): The (count, width) uint8 array of candidates (see
+                batchverifier.pack_candidates and Keyspace.pack).
+            lengths (numpy.ndarray): The length of each candidate. Defaults to the array width.
+            keys (tuple): The key states after the candidates (see batchverifier.init_keys_batch),
+                if already computed (e.g. shared by several archives).
+
+        Returns:
+            list: The indices of the candidates that decrypt the archive.
+        """
+        self.verified_count = self.verified_count + len(candidates)
+
+        if keys is None:
+            keys = batchverifier.init_keys_batch(candidates, lengths)
+
+        key0, key1, key2 = keys
+        confirmation_entry = self.confirmation_entry
+        indices = batchverifier.check_header_batch(
+            (key0, key1, key2), confirmation_entry.encryption_header,
+            confirmation_entry.check_byte).nonzero()[0]
+
+        for entry in self.entries:
+            if not len(indices):
+                break
+
+            keys = (key0[indices], key1[indices], key2[indices])
+            indices = indices[batchverifier.check_header_batch(keys, entry.encryption_header,
+                                                               entry.check_byte)]
+
+        width = candidates.shape[1]
+
+        return [int(i) for i in indices
+                if self.verify(candidates[i, :width if lengths is None else lengths[i]].tobytes())]
+
+    def extract_all(self, output_directory, password):
+        """Extracts all the members of the archive
+
+        Args:
+            output_directory (string): The directory to extract the members to (e.g.
+                c:\\temp\\cracked).
+            password (bytes): The password of the archive.
+        """
+        _extract_members(self.zip_file_path, output_directory, password)
+
+
+class AesArchiveContext:
+    """ZIP file encrypted with WinZip AES, parsed once and kept in memory to verify passwords
+
+    Every member has its own salt, so verifying a password against several members would derive
+        the keys once per member. Only the cheapest member (smallest data to authenticate) is
+        used: its password verification value rejects ~65535/65536 wrong passwords and its
+        authentication code rejects the others.
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+        zip_infos (list): The central directory entries (zipfile.ZipInfo).
+        confirmation_entry (WinZipAesEntry): The encrypted member used to verify the passwords.
+    """
+
+    is_aes = True
+    batch_size = AES_BATCH_SIZE
+
+    def __init__(self, zip_file_path, zip_infos, confirmation_entry):
+        self.zip_file_path = zip_file_path
+        self.zip_infos = zip_infos
+        self.confirmation_entry = confirmation_entry
+        self.key_bits = 8 * KEY_LENGTHS[confirmation_entry.strength]
+        self.iterations = PBKDF2_ITERATIONS
+
+        # Number of passwords verified in batches (one key derivation each)
+        self.verified_count = 0
+
+        # Number of passwords passing the password verification value rejected by the HMAC-SHA1
+        self.false_positive_count = 0
+
+    @classmethod
+    def load(cls, zip_file_path):
+        """Parses the central directory and the cheapest WinZip AES member of a ZIP file
+
+        Args:
+            zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+
+        Returns:
+            AesArchiveContext: The archive context.
+        """
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            zip_infos = zip_file.infolist()
+
+            encrypted_zip_infos = [i for i in zip_infos if is_aes_encrypted(i)]
+
+            if not encrypted_zip_infos:
+                raise ValueError("Zip file '{0}' has no WinZip AES encrypted member."
+                                 .format(zip_file_path))
+
+            # Empty members are authenticated as well, so the smallest member is the cheapest
+            zip_info = min(encrypted_zip_infos, key=lambda i: i.compress_size)
+            confirmation_entry = WinZipAesEntry.from_zip_info(zip_file.fp, zip_info)
+
+        return cls(zip_file_path, zip_infos, confirmation_entry)
+
+    def verify(self, password, keys=None):
+        """Verifies a candidate password (key derivation, verification value and HMAC-SHA1)
+
+        Args:
+            password (bytes): The candidate password.
+            keys (tuple): Ignored (the ZipCrypto key state shared by several archives does not
+                apply to WinZip AES).
+
+        Returns:
+            bool: True if the password decrypts the archive. Otherwise, False.
+        """
+        confirmation_entry = self.confirmation_entry
+        keys = confirmation_entry.check(password)
+
+        if keys is None:
+            return False
+
+        if confirmation_entry.confirm(password, keys):
+            return True
+
+        self.false_positive_count = self.false_positive_count + 1
+
+        return False
+
+    def verify_batch(self, passwords):
+        """Verifies a block of candidate passwords
+
+        Args:
+            passwords (list): The candidate passwords (bytes).
+
+        Returns:
+            list: The passwords that decrypt the archive.
+        """
+        self.verified_count = self.verified_count + len(passwords)
+        verify = self.verify
+
+        return [password for password in passwords if verify(password)]
+
+    def verify_packed(self, candidates, lengths=None, keys=None):
+        """Verifies a block of candidate passwords packed into a fixed-width uint8 array
+
+        The key derivation is done one password at a time by hashlib, so the candidates are only
+            unpacked (see ArchiveContext.verify_packed).
+
+        Args:
+            candidates (numpy.ndarray): The (count, width) uint8 array of candidates.
+            lengths (numpy.ndarray): The length of each candidate. Defaults to the array width.
+            keys (tuple): Ignored (see verify).
+
+        Returns:
+            list: The indices of the candidates that decrypt the archive.
+        """
+        self.verified_count = self.verified_count + len(candidates)
+        verify = self.verify
+        width = candidates.shape[1]
+
+        return [i for i in range(len(candidates))
+                if verify(candidates[i, :width if lengths is None else lengths[i]].tobytes())]
+
+    def extract_all(self, output_directory, password):
+        """Extracts all the members of the archive (zipfile cannot decrypt WinZip AES)
+
+        Args:
+            output_directory (string): The directory to extract the members to (e.g.
+                c:\\temp\\cracked).
+            password (bytes): The password of the archive.
+        """
+        _extract_members(self.zip_file_path, output_directory, password)
+
+
+def _extract_members(zip_file_path, output_directory, password):
+    """Extracts all the members of a ZIP file, each with its own encryption
+
+    zipfile extracts the ZipCrypto and unencrypted members, and the WinZip AES members (which
+        zipfile cannot decrypt) are decrypted by WinZipAesEntry.
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+        output_directory (string): The directory to extract the members to (e.g.
+            c:\\temp\\cracked).
+        password (bytes): The password of the archive.
+    """
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        for zip_info in zip_file.infolist():
+            if not is_aes_encrypted(zip_info):
+                zip_file.extract(zip_info, output_directory, pwd=password)
+                continue
+
+            path = _get_extraction_path(output_directory, zip_info.filename)
+
+            if zip_info.is_dir():
+                os.makedirs(path, exist_ok=True)
+                continue
+
+            data = WinZipAesEntry.from_zip_info(zip_file.fp, zip_info).decrypt(password)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(path, "wb") as member_file:
+                member_file.write(data)
+
+
+class ArchiveSet:
+    """Archives verified together against the same candidate passwords
+
+    The key schedule of every candidate is computed once for all the archives, which is most of the
+        verification cost, and the archives are dropped from the active set as they are solved.
+
+    Like an archive context, the set returns passwords once it is completely solved, so chunks keep
+        verifying their passwords while archives remain. The passwords solving each archive are
+        collected in the meantime (see pop_found).
+
+    Args:
+        archive_contexts (list): The archive contexts.
+        solved_flags (sequence): Optional flags, one per archive, set once the archive is solved.
+            Flags shared by several processes (e.g. multiprocessing.RawArray) drop the archives
+            solved by any of them.
+    """
+
+    def __init__(self, archive_contexts, solved_flags=None):
+        self.archive_contexts = archive_contexts
+        self.solved_flags = solved_flags if solved_flags is not None else [0] * len(
+            archive_contexts)
+        self.found = []
+        self.is_aes = any(archive_context.is_aes for archive_context in archive_contexts)
+        self.batch_size = min(archive_context.batch_size for archive_context in archive_contexts)
+
+        # Number of passwords verified in batches (once for all the archives)
+        self.verified_count = 0
+
+    @property
+    def false_positive_count(self):
+        """Number of passwords passing the fast checks rejected by the confirmation, all archives
+
+        """
+        return sum(archive_context.false_positive_count
+                   for archive_context in self.archive_contexts)
+
+    def _get_active_archive_contexts(self):
+        """Returns the (index, archive context) of the archives not solved yet
+
+        """
+        return [(i, archive_context) for i, archive_context in enumerate(self.archive_contexts)
+                if not self.solved_flags[i]]
+
+    def _solve(self, i, password):
+        """Records the password solving an archive
+
+        """
+        self.solved_flags[i] = 1
+        self.found.append((self.archive_contexts[i].zip_file_path, bytes(password)))
+
+    def is_solved(self):
+        """Returns whether all the archives are solved
+
+        Returns:
+            bool: True if all the archives are solved. Otherwise, False.
+        """
+        return all(self.solved_flags)
+
+    def pop_found(self):
+        """Returns the archives solved since the last call
+
+        Returns:
+            list: The (zip_file_path, password) pairs.
+        """
+        found = self.found
+        self.found = []
+
+        return found
+
+    def verify_batch(self, passwords):
+        """Verifies a block of candidate passwords against every active archive
+
+        Args:
+            passwords (list): The candidate passwords (bytes).
+
+        Returns:
+            list: The passwords that solved the last archives of the set, or an empty list while
+                archives remain (see pop_found).
+        """
+        active_archive_contexts = self._get_active_archive_contexts()
+
+        if not active_archive_contexts:
+            return []
+
+        if not batchverifier.is_available() or len(passwords) < _MIN_BATCH_SIZE:
+            self.verified_count = self.verified_count + len(passwords)
+            solved_passwords = []
+
+            for password in passwords:
+                keys = init_keys(password)
+
+                for i, archive_context in active_archive_contexts:
+                    if not self.solved_flags[i] and archive_context.verify(password, keys):
+                        self._solve(i, password)
+                        solved_passwords.append(password)
+
+            return solved_passwords if self.is_solved() else []
+
+        candidates, lengths = batchverifier.pack_candidates(passwords)
+
+        return [passwords[i] for i in self.verify_packed(candidates, lengths)]
+
+    def verify_packed(self, candidates, lengths=None):
+        """Verifies a block of candidate passwords packed into a fixed-width uint8 array
+
+        Args:
+            candidates (numpy.ndarray): The (count, width) uint8 array of candidates.
+            lengths (numpy.ndarray): The length of each candidate. Defaults to the array width.
+
+        Returns:
+            list: The indices of the candidates that solved the last archives of the set, or an
+                empty list while archives remain (see pop_found).
+        """
+        active_archive_contexts = self._get_active_archive_contexts()
+
+        if not active_archive_contexts:
+            return []
+
+        self.verified_count = self.verified_count + len(candidates)
+        keys = batchverifier.init_keys_batch(candidates, lengths)
+        width = candidates.shape[1]
+        solved_indices = []
+
+        for i, archive_context in active_archive_contexts:
+            indices = archive_context.verify_packed(candidates, lengths, keys)
+
+            if indices:
+                j = indices[0]
+                self._solve(i, candidates[j, :width if lengths is None else lengths[j]].tobytes())
+                solved_indices.append(j)
+
+        return solved_indices if self.is_solved() else []
+
+
+def _get_extraction_path(output_directory, name):
+    """Returns the path a member is extracted to, without leaving the output directory
+
+    Absolute paths, drive letters and relative (..) components are dropped, as zipfile does.
+
+    Args:
+        output_directory (string): The directory to extract the members to.
+        name (string): The member name inside the archive (e.g. docs/file.txt).
+
+    Returns:
+        string: The path of the extracted member.
+    """
+    name = os.path.splitdrive(name.replace("\\", "/"))[1]
+    components = [c for c in name.split("/") if c not in ("", ".", "..")]
+
+    return os.path.join(output_directory, *components)
+
+
+def load_archive_context(zip_file_path):
+    """Parses a ZIP file with the context matching its encryption
+
+    ZipCrypto members are preferred when the archive mixes both encryptions, as they are much
+        cheaper to verify (the WinZip AES members only confirm the passwords passing them, see
+        ArchiveContext).
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+
+    Returns:
+        object: The archive context (ArchiveContext or AesArchiveContext).
+    """
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        zip_infos = zip_file.infolist()
+
+    has_zip_crypto = any(i.flag_bits & FLAG_ENCRYPTED and not is_aes_encrypted(i)
+                         for i in zip_infos)
+
+    if not has_zip_crypto and any(is_aes_encrypted(i) for i in zip_infos):
+        return AesArchiveContext.load(zip_file_path)
+
+    return ArchiveContext.load(zip_file_path)
+
+
+def read_manifest(manifest_path):
+    """Reads a manifest of ZIP files
+
+    Args:
+        manifest_path (string): The manifest file path (e.g. c:\\temp\\manifest.txt), with one ZIP
+            file path per line, relative to the manifest directory. Empty lines and lines
+            starting with # are ignored.
+
+    Returns:
+        list: The absolute ZIP file paths, without duplicates.
+    """
+    manifest_directory = os.path.dirname(os.path.abspath(manifest_path))
+    zip_file_paths = []
+
+    with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+        for line in manifest_file:
+            line = line.strip()
+
+            if line and not line.startswith("#"):
+                zip_file_paths.append(os.path.abspath(os.path.join(manifest_directory, line)))
+
+    return list(dict.fromkeys(zip_file_paths))
+
+
+def get_archive_context(zip_file_path):
+    """Returns the archive context of a ZIP file, loading it once per process
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+
+    Returns:
+        object: The archive context (see load_archive_context).
+    """
+    key = os.path.abspath(zip_file_path)
+    archive_context = _archive_contexts.get(key)
+
+    if archive_context is None:
+        archive_context = load_archive_context(zip_file_path)
+        _archive_contexts[key] = archive_context
+
+    return archive_context
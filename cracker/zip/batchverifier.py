@@ -0,0 +1,140 @@
+"""
+NumPy-vectorized ZipCrypto verification of blocks of candidate passwords.
+
+The per-candidate loop in Python is interpreter-bound: the key schedule is a handful of integer
+    operations per byte, but each one pays the interpreter overhead. This module packs a block of
+    candidates into a 2-D uint8 array (one row per candidate, padded to the longest candidate) and
+    runs the key schedule and the 12-byte encryption header decryption column by column across the
+    whole block, so the interpreter overhead is paid once per byte position instead of once per
+    byte of every candidate.
+
+Only the check byte is verified here. Candidates passing the check byte must still be confirmed
+    (see ZipCryptoEntry.confirm).
+
+Attention:
+    - NumPy is an optional dependency. Use is_available() to check whether it is installed.
+
+"""
+
+from zipcrypto import CRC_TABLE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_CRC_TABLE = numpy.array(CRC_TABLE, dtype=numpy.uint32) if numpy is not None else None
+
+
+def is_available():
+    """Returns whether the batch verification can be used
+
+    Returns:
+        bool: True if NumPy is installed. Otherwise, False.
+    """
+    return numpy is not None
+
+
+def pack_candidates(passwords):
+    """Packs candidate passwords into a fixed-width uint8 array
+
+    Args:
+        passwords (list): The candidate passwords (bytes or memoryview).
+
+    Returns:
+        tuple: The (candidates, lengths) arrays, where candidates has one zero-padded row per
+            password and lengths holds the length of each password.
+    """
+    lengths = numpy.fromiter(map(len, passwords), dtype=numpy.intp, count=len(passwords))
+    width = int(lengths.max()) if len(passwords) else 0
+
+    if width == 0:
+        return numpy.zeros((len(passwords), 0), dtype=numpy.uint8), lengths
+
+    data = b"".join(bytes(password).ljust(width, b"\0") for password in passwords)
+    candidates = numpy.frombuffer(data, dtype=numpy.uint8).reshape(len(passwords), width)
+
+    return candidates, lengths
+
+
+def init_keys_batch(candidates, lengths=None):
+    """Runs the ZipCrypto key schedule over a block of candidates
+
+    Args:
+        candidates (numpy.ndarray): The (count, width) uint8 array of candidates.
+        lengths (numpy.ndarray): The length of each candidate. Defaults to the array width (all the
+            candidates have the same length).
+
+    Returns:
+        tuple: The (key0, key1, key2) uint32 arrays, one entry per candidate.
+    """
+    crc_table = _CRC_TABLE
+    count, width = candidates.shape
+    key0 = numpy.full(count, 0x12345678, dtype=numpy.uint32)
+    key1 = numpy.full(count, 0x23456789, dtype=numpy.uint32)
+    key2 = numpy.full(count, 0x34567890, dtype=numpy.uint32)
+
+    # Fixed-width blocks (e.g. brute force) do not need masking
+    if lengths is not None and bool((lengths == width).all()):
+        lengths = None
+
+    for i in range(width):
+        c = candidates[:, i]
+        new_key0 = (key0 >> 8) ^ crc_table[(key0 ^ c) & 0xFF]
+        new_key1 = (key1 + (new_key0 & 0xFF)) * numpy.uint32(134775813) + numpy.uint32(1)
+        new_key2 = (key2 >> 8) ^ crc_table[(key2 ^ (new_key1 >> 24)) & 0xFF]
+
+        if lengths is None:
+            key0, key1, key2 = new_key0, new_key1, new_key2
+        else:
+            # Shorter candidates keep their state once their last byte was processed
+            active = lengths > i
+            key0 = numpy.where(active, new_key0, key0)
+            key1 = numpy.where(active, new_key1, key1)
+            key2 = numpy.where(active, new_key2, key2)
+
+    return key0, key1, key2
+
+
+def check_header_batch(keys, encryption_header, check_byte):
+    """Decrypts the 12-byte encryption header for a block of key states
+
+    Args:
+        keys (tuple): The (key0, key1, key2) uint32 arrays returned by init_keys_batch.
+        encryption_header (bytes): The 12-byte encryption header of the member.
+        check_byte (int): The expected value of the last decrypted header byte.
+
+    Returns:
+        numpy.ndarray: The boolean mask of the candidates passing the check byte.
+    """
+    crc_table = _CRC_TABLE
+    key0, key1, key2 = keys
+    c = None
+
+    for encrypted_byte in encryption_header:
+        temp = (key2 | 2) & 0xFFFF
+        c = (((temp * (temp ^ 1)) >> 8) & 0xFF) ^ encrypted_byte
+        key0 = (key0 >> 8) ^ crc_table[(key0 ^ c) & 0xFF]
+        key1 = (key1 + (key0 & 0xFF)) * numpy.uint32(134775813) + numpy.uint32(1)
+        key2 = (key2 >> 8) ^ crc_table[(key2 ^ (key1 >> 24)) & 0xFF]
+
+    return c == check_byte
+
+
+def check_batch(candidates, lengths, encryption_header, check_byte):
+    """Returns the indices of the candidates passing the check byte of an encryption header
+
+    Args:
+        candidates (numpy.ndarray): The (count, width) uint8 array of candidates.
+        lengths (numpy.ndarray): The length of each candidate (or None if all have the same
+            length).
+        encryption_header (bytes): The 12-byte encryption header of the member.
+        check_byte (int): The expected value of the last decrypted header byte.
+
+    Returns:
+        numpy.ndarray: The indices of the surviving candidates.
+    """
+    keys = init_keys_batch(candidates, lengths)
+
+    return numpy.flatnonzero(check_header_batch(keys, encryption_header, check_byte))
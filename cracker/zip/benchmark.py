@@ -0,0 +1,322 @@
+"""
+Reproducible benchmarks of the password verification and of whole cracking runs.
+
+The benchmarks crack synthetic ZIP files written by the benchmark itself (see fixtures.py), whose
+    password is the candidate at a controlled position of the keyspace (e.g. 75%), so the work
+    done before the hit is the same on every run, machine and commit:
+    - Verification: passwords verified per second by a single process, per encryption (ZipCrypto,
+        WinZip AES) and verification path (one password at a time, batch, packed with NumPy).
+        The candidates are generated before the clock starts.
+    - Cracking: time to hit and passwords per second of whole runs (see scheduler.py), per
+        encryption, source of passwords (keyspace, wordlist, candidate store) and number of
+        processes. The processes are started before the clock starts (loading the archive is
+        included, but takes milliseconds with the synthetic ZIP files).
+
+The results are written as JSON (e.g. one file per commit, to be compared):
+    {"version": 1, "timestamp": "2024-01-01T10:00:00", "commit": "a7a2058", "python": "3.11.7",
+     "numpy": "1.26.4", "cpu_count": 8,
+     "results": [{"benchmark": "verification", "encryption": "zipcrypto", "path": "packed",
+                  "verified_count": 830584, "seconds": 0.41, "passwords_per_second": 2025814.6},
+                 {"benchmark": "cracking", "encryption": "zipcrypto", "source": "wordlist",
+                  "processes": 8, "position": 622938, "found": true, "time_to_hit": 0.52,
+                  "passwords_per_second": 1197957.7}]}
+
+Example:
+    python benchmark.py c:\\temp\\benchmark\\a7a2058.json
+
+Attention:
+    - Benchmarks are only comparable on the same machine, ideally idle.
+    - The passwords per second of the cracking benchmarks are the candidates before the hit
+        divided by the time to hit, so they include the chunk scheduling overhead.
+
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+
+import batchverifier
+
+from archive import load_archive_context
+from candidatestore import write_candidate_store
+from chunks import CandidateStoreChunk, KeyspaceChunk, WordlistRangeChunk
+from fixtures import write_aes_zip, write_zipcrypto_zip
+from governor import get_cpu_count
+from keyspace import Keyspace
+from scheduler import CrackingPool
+from wordlist import get_wordlist_size
+
+
+# Version of the results format
+RESULTS_VERSION = 1
+
+ENCRYPTION_ZIPCRYPTO = "zipcrypto"
+ENCRYPTION_AES = "aes"
+
+# Verification paths
+PATH_SINGLE = "single"
+PATH_BATCH = "batch"
+PATH_PACKED = "packed"
+
+# Sources of passwords
+SOURCE_KEYSPACE = "keyspace"
+SOURCE_WORDLIST = "wordlist"
+SOURCE_CANDIDATE_STORE = "candidate_store"
+
+# Position of the password in the keyspace (fraction of the keyspace processed before the hit)
+DEFAULT_POSITION = 0.75
+
+# Number of chunks per cracking run (whatever the keyspace size, so every process gets work)
+_CHUNK_COUNT = 64
+
+_MEMBERS = [("benchmark.txt", b"Hello World!" * 100)]
+
+_WRITERS = {ENCRYPTION_ZIPCRYPTO: write_zipcrypto_zip, ENCRYPTION_AES: write_aes_zip}
+
+
+def get_default_keyspaces():
+    """Returns the keyspaces benchmarked by default (a few seconds per benchmark)
+
+    Returns:
+        dict: The keyspace of each encryption (WinZip AES is ~1000 times slower than ZipCrypto).
+    """
+    return {ENCRYPTION_ZIPCRYPTO: Keyspace.brute_force(3),
+            ENCRYPTION_AES: Keyspace(["0123456789"] * 3)}
+
+
+def _get_commit():
+    """Returns the current commit of the repository, if any
+
+    """
+    try:
+        completed_process = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                           cwd=os.path.dirname(os.path.abspath(__file__)),
+                                           capture_output=True, check=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return completed_process.stdout.decode().strip() or None
+
+
+def _time(function):
+    """Calls a function and measures its duration
+
+    Returns:
+        tuple: The (result, seconds) of the call.
+    """
+    start = time.perf_counter()
+    result = function()
+
+    return result, time.perf_counter() - start
+
+
+def write_fixture(directory, encryption, password):
+    """Writes a ZIP file encrypted with a known password
+
+    Args:
+        directory (string): The directory the ZIP file is written to.
+        encryption (string): The encryption (ENCRYPTION_ZIPCRYPTO or ENCRYPTION_AES).
+        password (bytes): The password.
+
+    Returns:
+        string: The ZIP file path.
+    """
+    zip_file_path = os.path.join(directory, "{0}.zip".format(encryption))
+    _WRITERS[encryption](zip_file_path, _MEMBERS, password)
+
+    return zip_file_path
+
+
+def benchmark_verification(zip_file_path, keyspace):
+    """Measures the passwords verified per second by each verification path
+
+    The packed path is skipped when NumPy is not available.
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\zipcrypto.zip).
+        keyspace (Keyspace): The (wrong) passwords verified by each path.
+
+    Returns:
+        list: The result of each path.
+    """
+    archive_context = load_archive_context(zip_file_path)
+    ranges = list(keyspace.ranges(archive_context.batch_size))
+    batches = [list(keyspace.candidates(start, end)) for start, end in ranges]
+    paths = [(PATH_SINGLE, lambda: [archive_context.verify(password)
+                                    for batch in batches for password in batch]),
+             (PATH_BATCH, lambda: [archive_context.verify_batch(batch) for batch in batches])]
+
+    if batchverifier.is_available() and keyspace.is_single_byte:
+        packed_batches = [keyspace.pack(start, end) for start, end in ranges]
+        paths.append((PATH_PACKED, lambda: [archive_context.verify_packed(candidates)
+                                            for candidates in packed_batches]))
+
+    results = []
+
+    for path, function in paths:
+        _, seconds = _time(function)
+        results.append({"path": path, "verified_count": keyspace.size, "seconds": seconds,
+                        "passwords_per_second": keyspace.size / seconds if seconds else None})
+
+    return results
+
+
+def write_sources(directory, keyspace):
+    """Writes the passwords of a keyspace as a wordlist and as a candidate store
+
+    Args:
+        directory (string): The directory the files are written to.
+        keyspace (Keyspace): The passwords.
+
+    Returns:
+        dict: The file path of each source (SOURCE_WORDLIST and SOURCE_CANDIDATE_STORE).
+    """
+    wordlist_path = os.path.join(directory, "{0}.txt".format(keyspace.fingerprint))
+    candidate_store_path = os.path.join(directory, "{0}.bin".format(keyspace.fingerprint))
+
+    with open(wordlist_path, "wb") as wordlist_file:
+        for password in keyspace.candidates():
+            wordlist_file.write(password + b"\n")
+
+    write_candidate_store(candidate_store_path, keyspace.candidates())
+
+    return {SOURCE_WORDLIST: wordlist_path, SOURCE_CANDIDATE_STORE: candidate_store_path}
+
+
+def get_chunks(source, keyspace, source_paths):
+    """Splits the passwords of a keyspace into chunks read from a source
+
+    Args:
+        source (string): The source (SOURCE_KEYSPACE, SOURCE_WORDLIST or SOURCE_CANDIDATE_STORE).
+        keyspace (Keyspace): The passwords.
+        source_paths (dict): The file path of each source (see write_sources).
+
+    Returns:
+        list: The chunks.
+    """
+    chunk_size = math.ceil(keyspace.size / _CHUNK_COUNT)
+
+    if source == SOURCE_KEYSPACE:
+        return [KeyspaceChunk(keyspace, start, end) for start, end in keyspace.ranges(chunk_size)]
+
+    if source == SOURCE_CANDIDATE_STORE:
+        return [CandidateStoreChunk(source_paths[source], start, end)
+                for start, end in keyspace.ranges(chunk_size)]
+
+    if source == SOURCE_WORDLIST:
+        # A password belongs to the range where its first byte is, so ranges can split passwords
+        wordlist_size = get_wordlist_size(source_paths[source])
+        chunk_size = math.ceil(wordlist_size / _CHUNK_COUNT)
+
+        return [WordlistRangeChunk(source_paths[source], start, min(start + chunk_size,
+                                                                      wordlist_size))
+                for start in range(0, wordlist_size, chunk_size)]
+
+    raise ValueError("Source '{0}' is not supported.".format(source))
+
+
+def benchmark_cracking(zip_file_path, chunks, password, position, max_degree_of_parallelism):
+    """Measures the time to hit of a whole cracking run
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\zipcrypto.zip).
+        chunks (list): The chunks of the run, in order.
+        password (bytes): The password expected.
+        position (int): The number of passwords before the password in the chunks.
+        max_degree_of_parallelism (int): The number of processes.
+
+    Returns:
+        dict: The result of the run.
+    """
+    with CrackingPool(zip_file_path, max_degree_of_parallelism) as cracking_pool:
+        password_found, seconds = _time(lambda: cracking_pool.run(chunks))
+
+    return {"processes": max_degree_of_parallelism, "position": position,
+            "found": password_found == password, "time_to_hit": seconds,
+            "passwords_per_second": position / seconds if seconds else None}
+
+
+def run_benchmarks(output_path=None, keyspaces=None, process_counts=None,
+                   position=DEFAULT_POSITION, sources=None):
+    """Runs the verification and cracking benchmarks of every encryption
+
+    Args:
+        output_path (string): Optional JSON file path the results are written to.
+        keyspaces (dict): The keyspace of each encryption benchmarked (see
+            get_default_keyspaces).
+        process_counts (list): The numbers of processes of the cracking runs. Defaults to 1 and
+            the number of CPUs available.
+        position (float): The position of the password in the keyspace (0 - 1).
+        sources (list): The sources of passwords of the cracking runs. Defaults to all.
+
+    Returns:
+        dict: The results.
+    """
+    if not 0 <= position < 1:
+        raise ValueError("Position must to be between 0 (inclusive) and 1 (exclusive).")
+
+    keyspaces = keyspaces or get_default_keyspaces()
+    process_counts = process_counts or sorted({1, get_cpu_count()})
+    sources = sources or [SOURCE_KEYSPACE, SOURCE_WORDLIST, SOURCE_CANDIDATE_STORE]
+    results = []
+
+    def add_result(result):
+        results.append(result)
+        print("***** [Benchmark] {0} *****".format(
+            ", ".join("{0}: {1}".format(k, round(v, 3) if isinstance(v, float) else v)
+                      for k, v in result.items())))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for encryption, keyspace in keyspaces.items():
+            password_index = int(keyspace.size * position)
+            password = keyspace[password_index]
+            zip_file_path = write_fixture(directory, encryption, password)
+
+            for result in benchmark_verification(zip_file_path, keyspace):
+                add_result(dict({"benchmark": "verification", "encryption": encryption}, **result))
+
+            source_paths = write_sources(directory, keyspace)
+
+            for source in sources:
+                chunks = get_chunks(source, keyspace, source_paths)
+
+                for process_count in process_counts:
+                    result = benchmark_cracking(zip_file_path, chunks, password, password_index,
+                                                process_count)
+                    add_result(dict({"benchmark": "cracking", "encryption": encryption,
+                                     "source": source}, **result))
+
+    numpy = batchverifier.numpy
+
+    results = {"version": RESULTS_VERSION,
+               "timestamp": datetime.now().isoformat(timespec="seconds"),
+               "commit": _get_commit(),
+               "python": platform.python_version(),
+               "numpy": numpy.__version__ if numpy is not None else None,
+               "cpu_count": get_cpu_count(),
+               "results": results}
+
+    if output_path:
+        with open(output_path, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    return results
+
+
+def main():
+    # run_benchmarks()
+    # run_benchmarks("c:\\temp\\benchmark\\results.json")
+    # run_benchmarks(process_counts=[1, 2, 4, 8], position=0.5)
+    # run_benchmarks(sources=[SOURCE_KEYSPACE])
+    run_benchmarks(sys.argv[1] if len(sys.argv) > 1 else None)
+
+
+if __name__ == "__main__":
+    main()
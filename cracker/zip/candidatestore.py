@@ -0,0 +1,264 @@
+"""
+Compact binary store of candidate passwords, opened via mmap.
+
+Text dictionaries (dictionary_{slots}_{n}.txt) have to be read and split into lines, and every line
+    has to be stripped and allocated as a string before it can be tried. A candidate store keeps
+    the candidates back to back in a binary file with an offset index, so a process maps the file
+    in memory and slices candidates as zero-copy memoryviews (or as a packed uint8 array for the
+    vectorized verifier) without parsing anything.
+
+File layout (little-endian):
+    - Header: magic (8 bytes), version (uint32), width (uint32, 0 if candidates have different
+        lengths), count (uint64), index offset (uint64).
+    - Data: the candidates concatenated.
+    - Index: count + 1 offsets (uint64) of each candidate within the data section.
+
+Example:
+    convert_text_dictionary("c:\\temp\\dic\\dictionary_4_0.txt", "c:\\temp\\dic\\dictionary_4_0.bin")
+
+    with CandidateStore("c:\\temp\\dic\\dictionary_4_0.bin") as candidate_store:
+        for password in candidate_store.candidates(0, 1000):
+            ...
+
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+CANDIDATE_STORE_EXTENSION = ".bin"
+
+_HEADER_STRUCT = struct.Struct("<8sIIQQ")
+_MAGIC = b"ZIPCANDS"
+_VERSION = 1
+
+# Number of candidates buffered before being written to the store
+_WRITE_BUFFER_SIZE = 65536
+
+
+def write_candidate_store(candidate_store_path, candidates):
+    """Writes candidate passwords to a new candidate store
+
+    Args:
+        candidate_store_path (string): The candidate store file path (e.g. c:\\temp\\dic\\a.bin).
+        candidates (iterable): The candidate passwords (bytes).
+
+    Returns:
+        int: The number of candidates written.
+    """
+    offsets = array.array("Q", [0])
+    offset = 0
+    width = None
+
+    with open(candidate_store_path, "wb") as candidate_store_file:
+        # Reserves the header, which is written once the count and index offset are known
+        candidate_store_file.write(b"\0" * _HEADER_STRUCT.size)
+
+        buffer = []
+
+        for candidate in candidates:
+            offset = offset + len(candidate)
+            offsets.append(offset)
+            buffer.append(candidate)
+
+            if width is None:
+                width = len(candidate)
+            elif width != len(candidate):
+                width = 0
+
+            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                candidate_store_file.writelines(buffer)
+                buffer = []
+
+        candidate_store_file.writelines(buffer)
+
+        index_offset = _HEADER_STRUCT.size + offset
+
+        if sys.byteorder != "little":
+            offsets.byteswap()
+
+        candidate_store_file.write(offsets.tobytes())
+
+        candidate_store_file.seek(0)
+        candidate_store_file.write(_HEADER_STRUCT.pack(_MAGIC, _VERSION, width or 0,
+                                                       len(offsets) - 1, index_offset))
+
+    return len(offsets) - 1
+
+
+def convert_text_dictionary(dictionary_file_path, candidate_store_path):
+    """Converts a text dictionary (one password per line) to a candidate store
+
+    Args:
+        dictionary_file_path (string): The text dictionary file path (e.g.
+            c:\\temp\\dic\\dictionary_1_0.txt).
+        candidate_store_path (string): The candidate store file path (e.g.
+            c:\\temp\\dic\\dictionary_1_0.bin).
+
+    Returns:
+        int: The number of candidates written.
+    """
+    with open(dictionary_file_path, "rb") as dictionary_file:
+        candidates = (line.rstrip(b"\r\n") for line in dictionary_file)
+
+        return write_candidate_store(candidate_store_path, (c for c in candidates if c))
+
+
+def convert_text_dictionaries(dictionary_directory, output_directory):
+    """Converts all the text dictionaries of a directory to candidate stores
+
+    Args:
+        dictionary_directory (string): The directory where to find the text dictionaries.
+        output_directory (string): The directory where the candidate stores will be written to.
+
+    Returns:
+        list: The candidate store file paths.
+    """
+    if not os.path.exists(output_directory):
+        raise IOError("Directory '{0}' does not exist.".format(output_directory))
+
+    candidate_store_paths = []
+
+    for dictionary_file_name in sorted(os.listdir(dictionary_directory)):
+        if not dictionary_file_name.endswith(".txt"):
+            continue
+
+        candidate_store_path = os.path.join(
+            output_directory, os.path.splitext(dictionary_file_name)[0] + CANDIDATE_STORE_EXTENSION)
+
+        convert_text_dictionary(os.path.join(dictionary_directory, dictionary_file_name),
+                                candidate_store_path)
+        candidate_store_paths.append(candidate_store_path)
+
+    return candidate_store_paths
+
+
+class CandidateStore:
+    """Candidate store mapped in memory
+
+    Args:
+        candidate_store_path (string): The candidate store file path (e.g. c:\\temp\\dic\\a.bin).
+    """
+
+    def __init__(self, candidate_store_path):
+        self.candidate_store_path = candidate_store_path
+
+        with open(candidate_store_path, "rb") as candidate_store_file:
+            header = candidate_store_file.read(_HEADER_STRUCT.size)
+
+            if len(header) != _HEADER_STRUCT.size:
+                raise ValueError("File '{0}' is not a candidate store.".format(candidate_store_path))
+
+            magic, version, self.width, self.count, self._index_offset = \
+                _HEADER_STRUCT.unpack(header)
+
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("File '{0}' is not a candidate store (version {1})."
+                                 .format(candidate_store_path, _VERSION))
+
+            self._mmap = mmap.mmap(candidate_store_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._view = memoryview(self._mmap)
+        self._data = self._view[_HEADER_STRUCT.size:self._index_offset]
+
+        # The index is cast in place when the platform is little-endian (no copy)
+        index = self._view[self._index_offset:self._index_offset + 8 * (self.count + 1)]
+
+        if sys.byteorder == "little":
+            self._offsets = index.cast("Q")
+        else:
+            self._offsets = struct.unpack("<{0}Q".format(self.count + 1), index)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0 or index >= self.count:
+            raise IndexError("Index '{0}' is out of the candidate store range.".format(index))
+
+        return self._data[self._offsets[index]:self._offsets[index + 1]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Releases the memory map
+
+        The memory map stays open until garbage collected if candidates returned by this store
+            are still referenced.
+        """
+        if self._mmap.closed:
+            return
+
+        try:
+            if isinstance(self._offsets, memoryview):
+                self._offsets.release()
+
+            self._data.release()
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Candidates (memoryview or packed arrays) are still exported
+            pass
+
+    def candidates(self, start=0, end=None):
+        """Returns the candidates of an index range as zero-copy memoryviews
+
+        Args:
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive). Defaults to the number of candidates.
+
+        Returns:
+            list: The candidate passwords (memoryview).
+        """
+        end = self.count if end is None else min(end, self.count)
+        data = self._data
+        offsets = self._offsets
+
+        return [data[offsets[i]:offsets[i + 1]] for i in range(start, end)]
+
+    def pack(self, start, end):
+        """Returns the candidates of an index range as a fixed-width uint8 array
+
+        Stores of candidates with the same length are returned as a zero-copy view of the memory
+            map. Otherwise, the candidates are gathered into a zero-padded array.
+
+        Args:
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive).
+
+        Returns:
+            tuple: The (candidates, lengths) arrays (see batchverifier.pack_candidates). Lengths
+                is None when all the candidates have the same length.
+        """
+        if numpy is None:
+            raise RuntimeError("NumPy is required to pack candidates.")
+
+        end = min(end, self.count)
+        start = min(start, end)
+        data = numpy.frombuffer(self._data, dtype=numpy.uint8)
+
+        if self.width:
+            return data[start * self.width:end * self.width].reshape(-1, self.width), None
+
+        offsets = numpy.frombuffer(self._mmap, dtype="<u8", count=end - start + 1,
+                                   offset=self._index_offset + 8 * start).astype(numpy.intp)
+        lengths = numpy.diff(offsets)
+        width = int(lengths.max()) if len(lengths) else 0
+        columns = numpy.arange(width)
+        positions = offsets[:-1, None] + columns
+        mask = columns < lengths[:, None]
+        candidates = numpy.where(mask, data[numpy.where(mask, positions, 0)], 0)
+
+        return candidates.astype(numpy.uint8), lengths
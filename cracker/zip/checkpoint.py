@@ -0,0 +1,237 @@
+"""
+Checkpoint of the work completed by long cracking runs.
+
+The checkpoint records, per archive, the ranges completed for every source of passwords:
+    - keyspace:{fingerprint} -> keyspace index ranges.
+    - candidate_store:{path} -> candidate index ranges.
+    - wordlist:{path} -> (uncompressed) byte offset ranges.
+    - dictionary:{path} -> [0, 1) once the whole dictionary file is done.
+
+Completed ranges are merged as they are reported, so the checkpoint stays small however long the run
+    is. The checkpoint is written atomically (temporary file + rename) at a configurable interval,
+    so a run killed at any time leaves the previous checkpoint intact, and a resumed run only loses
+    the work done since the last write.
+
+Checkpoint file (JSON):
+    {
+      "version": 1,
+      "archives": {
+        "c:\\temp\\file.zip": {
+          "password": null,
+          "completed": {"keyspace:0123456789abcdef": [[0, 750000], [1000000, 1250000]]}
+        }
+      }
+    }
+
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import time
+
+
+_VERSION = 1
+
+# Default number of seconds between two checkpoint writes
+DEFAULT_CHECKPOINT_INTERVAL = 60
+
+
+def merge_range(ranges, start, end):
+    """Adds a range to a sorted list of non-overlapping ranges, merging adjacent ones
+
+    Args:
+        ranges (list): The sorted [start, end] ranges, updated in place.
+        start (int): The range start (inclusive).
+        end (int): The range end (exclusive).
+    """
+    if start >= end:
+        return
+
+    i = bisect.bisect_left(ranges, [start, end])
+
+    # Merges with the previous range if they overlap or touch
+    if i > 0 and ranges[i - 1][1] >= start:
+        i = i - 1
+        start = ranges[i][0]
+        end = max(end, ranges[i][1])
+        del ranges[i]
+
+    # Merges with the following ranges
+    while i < len(ranges) and ranges[i][0] <= end:
+        end = max(end, ranges[i][1])
+        del ranges[i]
+
+    ranges.insert(i, [start, end])
+
+
+def get_remaining_ranges(ranges, start, end):
+    """Returns the parts of a range that are not covered by a sorted list of ranges
+
+    Args:
+        ranges (list): The sorted [start, end] completed ranges.
+        start (int): The range start (inclusive).
+        end (int): The range end (exclusive).
+
+    Returns:
+        list: The (start, end) remaining ranges.
+    """
+    remaining_ranges = []
+
+    for completed_start, completed_end in ranges:
+        if completed_end <= start:
+            continue
+
+        if completed_start >= end:
+            break
+
+        if completed_start > start:
+            remaining_ranges.append((start, completed_start))
+
+        start = max(start, completed_end)
+
+    if start < end:
+        remaining_ranges.append((start, end))
+
+    return remaining_ranges
+
+
+class Checkpoint:
+    """Completed work of cracking runs, persisted to a JSON file
+
+    Args:
+        checkpoint_path (string): The checkpoint file path (e.g. c:\\temp\\crack.checkpoint.json).
+        interval (int): The min number of seconds between two writes (see save_if_due).
+        resume (bool): Whether to load the existing checkpoint file (if any) or start from scratch.
+    """
+
+    def __init__(self, checkpoint_path, interval=DEFAULT_CHECKPOINT_INTERVAL, resume=True):
+        if not checkpoint_path or checkpoint_path.isspace():
+            raise ValueError("Checkpoint path cannot be none, empty or whitespace.")
+
+        self.checkpoint_path = checkpoint_path
+        self.interval = interval
+        self.archives = {}
+        self._last_save_time = time.monotonic()
+
+        if resume and os.path.isfile(checkpoint_path):
+            with open(checkpoint_path, "r") as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+
+            if checkpoint.get("version") != _VERSION:
+                raise ValueError("Checkpoint '{0}' version is not supported."
+                                 .format(checkpoint_path))
+
+            self.archives = checkpoint["archives"]
+
+    def _get_archive(self, zip_file_path):
+        """Returns the checkpoint entry of an archive, creating it if needed
+
+        """
+        return self.archives.setdefault(os.path.abspath(zip_file_path),
+                                        {"password": None, "completed": {}})
+
+    def get_completed_ranges(self, zip_file_path, source):
+        """Returns the completed ranges of a source of passwords
+
+        Args:
+            zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+            source (string): The source of passwords (e.g. "keyspace:0123456789abcdef").
+
+        Returns:
+            list: The sorted [start, end] completed ranges.
+        """
+        return self._get_archive(zip_file_path)["completed"].setdefault(source, [])
+
+    def mark_completed(self, zip_file_path, source, start, end):
+        """Records a completed range of a source of passwords
+
+        Args:
+            zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+            source (string): The source of passwords (e.g. "keyspace:0123456789abcdef").
+            start (int): The range start (inclusive).
+            end (int): The range end (exclusive).
+        """
+        merge_range(self.get_completed_ranges(zip_file_path, source), start, end)
+
+    def is_completed(self, zip_file_path, source, start, end):
+        """Returns whether a range of a source of passwords is completely done
+
+        """
+        return not get_remaining_ranges(self.get_completed_ranges(zip_file_path, source),
+                                        start, end)
+
+    def get_remaining_ranges(self, zip_file_path, source, start, end):
+        """Returns the parts of a range of a source of passwords that are not done yet
+
+        Returns:
+            list: The (start, end) remaining ranges.
+        """
+        return get_remaining_ranges(self.get_completed_ranges(zip_file_path, source), start, end)
+
+    def get_resume_offset(self, zip_file_path, source):
+        """Returns the end of the range completed from the beginning of a source of passwords
+
+        Returns:
+            int: The offset to resume streaming the source from.
+        """
+        completed_ranges = self.get_completed_ranges(zip_file_path, source)
+
+        if completed_ranges and completed_ranges[0][0] == 0:
+            return completed_ranges[0][1]
+
+        return 0
+
+    def get_password(self, zip_file_path):
+        """Returns the password found for an archive by a previous run
+
+        Returns:
+            bytes: The password, or None.
+        """
+        password = self._get_archive(zip_file_path)["password"]
+
+        return bytes.fromhex(password) if password is not None else None
+
+    def set_password(self, zip_file_path, password):
+        """Records the password found for an archive
+
+        Args:
+            zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip).
+            password (bytes): The password.
+        """
+        self._get_archive(zip_file_path)["password"] = password.hex()
+
+    def save(self):
+        """Writes the checkpoint file atomically
+
+        """
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(file_descriptor, "w") as checkpoint_file:
+                json.dump({"version": _VERSION, "archives": self.archives}, checkpoint_file)
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+
+            os.replace(temporary_path, self.checkpoint_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        self._last_save_time = time.monotonic()
+
+    def save_if_due(self):
+        """Writes the checkpoint file if the interval elapsed since the last write
+
+        Returns:
+            bool: True if the checkpoint file was written. Otherwise, False.
+        """
+        if time.monotonic() - self._last_save_time < self.interval:
+            return False
+
+        self.save()
+
+        return True
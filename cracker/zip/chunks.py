@@ -0,0 +1,244 @@
+"""
+Work chunks processed by the cracking processes.
+
+A chunk describes a small amount of work (a keyspace range, a candidate store range, a dictionary
+    file, a wordlist byte range or a batch of passwords read from a wordlist) and knows how to
+    generate and verify its passwords in batches. Chunks are small to pickle, so they are sent to
+    the processes over a queue.
+
+Every chunk has a key identifying the work it covers, which is reported back once the chunk is
+    done: (source, start, end), where source identifies the source of passwords (e.g.
+    "keyspace:{fingerprint}" or "wordlist:{path}") and [start, end) the range within it (see
+    checkpoint).
+
+Every chunk also has a work type telling how its passwords are produced, generated in memory
+    ("generation") or read from files ("io"), to which the time not spent verifying them is
+    attributed (see telemetry).
+
+"""
+
+import batchverifier
+
+from candidatestore import CandidateStore
+from telemetry import TIME_GENERATION, TIME_IO
+from wordlist import WordlistReader, read_wordlist_range
+
+
+# Number of passwords verified between two checks of the stop flag
+DEFAULT_BATCH_SIZE = 4096
+
+
+def get_source(source_type, name, rule_set=None):
+    """Returns the source of passwords of a chunk key
+
+    Args:
+        source_type (string): The source type (e.g. "wordlist").
+        name (string): The source name (e.g. c:\\temp\\rockyou.txt).
+        rule_set (RuleSet): The rules expanding the words of the source (if any).
+
+    Returns:
+        string: The source (e.g. "wordlist:c:\\temp\\rockyou.txt").
+    """
+    source = "{0}:{1}".format(source_type, name)
+
+    if rule_set is not None:
+        source = "{0}+rules:{1}".format(source, rule_set.fingerprint)
+
+    return source
+
+
+def _find_in_batches(archive_context, should_stop, batches, rule_set, batch_size):
+    """Verifies batches of words, expanded with rules (if any)
+
+    Returns:
+        bytes: The password that decrypts the archive, or None.
+    """
+    if rule_set is not None:
+        batches = rule_set.expand_batches(batches, batch_size)
+
+    for passwords in batches:
+        if should_stop():
+            return None
+
+        passwords = archive_context.verify_batch(passwords)
+
+        if passwords:
+            return passwords[0]
+
+    return None
+
+
+class KeyspaceChunk:
+    """Range of a keyspace generated in memory
+
+    Args:
+        keyspace (Keyspace): The keyspace to generate passwords from.
+        start (int): The first keyspace index (inclusive).
+        end (int): The last keyspace index (exclusive).
+    """
+
+    work_type = TIME_GENERATION
+
+    def __init__(self, keyspace, start, end):
+        self.keyspace = keyspace
+        self.start = start
+        self.end = end
+        self.size = end - start
+        self.key = ("keyspace:" + keyspace.fingerprint, start, end)
+
+    def find(self, archive_context, should_stop, batch_size=DEFAULT_BATCH_SIZE):
+        """Verifies the passwords of the chunk
+
+        Args:
+            archive_context (ArchiveContext): The archive context to verify passwords with.
+            should_stop (callable): Returns True when the processing must stop (checked between
+                batches).
+            batch_size (int): The number of passwords verified at a time.
+
+        Returns:
+            bytes: The password that decrypts the archive, or None.
+        """
+        keyspace = self.keyspace
+        is_packed = batchverifier.is_available() and keyspace.is_single_byte
+
+        for batch_start, batch_end in keyspace.ranges(batch_size, self.start, self.end):
+            if should_stop():
+                return None
+
+            if is_packed:
+                candidates = keyspace.pack(batch_start, batch_end)
+                passwords = [candidates[i].tobytes()
+                             for i in archive_context.verify_packed(candidates)]
+            else:
+                passwords = archive_context.verify_batch(
+                    list(keyspace.candidates(batch_start, batch_end)))
+
+            if passwords:
+                return passwords[0]
+
+        return None
+
+
+class CandidateStoreChunk:
+    """Range of a binary candidate store (see candidatestore)
+
+    Args:
+        candidate_store_path (string): The candidate store file path (c:\\temp\\dic\\a.bin).
+        start (int): The first candidate index (inclusive).
+        end (int): The last candidate index (exclusive).
+    """
+
+    work_type = TIME_IO
+
+    def __init__(self, candidate_store_path, start, end):
+        self.candidate_store_path = candidate_store_path
+        self.start = start
+        self.end = end
+        self.size = end - start
+        self.key = ("candidate_store:" + candidate_store_path, start, end)
+
+    def find(self, archive_context, should_stop, batch_size=DEFAULT_BATCH_SIZE):
+        """Verifies the passwords of the chunk (see KeyspaceChunk.find)
+
+        """
+        with CandidateStore(self.candidate_store_path) as candidate_store:
+            for batch_start in range(self.start, min(self.end, len(candidate_store)), batch_size):
+                if should_stop():
+                    return None
+
+                batch_end = min(batch_start + batch_size, self.end)
+
+                if batchverifier.is_available():
+                    candidates, lengths = candidate_store.pack(batch_start, batch_end)
+                    passwords = [candidate_store[batch_start + i].tobytes()
+                                 for i in archive_context.verify_packed(candidates, lengths)]
+                else:
+                    passwords = [password.tobytes() for password in archive_context.verify_batch(
+                        candidate_store.candidates(batch_start, batch_end))]
+
+                if passwords:
+                    return passwords[0]
+
+        return None
+
+
+class DictionaryChunk:
+    """Text dictionary file (one password per line), streamed in batches
+
+    Args:
+        dictionary_file_path (string): The dictionary file path (c:\\temp\\dic\\dictionary_1_0.txt).
+        rule_set (RuleSet): Optional rules expanding every word of the dictionary.
+    """
+
+    work_type = TIME_IO
+
+    def __init__(self, dictionary_file_path, rule_set=None):
+        self.dictionary_file_path = dictionary_file_path
+        self.rule_set = rule_set
+        self.size = None
+        self.key = (get_source("dictionary", dictionary_file_path, rule_set), 0, 1)
+
+    def find(self, archive_context, should_stop, batch_size=DEFAULT_BATCH_SIZE):
+        """Verifies the passwords of the chunk (see KeyspaceChunk.find)
+
+        """
+        with WordlistReader(self.dictionary_file_path, batch_size=batch_size) as wordlist_reader:
+            return _find_in_batches(archive_context, should_stop, wordlist_reader, self.rule_set,
+                                    batch_size)
+
+
+class WordlistRangeChunk:
+    """Byte range of an uncompressed wordlist, read by the process itself (see read_wordlist_range)
+
+    Args:
+        wordlist_path (string): The wordlist file path (e.g. c:\\temp\\rockyou.txt).
+        start (int): The first byte offset (inclusive).
+        end (int): The last byte offset (exclusive).
+        rule_set (RuleSet): Optional rules expanding every word of the range.
+    """
+
+    work_type = TIME_IO
+
+    def __init__(self, wordlist_path, start, end, rule_set=None):
+        self.wordlist_path = wordlist_path
+        self.start = start
+        self.end = end
+        self.rule_set = rule_set
+        self.size = end - start
+        self.key = (get_source("wordlist", wordlist_path, rule_set), start, end)
+
+    def find(self, archive_context, should_stop, batch_size=DEFAULT_BATCH_SIZE):
+        """Verifies the passwords of the chunk (see KeyspaceChunk.find)
+
+        """
+        batches = read_wordlist_range(self.wordlist_path, self.start, self.end, batch_size)
+
+        return _find_in_batches(archive_context, should_stop, batches, self.rule_set, batch_size)
+
+
+class PasswordsChunk:
+    """Batch of passwords already in memory (e.g. read from a wordlist by the main process)
+
+    Args:
+        passwords (list): The passwords (bytes).
+        key (tuple): The key identifying the batch (e.g. ("wordlist:{path}", start, end)).
+        rule_set (RuleSet): Optional rules expanding every password of the batch (in the process
+            verifying the chunk, so only the words are sent over the queue).
+    """
+
+    work_type = TIME_GENERATION
+
+    def __init__(self, passwords, key, rule_set=None):
+        self.passwords = passwords
+        self.rule_set = rule_set
+        self.size = len(passwords)
+        self.key = key
+
+    def find(self, archive_context, should_stop, batch_size=DEFAULT_BATCH_SIZE):
+        """Verifies the passwords of the chunk (see KeyspaceChunk.find)
+
+        """
+        batches = (self.passwords[i:i + batch_size]
+                   for i in range(0, len(self.passwords), batch_size))
+
+        return _find_in_batches(archive_context, should_stop, batches, self.rule_set, batch_size)
@@ -0,0 +1,572 @@
+"""
+Coordinator and workers to crack a ZIP file across several nodes.
+
+The coordinator owns the partition table of the sources of passwords (keyspace index ranges,
+    including Markov keyspaces, and wordlist byte ranges) and leases chunks of it to the workers
+    over TCP. Each worker pulls a chunk, verifies it locally with its own cracking pool (see
+    scheduler.py) and reports the hit or the completion, which also asks for the next chunk.
+
+Leases:
+    - A lease not reported within the lease timeout (e.g. the worker died or lost its connection)
+        expires, and its range is issued again to the next worker asking for work.
+    - The size of a lease is adapted to the throughput measured on the previous leases of the
+        worker, so every lease takes about the same time (lease duration) on fast and slow nodes.
+    - The last ranges are split across the active workers, so they finish together.
+
+Protocol (one JSON object per line, every worker message is answered with a chunk, wait or stop):
+    worker -> {"type": "lease", "worker": "node1:1234"}
+    worker -> {"type": "done", "worker": "node1:1234", "lease": 1, "elapsed": 9.8}
+    worker -> {"type": "found", "worker": "node1:1234", "lease": 1, "password": "7a7a7a7a"}
+    coordinator -> {"type": "chunk", "lease": 1, "source": {...}, "start": 0, "end": 250000}
+    coordinator -> {"type": "wait", "seconds": 1}
+    coordinator -> {"type": "stop", "password": "7a7a7a7a"}
+
+Example:
+    # Coordinator node
+    with Coordinator(zip_file_path, keyspace=Keyspace.brute_force(6)) as coordinator:
+        password = coordinator.serve()
+
+    # Worker nodes (the ZIP file and the wordlist must be available locally)
+    run_worker(zip_file_path, "coordinator-host", max_degree_of_parallelism=8)
+
+Attention:
+    - The protocol is neither authenticated nor encrypted, so it must only be used on a trusted
+        network.
+
+"""
+
+import itertools
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from archive import AES_CHUNK_SIZE, get_archive_context
+from checkpoint import merge_range
+from chunks import KeyspaceChunk, WordlistRangeChunk
+from keyspace import Keyspace
+from markov import MarkovKeyspace
+from scheduler import CrackingPool
+from wordlist import get_wordlist_size, is_compressed_wordlist
+
+
+DEFAULT_PORT = 50505
+
+# Default number of seconds after which a lease not reported is issued again
+DEFAULT_LEASE_TIMEOUT = 120
+
+# Default number of seconds each lease should take on any worker
+DEFAULT_LEASE_DURATION = 10
+
+# Default number of passwords of the first lease of a worker (before its throughput is known)
+DEFAULT_CHUNK_SIZE = 250000
+
+# Average number of bytes per password of a wordlist, used to size the first wordlist leases
+_WORDLIST_BYTES_PER_PASSWORD = 8
+
+# Smallest lease of every source, so the tail is not split into tiny leases
+_MIN_KEYSPACE_CHUNK_SIZE = 1024
+_MIN_WORDLIST_CHUNK_SIZE = 65536
+
+# Weight of the last lease in the throughput of a worker (exponential moving average)
+_THROUGHPUT_SMOOTHING = 0.5
+
+# Number of local chunks per process a lease is split into, so the local pool stays balanced
+_CHUNKS_PER_PROCESS = 4
+
+
+def _send(file, message):
+    """Sends a message (one JSON object per line)
+
+    """
+    file.write(json.dumps(message).encode() + b"\n")
+    file.flush()
+
+
+def _receive(file):
+    """Receives a message (one JSON object per line)
+
+    Returns:
+        dict: The message.
+    """
+    line = file.readline()
+
+    if not line:
+        raise ConnectionError("Connection was closed.")
+
+    return json.loads(line)
+
+
+class _Source:
+    """Source of passwords partitioned by the coordinator
+
+    Args:
+        name (string): The source name, also used as checkpoint source (e.g. "keyspace:{fp}").
+        description (dict): The description sent to the workers.
+        pending_ranges (list): The [start, end] ranges not leased yet.
+        initial_chunk_size (int): The size of the first lease of a worker.
+        min_chunk_size (int): The smallest lease size.
+    """
+
+    def __init__(self, name, description, pending_ranges, initial_chunk_size, min_chunk_size):
+        self.name = name
+        self.description = description
+        self.pending_ranges = [list(r) for r in pending_ranges]
+        self.initial_chunk_size = initial_chunk_size
+        self.min_chunk_size = min_chunk_size
+
+
+class _Lease:
+    """Range of a source leased to a worker
+
+    """
+
+    def __init__(self, worker_id, source, start, end, deadline):
+        self.worker_id = worker_id
+        self.source = source
+        self.start = start
+        self.end = end
+        self.deadline = deadline
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the messages of a worker connection
+
+    """
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+
+            if not line:
+                break
+
+            _send(self.wfile, self.server.coordinator.handle_message(json.loads(line)))
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator:
+    """Leases the chunks of a cracking run to workers over TCP
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\file.zip), used to confirm the
+            passwords reported by the workers.
+        keyspace (Keyspace): The keyspace (or MarkovKeyspace) to generate possible passwords from.
+        wordlist_path (string): The external wordlist file path (the workers have their own copy),
+            uncompressed so the workers can seek to their byte ranges.
+        host (string): The interface to listen on. Defaults to all interfaces.
+        port (int): The port to listen on (0 picks a free port, see address).
+        lease_timeout (float): The number of seconds after which a lease not reported is issued
+            again.
+        lease_duration (float): The number of seconds each lease should take on any worker.
+        chunk_size (int): The number of passwords of the first lease of a worker.
+        checkpoint (Checkpoint): Optional checkpoint whose completed ranges are skipped and where
+            the completed leases are recorded.
+        mask (Mask): The mask to generate possible passwords from (one source per length).
+    """
+
+    def __init__(self, zip_file_path, keyspace=None, wordlist_path=None, host="",
+                 port=DEFAULT_PORT, lease_timeout=DEFAULT_LEASE_TIMEOUT,
+                 lease_duration=DEFAULT_LEASE_DURATION, chunk_size=DEFAULT_CHUNK_SIZE,
+                 checkpoint=None, mask=None):
+        if keyspace is None and not wordlist_path and mask is None:
+            raise ValueError("Keyspace, wordlist path or mask must be provided.")
+
+        if lease_timeout <= 0 or lease_duration <= 0:
+            raise ValueError("Lease timeout and duration must to be greater than 0.")
+
+        # Every range of a compressed wordlist would be decompressed from the start
+        if wordlist_path and is_compressed_wordlist(wordlist_path):
+            raise ValueError("Wordlist '{0}' is compressed, decompress it to crack it across "
+                             "several nodes.".format(wordlist_path))
+
+        self.zip_file_path = zip_file_path
+        self.host = host
+        self.port = port
+        self.lease_timeout = lease_timeout
+        self.lease_duration = lease_duration
+        self.checkpoint = checkpoint
+        self.address = None
+        self.password = checkpoint.get_password(zip_file_path) if checkpoint else None
+
+        self._archive_context = get_archive_context(zip_file_path)
+
+        # WinZip AES passwords are ~1000 times more expensive to verify (PBKDF2)
+        if self._archive_context.is_aes:
+            chunk_size = min(chunk_size, AES_CHUNK_SIZE)
+        self._sources = []
+        self._leases = {}
+        self._lease_ids = itertools.count(1)
+        self._throughputs = {}
+        self._workers = {}
+        self._chunk_done_callback = None
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._server = None
+        self._server_thread = None
+
+        if wordlist_path:
+            self._add_source("wordlist:" + os.path.abspath(wordlist_path),
+                             {"type": "wordlist", "name": os.path.basename(wordlist_path)},
+                             get_wordlist_size(wordlist_path),
+                             chunk_size * _WORDLIST_BYTES_PER_PASSWORD, _MIN_WORDLIST_CHUNK_SIZE)
+
+        keyspaces = ([keyspace] if keyspace is not None else []) + (mask.keyspaces if mask else [])
+
+        for keyspace in keyspaces:
+            if isinstance(keyspace, MarkovKeyspace):
+                description = {"type": "markov", "fingerprint": keyspace.fingerprint,
+                               "charset": keyspace.charset.hex(),
+                               "levels": [table.hex() for table in keyspace.levels],
+                               "min_length": keyspace.min_length,
+                               "max_length": keyspace.max_length,
+                               "max_level": keyspace.max_level}
+            else:
+                description = {"type": "keyspace", "fingerprint": keyspace.fingerprint,
+                               "charsets": [[s.hex() for s in charset]
+                                            for charset in keyspace.charsets]}
+
+            self._add_source("keyspace:" + keyspace.fingerprint, description, keyspace.size,
+                             chunk_size, _MIN_KEYSPACE_CHUNK_SIZE)
+
+    def _add_source(self, name, description, size, initial_chunk_size, min_chunk_size):
+        """Adds a source of passwords, skipping the ranges completed by a previous run
+
+        """
+        if self.checkpoint:
+            pending_ranges = self.checkpoint.get_remaining_ranges(self.zip_file_path, name, 0, size)
+        else:
+            pending_ranges = [(0, size)] if size else []
+
+        self._sources.append(_Source(name, description, pending_ranges, initial_chunk_size,
+                                     min_chunk_size))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """Starts listening for workers
+
+        """
+        self._server = _Server((self.host, self.port), _RequestHandler)
+        self._server.coordinator = self
+        self.address = self._server.server_address
+
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+
+    def close(self):
+        """Stops listening for workers and writes the checkpoint (if any)
+
+        """
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+        if self.checkpoint:
+            with self._lock:
+                self.checkpoint.save()
+
+    def serve(self, chunk_done_callback=None):
+        """Leases chunks until all of them are done or the password is found
+
+        Args:
+            chunk_done_callback (callable): Optional function called with the (key, size) of every
+                lease completed by a worker.
+
+        Returns:
+            bytes: The password that decrypts the archive, or None.
+        """
+        if self._server is None:
+            raise RuntimeError("Coordinator was not started.")
+
+        self._chunk_done_callback = chunk_done_callback
+
+        with self._lock:
+            self._update_finished()
+
+        # Expired leases are also issued again when no worker is asking for work
+        while not self._finished.wait(1):
+            with self._lock:
+                self._expire_leases(time.monotonic())
+
+        return self.password
+
+    def handle_message(self, message):
+        """Handles a worker message
+
+        Args:
+            message (dict): The worker message (lease, done or found).
+
+        Returns:
+            dict: The response (chunk, wait or stop).
+        """
+        worker_id = message["worker"]
+        message_type = message["type"]
+
+        with self._lock:
+            now = time.monotonic()
+            self._workers[worker_id] = now
+
+            if message_type == "done":
+                self._complete_lease(message["lease"], message["elapsed"])
+            elif message_type == "found":
+                self._confirm_password(message["lease"], bytes.fromhex(message["password"]))
+            elif message_type != "lease":
+                raise ValueError("Message type '{0}' is not supported.".format(message_type))
+
+            self._expire_leases(now)
+
+            return self._lease(worker_id, now)
+
+    def _lease(self, worker_id, now):
+        """Leases the next chunk to a worker
+
+        """
+        if self.password is None:
+            for source in self._sources:
+                if not source.pending_ranges:
+                    continue
+
+                pending_range = source.pending_ranges[0]
+                start = pending_range[0]
+                end = min(pending_range[1], start + self._get_chunk_size(worker_id, source, now))
+
+                if end == pending_range[1]:
+                    del source.pending_ranges[0]
+                else:
+                    pending_range[0] = end
+
+                lease_id = next(self._lease_ids)
+                self._leases[lease_id] = _Lease(worker_id, source, start, end,
+                                                now + self.lease_timeout)
+
+                return {"type": "chunk", "lease": lease_id, "source": source.description,
+                        "start": start, "end": end}
+
+            # Ranges leased to other workers may still be issued again
+            if self._leases:
+                return {"type": "wait", "seconds": 1}
+
+        self._update_finished()
+
+        return {"type": "stop",
+                "password": self.password.hex() if self.password is not None else None}
+
+    def _get_chunk_size(self, worker_id, source, now):
+        """Returns the size of the next lease of a worker from its measured throughput
+
+        """
+        throughput = self._throughputs.get((worker_id, source.name))
+
+        if throughput is None:
+            chunk_size = source.initial_chunk_size
+        else:
+            chunk_size = int(throughput * self.lease_duration)
+
+        # Splits the last ranges across the active workers, so they finish together
+        active_workers = sum(1 for last_seen in self._workers.values()
+                             if now - last_seen < self.lease_timeout)
+        pending_size = sum(end - start for start, end in source.pending_ranges)
+        chunk_size = min(chunk_size, math.ceil(pending_size / max(active_workers, 1)))
+
+        return max(chunk_size, source.min_chunk_size)
+
+    def _complete_lease(self, lease_id, elapsed):
+        """Records a lease completed by a worker
+
+        """
+        lease = self._leases.pop(lease_id, None)
+
+        # The lease expired and its range was issued again
+        if lease is None:
+            return
+
+        size = lease.end - lease.start
+        throughput = size / max(elapsed, 0.001)
+        throughput_key = (lease.worker_id, lease.source.name)
+        previous_throughput = self._throughputs.get(throughput_key)
+
+        if previous_throughput is not None:
+            throughput = (_THROUGHPUT_SMOOTHING * throughput
+                          + (1 - _THROUGHPUT_SMOOTHING) * previous_throughput)
+
+        self._throughputs[throughput_key] = throughput
+
+        if self.checkpoint:
+            self.checkpoint.mark_completed(self.zip_file_path, lease.source.name, lease.start,
+                                           lease.end)
+            self.checkpoint.save_if_due()
+
+        if self._chunk_done_callback:
+            self._chunk_done_callback((lease.source.name, lease.start, lease.end), size)
+
+        self._update_finished()
+
+    def _confirm_password(self, lease_id, password):
+        """Confirms a password reported by a worker
+
+        """
+        lease = self._leases.pop(lease_id, None)
+
+        if self._archive_context.verify(password):
+            self.password = password
+
+            if self.checkpoint:
+                self.checkpoint.set_password(self.zip_file_path, password)
+
+            self._finished.set()
+        elif lease is not None:
+            # Wrong password (e.g. a worker with another ZIP file), the range is issued again
+            merge_range(lease.source.pending_ranges, lease.start, lease.end)
+
+    def _expire_leases(self, now):
+        """Issues again the ranges of the leases not reported within the lease timeout
+
+        """
+        for lease_id, lease in list(self._leases.items()):
+            if lease.deadline <= now:
+                del self._leases[lease_id]
+                merge_range(lease.source.pending_ranges, lease.start, lease.end)
+
+    def _update_finished(self):
+        """Flags the run as finished once the password is found or all the chunks are done
+
+        """
+        if self.password is not None or (
+                not self._leases and not any(s.pending_ranges for s in self._sources)):
+            self._finished.set()
+
+
+def _connect(host, port, connect_timeout):
+    """Connects to the coordinator, retrying until it is listening
+
+    Returns:
+        socket.socket: The connection.
+    """
+    deadline = time.monotonic() + connect_timeout
+
+    while True:
+        try:
+            connection = socket.create_connection((host, port), timeout=connect_timeout)
+            connection.settimeout(None)
+            return connection
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+
+            time.sleep(0.5)
+
+
+def _get_local_chunks(lease, keyspaces, wordlist_path, max_degree_of_parallelism):
+    """Splits a lease into chunks for the local cracking pool
+
+    Args:
+        lease (dict): The chunk message received from the coordinator.
+        keyspaces (dict): The keyspaces already received, keyed by fingerprint.
+        wordlist_path (string): The local copy of the wordlist (if any).
+        max_degree_of_parallelism (int): The number of local processes.
+
+    Returns:
+        list: The chunks (see chunks).
+    """
+    source = lease["source"]
+    start = lease["start"]
+    end = lease["end"]
+    chunk_size = max(math.ceil((end - start) / (max_degree_of_parallelism * _CHUNKS_PER_PROCESS)),
+                     1)
+
+    if source["type"] in ("keyspace", "markov"):
+        keyspace = keyspaces.get(source["fingerprint"])
+
+        if keyspace is None and source["type"] == "markov":
+            keyspace = MarkovKeyspace(bytes.fromhex(source["charset"]),
+                                      [bytes.fromhex(table) for table in source["levels"]],
+                                      source["min_length"], source["max_length"],
+                                      source["max_level"])
+            keyspaces[source["fingerprint"]] = keyspace
+        elif keyspace is None:
+            keyspace = Keyspace([[bytes.fromhex(s) for s in charset]
+                                 for charset in source["charsets"]])
+            keyspaces[source["fingerprint"]] = keyspace
+
+        return [KeyspaceChunk(keyspace, chunk_start, chunk_end)
+                for chunk_start, chunk_end in keyspace.ranges(chunk_size, start, end)]
+
+    if source["type"] == "wordlist":
+        if not wordlist_path:
+            raise ValueError("Wordlist path must be provided to crack wordlist '{0}'."
+                             .format(source["name"]))
+
+        return [WordlistRangeChunk(wordlist_path, chunk_start, min(chunk_start + chunk_size, end))
+                for chunk_start in range(start, end, chunk_size)]
+
+    raise ValueError("Source type '{0}' is not supported.".format(source["type"]))
+
+
+def run_worker(zip_file_path, host, port=DEFAULT_PORT, max_degree_of_parallelism=1,
+               wordlist_path=None, worker_id=None, connect_timeout=30):
+    """Verifies the chunks leased by a coordinator until it stops the run
+
+    Args:
+        zip_file_path (string): The local copy of the ZIP file (e.g. c:\\temp\\file.zip).
+        host (string): The coordinator host.
+        port (int): The coordinator port.
+        max_degree_of_parallelism (int): The number of local cracking processes.
+        wordlist_path (string): The local copy of the wordlist leased by the coordinator (if any).
+        worker_id (string): The worker identifier. Defaults to {hostname}:{pid}.
+        connect_timeout (float): The number of seconds to wait for the coordinator to listen.
+
+    Returns:
+        bytes: The password found by any worker, or None (also if the coordinator went away).
+    """
+    if worker_id is None:
+        worker_id = "{0}:{1}".format(socket.gethostname(), os.getpid())
+
+    keyspaces = {}
+
+    with CrackingPool(zip_file_path, max_degree_of_parallelism) as cracking_pool, \
+            _connect(host, port, connect_timeout) as connection, \
+            connection.makefile("rwb") as file:
+        try:
+            _send(file, {"type": "lease", "worker": worker_id})
+            response = _receive(file)
+
+            while response["type"] != "stop":
+                if response["type"] == "wait":
+                    time.sleep(response["seconds"])
+                    _send(file, {"type": "lease", "worker": worker_id})
+                    response = _receive(file)
+                    continue
+
+                chunks = _get_local_chunks(response, keyspaces, wordlist_path,
+                                           cracking_pool.max_degree_of_parallelism)
+
+                start = time.monotonic()
+                password = cracking_pool.run(chunks)
+                elapsed = time.monotonic() - start
+
+                if password is not None:
+                    _send(file, {"type": "found", "worker": worker_id, "lease": response["lease"],
+                                 "password": password.hex()})
+                else:
+                    _send(file, {"type": "done", "worker": worker_id, "lease": response["lease"],
+                                 "elapsed": elapsed})
+
+                response = _receive(file)
+        except ConnectionError:
+            return None
+
+    return bytes.fromhex(response["password"]) if response["password"] is not None else None
@@ -0,0 +1,169 @@
+"""
+Encrypted ZIP files with known passwords (tests and benchmarks).
+
+zipfile can decrypt ZipCrypto members but cannot write encrypted members at all (ZipCrypto or
+    WinZip AES), so the members are encrypted here with the same ciphers the cracker verifies
+    passwords with (see zipcrypto.py and winzipaes.py), and the local file headers, central
+    directory and end of central directory records are written by hand.
+
+Example:
+    write_zipcrypto_zip("c:\\temp\\raw.zip", [("raw.txt", b"Hello World!")], b"a1!")
+    write_aes_zip("c:\\temp\\aes.zip", [("aes.txt", b"Hello World!")], b"a1!")
+    write_mixed_zip("c:\\temp\\mixed.zip", [("raw.txt", b"Hello")], [("aes.txt", b"World")],
+                    b"a1!")
+
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+import zipfile
+import zlib
+
+from winzipaes import (AUTHENTICATION_CODE_LENGTH, COMPRESS_TYPE_AES, EXTRA_FIELD_ID, KEY_LENGTHS,
+                       VENDOR_VERSION_AE1, VENDOR_VERSION_AE2, WinZipAesCipher, derive_keys)
+from zipcrypto import ZipCryptoCipher
+
+
+def _compress(data, compress_type):
+    """Compresses the data of a member (raw deflate stream, as stored in ZIP files)
+
+    """
+    if compress_type != zipfile.ZIP_DEFLATED:
+        return data
+
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+
+    return compressor.compress(data) + compressor.flush()
+
+
+def _write_zip(zip_file_path, records):
+    """Writes the members of a ZIP file
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\raw.zip).
+        records (list): The (local file header, central directory header) of each member, both
+            without the offset of the local file header, which is appended to the central
+            directory header.
+    """
+    local_file_headers = []
+    central_directory = []
+    offset = 0
+
+    for local_file_header, central_directory_header in records:
+        local_file_headers.append(local_file_header)
+        central_directory.append(central_directory_header(offset))
+        offset = offset + len(local_file_header)
+
+    central_directory_data = b"".join(central_directory)
+
+    with open(zip_file_path, "wb") as zip_file:
+        zip_file.write(b"".join(local_file_headers))
+        zip_file.write(central_directory_data)
+        zip_file.write(struct.pack("<4s4H2LH", b"PK\005\006", 0, 0, len(records), len(records),
+                                   len(central_directory_data), offset, 0))
+
+
+def _get_zipcrypto_records(members, password, compress_type=zipfile.ZIP_DEFLATED):
+    """Returns the records of members encrypted with ZipCrypto (see _write_zip)
+
+    """
+    records = []
+
+    for name, data in members:
+        crc = zlib.crc32(data)
+        encrypted = ZipCryptoCipher(password).encrypt(
+            os.urandom(11) + bytes([crc >> 24]) + _compress(data, compress_type))
+        file_name = name.encode()
+
+        local_file_header = struct.pack(
+            "<4s2B4HL2L2H", b"PK\003\004", 20, 0, 0x1, compress_type, 0, 0x21, crc,
+            len(encrypted), len(data), len(file_name), 0) + file_name + encrypted
+
+        def central_directory_header(offset, crc=crc, encrypted=encrypted, data=data,
+                                     file_name=file_name):
+            return struct.pack(
+                "<4s4B4HL2L5H2L", b"PK\001\002", 20, 0, 20, 0, 0x1, compress_type, 0, 0x21, crc,
+                len(encrypted), len(data), len(file_name), 0, 0, 0, 0, 0, offset) + file_name
+
+        records.append((local_file_header, central_directory_header))
+
+    return records
+
+
+def _get_aes_records(members, password, strength=3, vendor_version=VENDOR_VERSION_AE2,
+                     compress_type=zipfile.ZIP_DEFLATED):
+    """Returns the records of members encrypted with WinZip AES (see _write_zip)
+
+    """
+    records = []
+
+    for name, data in members:
+        crc = zlib.crc32(data) if vendor_version == VENDOR_VERSION_AE1 else 0
+        salt = os.urandom(KEY_LENGTHS[strength] // 2)
+        aes_key, hmac_key, password_verifier = derive_keys(password, salt, KEY_LENGTHS[strength])
+        encrypted = WinZipAesCipher(aes_key).encrypt(_compress(data, compress_type))
+        authentication_code = hmac.new(hmac_key, encrypted, hashlib.sha1).digest()[
+            :AUTHENTICATION_CODE_LENGTH]
+        encrypted = salt + password_verifier + encrypted + authentication_code
+
+        file_name = name.encode()
+        extra = struct.pack("<2HH2sBH", EXTRA_FIELD_ID, 7, vendor_version, b"AE", strength,
+                            compress_type)
+
+        local_file_header = struct.pack(
+            "<4s2B4HL2L2H", b"PK\003\004", 51, 0, 0x1, COMPRESS_TYPE_AES, 0, 0x21, crc,
+            len(encrypted), len(data), len(file_name), len(extra)) + file_name + extra + encrypted
+
+        def central_directory_header(offset, crc=crc, encrypted=encrypted, data=data,
+                                     file_name=file_name, extra=extra):
+            return struct.pack(
+                "<4s4B4HL2L5H2L", b"PK\001\002", 51, 0, 51, 0, 0x1, COMPRESS_TYPE_AES, 0, 0x21,
+                crc, len(encrypted), len(data), len(file_name), len(extra), 0, 0, 0, 0,
+                offset) + file_name + extra
+
+        records.append((local_file_header, central_directory_header))
+
+    return records
+
+
+def write_zipcrypto_zip(zip_file_path, members, password, compress_type=zipfile.ZIP_DEFLATED):
+    """Writes a ZIP file whose members are encrypted with ZipCrypto
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\raw.zip).
+        members (list): The (name, data) of each member.
+        password (bytes): The password.
+        compress_type (int): The compression method (zipfile.ZIP_DEFLATED or ZIP_STORED).
+    """
+    _write_zip(zip_file_path, _get_zipcrypto_records(members, password, compress_type))
+
+
+def write_aes_zip(zip_file_path, members, password, strength=3, vendor_version=VENDOR_VERSION_AE2,
+                  compress_type=zipfile.ZIP_DEFLATED):
+    """Writes a ZIP file whose members are encrypted with WinZip AES
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\aes.zip).
+        members (list): The (name, data) of each member.
+        password (bytes): The password.
+        strength (int): The key strength (1 = AES-128, 2 = AES-192, 3 = AES-256).
+        vendor_version (int): The vendor version (AE-1 keeps the CRC-32, AE-2 does not).
+        compress_type (int): The compression method (zipfile.ZIP_DEFLATED or ZIP_STORED).
+    """
+    _write_zip(zip_file_path, _get_aes_records(members, password, strength, vendor_version,
+                                               compress_type))
+
+
+def write_mixed_zip(zip_file_path, zipcrypto_members, aes_members, password):
+    """Writes a ZIP file mixing members encrypted with ZipCrypto and with WinZip AES
+
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\\temp\\mixed.zip).
+        zipcrypto_members (list): The (name, data) of each member encrypted with ZipCrypto.
+        aes_members (list): The (name, data) of each member encrypted with WinZip AES.
+        password (bytes): The password of all the members.
+    """
+    _write_zip(zip_file_path, _get_zipcrypto_records(zipcrypto_members, password)
+               + _get_aes_records(aes_members, password))
@@ -0,0 +1,317 @@
+"""
+Adaptive degree of parallelism of the cracking processes.
+
+A fixed number of processes per core wastes dedicated nodes (too few processes) and oversubscribes
+    shared ones (too many), so the governor measures the run instead:
+    - The CPUs available are the CPUs the process may run on (affinity) bounded by the cgroup CPU
+        quota (e.g. docker run --cpus=2), not the number of cores of the host.
+    - The processes are limited to a CPU envelope (fraction of the CPUs available, minus the load of
+        the other processes of the node) and a memory envelope (fraction of the memory available,
+        including the cgroup memory limit, divided by the memory used per process).
+    - Within the envelope, the pool grows as long as the aggregate throughput (passwords verified
+        per second) improves, then settles on the best number of processes measured. It shrinks as
+        soon as the envelope does (e.g. another job starts on the node), and grows again once it
+        has room.
+
+Example:
+    governor = ParallelismGovernor(cpu_fraction=0.75)
+
+    with CrackingPool(zip_file_path, governor.degree_of_parallelism,
+                      governor=governor) as cracking_pool:
+        password = cracking_pool.run(chunks)
+
+Attention:
+    - The cgroup files and the memory of the processes are only read on Linux. Elsewhere, the
+        envelope is based on the CPU count and the throughput only.
+
+"""
+
+import math
+import os
+import time
+
+
+# Default fraction of the CPUs available the processes may use
+DEFAULT_CPU_FRACTION = 1.0
+
+# Default fraction of the memory available the processes may use
+DEFAULT_MEMORY_FRACTION = 0.5
+
+# Default number of seconds the throughput is measured for before resizing the pool
+DEFAULT_SAMPLE_INTERVAL = 10
+
+# Default min throughput gain for more processes to be worth it (below, it is measurement noise)
+DEFAULT_MIN_GAIN = 0.05
+
+_CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+_CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+_CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+_CGROUP_MEMORY_FILES = (
+    ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+    ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"))
+_MEMINFO = "/proc/meminfo"
+
+# cgroup v1 reports "no limit" as a huge number instead of "max"
+_UNLIMITED_MEMORY = 1 << 60
+
+
+def _read_file(path):
+    """Returns the content of a (pseudo) file, or None if it cannot be read
+
+    """
+    try:
+        with open(path, "r") as file:
+            return file.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def get_cpu_quota():
+    """Returns the number of CPUs allowed by the cgroup CPU quota (e.g. in a container)
+
+    Returns:
+        float: The number of CPUs (e.g. 1.5), or None without quota.
+    """
+    cpu_max = _read_file(_CGROUP_V2_CPU_MAX)
+
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+
+        return int(quota) / int(period) if quota != "max" and period else None
+
+    quota = _read_file(_CGROUP_V1_CPU_QUOTA)
+    period = _read_file(_CGROUP_V1_CPU_PERIOD)
+
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+
+    return None
+
+
+def get_cpu_count():
+    """Returns the number of CPUs available to the process (affinity and cgroup CPU quota)
+
+    Returns:
+        int: The number of CPUs.
+    """
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on Windows and macOS
+        cpu_count = os.cpu_count() or 1
+
+    cpu_quota = get_cpu_quota()
+
+    if cpu_quota is not None:
+        cpu_count = min(cpu_count, max(math.ceil(cpu_quota), 1))
+
+    return cpu_count
+
+
+def get_memory_available():
+    """Returns the memory available to the process (node memory bounded by the cgroup limit)
+
+    Returns:
+        int: The number of bytes, or None if unknown.
+    """
+    memory_available = None
+    meminfo = _read_file(_MEMINFO)
+
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith("MemAvailable:"):
+                memory_available = int(line.split()[1]) * 1024
+
+    for limit_path, usage_path in _CGROUP_MEMORY_FILES:
+        limit = _read_file(limit_path)
+        usage = _read_file(usage_path)
+
+        if limit and usage and limit != "max" and int(limit) < _UNLIMITED_MEMORY:
+            cgroup_memory_available = max(int(limit) - int(usage), 0)
+            memory_available = cgroup_memory_available if memory_available is None \
+                else min(memory_available, cgroup_memory_available)
+            break
+
+    return memory_available
+
+
+def get_process_memory(pid):
+    """Returns the resident memory of a process
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        int: The number of bytes, or None if unknown.
+    """
+    statm = _read_file("/proc/{0}/statm".format(pid))
+
+    if not statm:
+        return None
+
+    return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def get_load_average():
+    """Returns the 1-minute load average of the node
+
+    Returns:
+        float: The load average, or None if unknown.
+    """
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def get_degree_of_parallelism(cpu_fraction=DEFAULT_CPU_FRACTION, cpu_count=None):
+    """Returns the number of processes of a CPU envelope
+
+    The number of processes is rounded down, but never to 0 (e.g. 0.5 x 1 CPU is 1 process, while
+        round(0.5) is 0).
+
+    Args:
+        cpu_fraction (float): The fraction of the CPUs available the processes may use.
+        cpu_count (int): The number of CPUs available. Defaults to get_cpu_count().
+
+    Returns:
+        int: The number of processes.
+    """
+    if cpu_fraction <= 0:
+        raise ValueError("CPU fraction must to be greater than 0.")
+
+    if cpu_count is None:
+        cpu_count = get_cpu_count()
+
+    return max(math.floor(cpu_fraction * cpu_count), 1)
+
+
+class ParallelismGovernor:
+    """Grows or shrinks a cracking pool to the number of processes maximizing the throughput
+
+    Args:
+        cpu_fraction (float): The fraction of the CPUs available the processes may use.
+        memory_fraction (float): The fraction of the memory available the processes may use.
+        min_degree_of_parallelism (int): The min number of processes.
+        max_degree_of_parallelism (int): The max number of processes. Defaults to the CPU envelope.
+        sample_interval (float): The number of seconds the throughput is measured for before
+            resizing the pool.
+        min_gain (float): The min throughput gain (e.g. 0.05 = 5%) for more processes to be kept.
+    """
+
+    def __init__(self, cpu_fraction=DEFAULT_CPU_FRACTION, memory_fraction=DEFAULT_MEMORY_FRACTION,
+                 min_degree_of_parallelism=1, max_degree_of_parallelism=None,
+                 sample_interval=DEFAULT_SAMPLE_INTERVAL, min_gain=DEFAULT_MIN_GAIN):
+        if memory_fraction <= 0:
+            raise ValueError("Memory fraction must to be greater than 0.")
+
+        if min_degree_of_parallelism < 1:
+            raise ValueError("Min degree of parallelism must to be greater than 0.")
+
+        if sample_interval <= 0:
+            raise ValueError("Sample interval must to be greater than 0.")
+
+        self.cpu_fraction = cpu_fraction
+        self.memory_fraction = memory_fraction
+        self.cpu_count = get_cpu_count()
+        self.max_degree_of_parallelism = max_degree_of_parallelism or get_degree_of_parallelism(
+            cpu_fraction, self.cpu_count)
+        self.min_degree_of_parallelism = min(min_degree_of_parallelism,
+                                             self.max_degree_of_parallelism)
+        self.sample_interval = sample_interval
+        self.min_gain = min_gain
+
+        # Starts halfway, so the pool reaches any size within a few samples
+        self.degree_of_parallelism = max((self.max_degree_of_parallelism + 1) // 2,
+                                         self.min_degree_of_parallelism)
+
+        # Last throughput measured for each number of processes
+        self.throughputs = {}
+
+        self._is_growing = True
+        self._best = None
+        self._limit = self.max_degree_of_parallelism
+        self._sample_start = None
+        self._sample_verified_count = 0
+
+    def get_limit(self, pids=()):
+        """Returns the max number of processes of the CPU and memory envelopes right now
+
+        Args:
+            pids (iterable): The ids of the processes of the pool (to measure their memory).
+
+        Returns:
+            int: The max number of processes.
+        """
+        pids = list(pids)
+        limit = self.max_degree_of_parallelism
+        load_average = get_load_average()
+
+        # The load of the node includes the processes of the pool (one CPU each while they run)
+        if load_average is not None:
+            other_load = max(load_average - len(pids), 0.0)
+            limit = min(limit, math.floor(self.cpu_fraction * self.cpu_count - other_load))
+
+        memory_available = get_memory_available()
+        process_memories = [m for m in (get_process_memory(pid) for pid in pids) if m]
+
+        if memory_available is not None and process_memories:
+            process_memory = max(process_memories)
+            limit = min(limit, math.floor(
+                self.memory_fraction * (memory_available + sum(process_memories))
+                / process_memory))
+
+        return max(limit, self.min_degree_of_parallelism)
+
+    def update(self, verified_count, pids=(), now=None):
+        """Measures the throughput and returns the number of processes the pool should have
+
+        Args:
+            verified_count (int): The number of passwords verified since the start of the run.
+            pids (iterable): The ids of the processes of the pool.
+            now (float): The current time (time.monotonic). Defaults to now.
+
+        Returns:
+            int: The number of processes.
+        """
+        now = time.monotonic() if now is None else now
+
+        if self._sample_start is None:
+            self._sample_start = now
+            self._sample_verified_count = verified_count
+
+        elapsed = now - self._sample_start
+
+        if elapsed < self.sample_interval:
+            return self.degree_of_parallelism
+
+        throughput = (verified_count - self._sample_verified_count) / elapsed
+        self._sample_start = now
+        self._sample_verified_count = verified_count
+        self.throughputs[self.degree_of_parallelism] = throughput
+
+        previous_limit = self._limit
+        self._limit = limit = self.get_limit(pids)
+        degree_of_parallelism = self.degree_of_parallelism
+
+        if self._is_growing:
+            if self._best is None or throughput > self._best[1] * (1 + self.min_gain):
+                self._best = (degree_of_parallelism, throughput)
+                degree_of_parallelism = min(
+                    degree_of_parallelism + max(degree_of_parallelism // 2, 1), limit)
+                self._is_growing = degree_of_parallelism > self._best[0]
+            else:
+                # More processes did not help (e.g. memory bandwidth or I/O bound), back to the best
+                degree_of_parallelism = self._best[0]
+                self._is_growing = False
+        elif limit > previous_limit and degree_of_parallelism < limit:
+            # The envelope has room again (e.g. another job finished), so growing is measured again
+            self._best = (degree_of_parallelism, throughput)
+            degree_of_parallelism = min(
+                degree_of_parallelism + max(degree_of_parallelism // 2, 1), limit)
+            self._is_growing = True
+
+        self.degree_of_parallelism = max(min(degree_of_parallelism, limit),
+                                         self.min_degree_of_parallelism)
+
+        return self.degree_of_parallelism
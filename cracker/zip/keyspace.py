@@ -0,0 +1,220 @@
+"""
+Index-addressable keyspace of candidate passwords.
+
+A keyspace is a sequence of positions, each with its own charset. Every candidate password is
+    identified by an integer index that is decoded into one symbol per position (mixed-radix
+    decoding, the first position being the most significant), which gives the same order as
+    itertools.product.
+
+Because any index can be decoded without generating the previous candidates, a keyspace can be
+    split into [start, end) ranges that are generated in memory by each process, so brute force
+    does not need dictionary files on disk.
+
+Example:
+    keyspace = Keyspace.brute_force(4)
+
+    for start, end in keyspace.ranges(250000):
+        for password in keyspace.candidates(start, end):
+            ...
+
+"""
+
+import hashlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# ASCII table char range used by the dictionaries: ! (33, inclusive) to ~ (127, exclusive)
+ASCII_PRINTABLE = bytes(range(33, 127))
+
+
+def _to_symbols(charset):
+    """Converts a charset into a tuple of symbols
+
+    Args:
+        charset (object): The charset as bytes (one symbol per byte), string (one symbol per
+            character, encoded with UTF-8) or an iterable of bytes/string symbols.
+
+    Returns:
+        tuple: The symbols (bytes).
+    """
+    if isinstance(charset, (bytes, bytearray)):
+        return tuple(bytes([b]) for b in charset)
+
+    return tuple(s.encode() if isinstance(s, str) else bytes(s) for s in charset)
+
+
+class Keyspace:
+    """Mixed-radix keyspace with one charset per position
+
+    Args:
+        charsets (list): The charset of each position (see _to_symbols for supported types).
+    """
+
+    def __init__(self, charsets):
+        self.charsets = tuple(_to_symbols(charset) for charset in charsets)
+
+        if not self.charsets:
+            raise ValueError("Keyspace must have at least one position.")
+
+        if not all(self.charsets):
+            raise ValueError("Charsets cannot be empty.")
+
+        self.radixes = tuple(len(charset) for charset in self.charsets)
+        self.size = 1
+
+        for radix in self.radixes:
+            self.size = self.size * radix
+
+        # Single-byte symbols can be generated as fixed-width arrays
+        self.is_single_byte = all(len(s) == 1 for charset in self.charsets for s in charset)
+
+        # Identifies the keyspace across runs (e.g. in checkpoints)
+        self.fingerprint = hashlib.sha1(repr(self.charsets).encode()).hexdigest()[:16]
+
+    @classmethod
+    def brute_force(cls, length, charset=ASCII_PRINTABLE):
+        """Creates a keyspace with the same charset on every position
+
+        Args:
+            length (int): The password length.
+            charset (object): The charset of all positions. Defaults to ASCII 33 - 126.
+
+        Returns:
+            Keyspace: The keyspace.
+        """
+        if length < 1:
+            raise ValueError("Length must to be greater than 0.")
+
+        return cls([charset] * length)
+
+    def decode(self, index):
+        """Decodes a keyspace index into the digit (charset index) of each position
+
+        Args:
+            index (int): The keyspace index.
+
+        Returns:
+            list: The digit of each position.
+        """
+        if index < 0 or index >= self.size:
+            raise IndexError("Index '{0}' is out of the keyspace range.".format(index))
+
+        digits = [0] * len(self.radixes)
+
+        for position in range(len(self.radixes) - 1, -1, -1):
+            index, digits[position] = divmod(index, self.radixes[position])
+
+        return digits
+
+    def __getitem__(self, index):
+        return b"".join(charset[digit] for charset, digit in zip(self.charsets, self.decode(index)))
+
+    def candidates(self, start=0, end=None):
+        """Generates the candidates of an index range
+
+        Only the start index is decoded, the following candidates are generated by incrementing
+            the digits (odometer).
+
+        Args:
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive). Defaults to the keyspace size.
+
+        Yields:
+            bytes: The candidate passwords.
+        """
+        end = self.size if end is None else min(end, self.size)
+
+        if start >= end:
+            return
+
+        charsets = self.charsets
+        radixes = self.radixes
+        digits = self.decode(start)
+        symbols = [charset[digit] for charset, digit in zip(charsets, digits)]
+        last_position = len(radixes) - 1
+        last_charset = charsets[last_position]
+        last_radix = radixes[last_position]
+
+        for _ in range(end - start):
+            yield b"".join(symbols)
+
+            # Increment the last position and propagate the carry to the previous ones
+            digit = digits[last_position] + 1
+
+            if digit < last_radix:
+                digits[last_position] = digit
+                symbols[last_position] = last_charset[digit]
+                continue
+
+            position = last_position
+
+            while position >= 0:
+                digit = digits[position] + 1
+
+                if digit < radixes[position]:
+                    digits[position] = digit
+                    symbols[position] = charsets[position][digit]
+                    break
+
+                digits[position] = 0
+                symbols[position] = charsets[position][0]
+                position = position - 1
+
+    def pack(self, start, end):
+        """Generates the candidates of an index range as a fixed-width uint8 array
+
+        The digits are decoded for the whole range at once with NumPy, so no bytes object is
+            created per candidate (see batchverifier).
+
+        Args:
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive).
+
+        Returns:
+            numpy.ndarray: The (end - start, positions) uint8 array of candidates.
+        """
+        if numpy is None:
+            raise RuntimeError("NumPy is required to pack candidates.")
+
+        if not self.is_single_byte:
+            raise ValueError("Only keyspaces with single-byte symbols can be packed.")
+
+        end = min(end, self.size)
+        count = max(end - start, 0)
+        candidates = numpy.empty((count, len(self.radixes)), dtype=numpy.uint8)
+
+        if not count:
+            return candidates
+
+        # Adds the offset of every candidate to the digits of the start index
+        carry = numpy.arange(count, dtype=numpy.int64)
+
+        for position, digit in reversed(list(enumerate(self.decode(start)))):
+            carry, digits = numpy.divmod(carry + digit, self.radixes[position])
+            symbols = numpy.frombuffer(b"".join(self.charsets[position]), dtype=numpy.uint8)
+            candidates[:, position] = symbols[digits]
+
+        return candidates
+
+    def ranges(self, range_size, start=0, end=None):
+        """Splits an index range into [start, end) ranges
+
+        Args:
+            range_size (int): The number of candidates per range.
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive). Defaults to the keyspace size.
+
+        Yields:
+            tuple: The (start, end) ranges.
+        """
+        if range_size < 1:
+            raise ValueError("Range size must to be greater than 0.")
+
+        end = self.size if end is None else min(end, self.size)
+
+        for range_start in range(start, end, range_size):
+            yield range_start, min(range_start + range_size, end)
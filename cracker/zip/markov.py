@@ -0,0 +1,358 @@
+"""
+Probability-ordered keyspace of candidate passwords (per-position Markov model).
+
+Brute force enumerates passwords in lexicographic order, so real passwords (e.g. "sunshine1") are
+    found very late. A Markov model trained from a wordlist gives the probability of every
+    character given its position and the previous character, and the candidates are enumerated
+    from the most probable to the least probable instead.
+
+As in OMEN (Ordered Markov ENumerator), every transition probability is quantized into a level
+    (-log2 of the probability, so 0 is very likely and 10 is unseen in the wordlist), the level of
+    a candidate is the sum of the levels of its transitions, and the candidates are enumerated
+    level by level (then length by length). Within a (level, length) block, the candidates are
+    counted up front (dynamic programming over the positions), so any index can be decoded
+    without generating the previous candidates.
+
+The keyspace is therefore index-addressable like a brute force keyspace (see keyspace.py): it has
+    a size, a fingerprint and [start, end) ranges generated in memory by each process, so it can
+    be split into chunks, checkpointed and resumed the same way.
+
+Example:
+    keyspace = MarkovKeyspace.train("c:\\temp\\rockyou.txt.gz", 1, 8, max_level=30)
+
+    for start, end in keyspace.ranges(250000):
+        for password in keyspace.candidates(start, end):
+            ...
+
+"""
+
+import bisect
+import collections
+import hashlib
+import math
+import operator
+
+from keyspace import ASCII_PRINTABLE
+from wordlist import WordlistReader
+
+
+# Level of the transitions never seen in the wordlist (the least probable)
+MAX_TRANSITION_LEVEL = 10
+
+# Pseudo-count added to every transition, so unseen transitions are still enumerated
+_SMOOTHING = 0.01
+
+# Derived tables (sorted transitions and counts) already built by the current process, keyed by
+#   fingerprint, as they are not sent along with the keyspace to the processes
+_tables = {}
+
+
+def _get_levels(transition_counts, charset_size):
+    """Quantizes the transitions following a character into levels
+
+    Args:
+        transition_counts (list): The number of occurrences of each next character.
+        charset_size (int): The number of characters.
+
+    Returns:
+        bytes: The level of each next character.
+    """
+    total = sum(transition_counts) + _SMOOTHING * charset_size
+
+    return bytes(min(MAX_TRANSITION_LEVEL, int(-math.log2((count + _SMOOTHING) / total)))
+                 for count in transition_counts)
+
+
+class MarkovKeyspace:
+    """Candidate passwords enumerated from the most to the least probable
+
+    Args:
+        charset (bytes): The characters (one per byte).
+        levels (list): The level of every transition, one bytes object per position, where the
+            level of character c following character p is at p * len(charset) + c (p =
+            len(charset) at the first position).
+        min_length (int): The min password length.
+        max_length (int): The max password length.
+        max_level (int): The max level of a candidate (the sum of its transition levels). Defaults
+            to all the candidates.
+    """
+
+    # Candidates are generated as bytes objects, not packed (see Keyspace.pack)
+    is_single_byte = False
+
+    def __init__(self, charset, levels, min_length, max_length, max_level=None):
+        if not 1 <= min_length <= max_length:
+            raise ValueError("Min length must to be greater than 0 and lower than max length.")
+
+        if len(levels) < max_length:
+            raise ValueError("Levels must have one table per position.")
+
+        self.charset = bytes(charset)
+        self.levels = tuple(bytes(table) for table in levels[:max_length])
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_level = MAX_TRANSITION_LEVEL * max_length if max_level is None else max_level
+
+        # Identifies the keyspace across runs (e.g. in checkpoints)
+        self.fingerprint = hashlib.sha1(repr(
+            (self.charset, self.levels, min_length, max_length, self.max_level)).encode()
+        ).hexdigest()[:16]
+
+        self._load_tables()
+
+    @classmethod
+    def train(cls, wordlist_path, min_length, max_length, max_level=None,
+              charset=ASCII_PRINTABLE):
+        """Trains the transition model from the words of a wordlist
+
+        Words with characters out of the charset are ignored. Positions (or previous characters)
+            without enough words fall back to the transitions of all the positions.
+
+        Args:
+            wordlist_path (string): The wordlist file path, optionally gzip/xz compressed (e.g.
+                c:\\temp\\rockyou.txt.gz).
+            min_length (int): The min password length.
+            max_length (int): The max password length.
+            max_level (int): The max level of a candidate. Defaults to all the candidates.
+            charset (bytes): The characters. Defaults to ASCII 33 - 126.
+
+        Returns:
+            MarkovKeyspace: The keyspace.
+        """
+        charset = bytes(charset)
+        start = len(charset)
+        deleted = bytes(b for b in range(256) if b not in charset)
+        indices = bytes.maketrans(charset, bytes(range(len(charset))))
+
+        # (position, previous character, character) occurrences
+        counter = collections.Counter()
+
+        with WordlistReader(wordlist_path) as wordlist_reader:
+            for words in wordlist_reader:
+                for word in words:
+                    word = word[:max_length]
+
+                    if not word or word.translate(None, deleted) != word:
+                        continue
+
+                    word = word.translate(indices)
+                    counter.update(zip(range(len(word)), (start,) + tuple(word[:-1]), word))
+
+        # Transitions of all the positions, used when a position has no occurrence of a character
+        all_positions = [[0] * len(charset) for _ in range(start + 1)]
+
+        for (_, previous, c), count in counter.items():
+            all_positions[previous][c] = all_positions[previous][c] + count
+
+        levels = []
+
+        for position in range(max_length):
+            table = []
+
+            for previous in range(start + 1):
+                transition_counts = [counter[(position, previous, c)] for c in range(len(charset))]
+
+                if not any(transition_counts):
+                    transition_counts = all_positions[previous]
+
+                table.append(_get_levels(transition_counts, len(charset)))
+
+            levels.append(b"".join(table))
+
+        return cls(charset, levels, min_length, max_length, max_level)
+
+    def __getstate__(self):
+        # The derived tables are built again by the process receiving the keyspace
+        return dict((k, v) for k, v in self.__dict__.items() if not k.startswith("_"))
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_tables()
+
+    def _load_tables(self):
+        """Builds the sorted transitions and the number of candidates of every block (once per
+            process)
+
+        """
+        tables = _tables.get(self.fingerprint)
+
+        if tables is None:
+            tables = self._build_tables()
+            _tables[self.fingerprint] = tables
+
+        self._transitions, self._leaves, self._counts, self._blocks, self._block_starts = tables
+        self.size = self._block_starts[-1]
+
+    def _build_tables(self):
+        """Builds the sorted transitions and the number of candidates of every block
+
+        Returns:
+            tuple: The (transitions, leaves, counts, blocks, block starts) tables.
+        """
+        charset_size = len(self.charset)
+        max_level = self.max_level
+        symbols = [bytes([b]) for b in self.charset]
+
+        # (level, character, symbol) following each character, most probable first
+        transitions = []
+
+        # Symbols following each character, by level (last position of a candidate)
+        leaves = []
+
+        for table in self.levels:
+            position_transitions = []
+            position_leaves = []
+
+            for previous in range(charset_size + 1):
+                row = table[previous * charset_size:(previous + 1) * charset_size]
+                row_transitions = sorted((level, c, symbols[c]) for c, level in enumerate(row)
+                                         if level <= max_level)
+                row_leaves = collections.defaultdict(list)
+
+                for level, _, symbol in row_transitions:
+                    row_leaves[level].append(symbol)
+
+                position_transitions.append(row_transitions)
+                position_leaves.append(dict(row_leaves))
+
+            transitions.append(position_transitions)
+            leaves.append(position_leaves)
+
+        # counts[length][position][previous][level]: the number of ways to complete a candidate
+        #   of a length from a position, after a character, with exactly a level left
+        counts = {}
+        add = operator.add
+
+        for length in range(self.min_length, self.max_length + 1):
+            end = [1] + [0] * max_level
+            length_counts = [None] * length + [[end] * (charset_size + 1)]
+
+            for position in range(length - 1, -1, -1):
+                next_counts = length_counts[position + 1]
+                previous_characters = range(charset_size) if position else [charset_size]
+                position_counts = [None] * (charset_size + 1)
+
+                for previous in previous_characters:
+                    total = [0] * (max_level + 1)
+
+                    for level, c, _ in transitions[position][previous]:
+                        total[level:] = map(add, total[level:], next_counts[c])
+
+                    position_counts[previous] = total
+
+                length_counts[position] = position_counts
+
+            counts[length] = length_counts
+
+        # Blocks of candidates with the same (level, length), most probable first
+        blocks = []
+        block_starts = [0]
+
+        for level in range(max_level + 1):
+            for length in range(self.min_length, self.max_length + 1):
+                count = counts[length][0][charset_size][level]
+
+                if count:
+                    blocks.append((level, length))
+                    block_starts.append(block_starts[-1] + count)
+
+        return transitions, leaves, counts, blocks, block_starts
+
+    def _generate_block(self, level, length, skip):
+        """Generates the candidates of a (level, length) block
+
+        Args:
+            level (int): The level of the candidates.
+            length (int): The length of the candidates.
+            skip (int): The number of candidates of the block to skip.
+
+        Yields:
+            list: The candidates, in batches (one per character before the last position).
+        """
+        transitions = self._transitions
+        leaves = self._leaves
+        counts = self._counts[length]
+        last_position = length - 1
+
+        def visit(position, previous, prefix, level_left, skip):
+            if position == last_position:
+                symbols = leaves[position][previous].get(level_left, ())
+                yield [prefix + symbol for symbol in symbols[skip:]]
+                return
+
+            for level, c, symbol in transitions[position][previous]:
+                if level > level_left:
+                    break
+
+                count = counts[position + 1][c][level_left - level]
+
+                if skip >= count:
+                    skip = skip - count
+                    continue
+
+                yield from visit(position + 1, c, prefix + symbol, level_left - level, skip)
+                skip = 0
+
+        yield from visit(0, len(self.charset), b"", level, skip)
+
+    def candidates(self, start=0, end=None):
+        """Generates the candidates of an index range, most probable first
+
+        Only the start index is located (skipping whole subtrees by their number of candidates),
+            the following candidates are generated by a depth-first walk.
+
+        Args:
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive). Defaults to the keyspace size.
+
+        Yields:
+            bytes: The candidate passwords.
+        """
+        end = self.size if end is None else min(end, self.size)
+        remaining = end - start
+
+        if remaining <= 0:
+            return
+
+        block = bisect.bisect_right(self._block_starts, start) - 1
+        skip = start - self._block_starts[block]
+
+        while remaining > 0:
+            level, length = self._blocks[block]
+
+            for batch in self._generate_block(level, length, skip):
+                for candidate in batch[:remaining]:
+                    yield candidate
+
+                remaining = remaining - len(batch)
+
+                if remaining <= 0:
+                    return
+
+            block = block + 1
+            skip = 0
+
+    def __getitem__(self, index):
+        if index < 0 or index >= self.size:
+            raise IndexError("Index '{0}' is out of the keyspace range.".format(index))
+
+        return next(self.candidates(index, index + 1))
+
+    def ranges(self, range_size, start=0, end=None):
+        """Splits an index range into [start, end) ranges
+
+        Args:
+            range_size (int): The number of candidates per range.
+            start (int): The first index (inclusive).
+            end (int): The last index (exclusive). Defaults to the keyspace size.
+
+        Yields:
+            tuple: The (start, end) ranges.
+        """
+        if range_size < 1:
+            raise ValueError("Range size must to be greater than 0.")
+
+        end = self.size if end is None else min(end, self.size)
+
+        for range_start in range(start, end, range_size):
+            yield range_start, min(range_start + range_size, end)
@@ -0,0 +1,154 @@
+"""
+Mask attack: candidate passwords following a structure with one charset per position.
+
+Most passwords follow a structure (e.g. a capital letter, a few lowercase letters and two digits),
+    so searching ?u?l?l?l?l?d?d (~2.3 * 10^9 candidates) instead of every 7-long ASCII password
+    (~6.5 * 10^13) shrinks the search space by several orders of magnitude.
+
+Mask syntax (one position per item):
+    - ?l: lowercase letters (a-z).
+    - ?u: uppercase letters (A-Z).
+    - ?d: digits (0-9).
+    - ?s: symbols (!"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~).
+    - ?a: all of the above (ASCII 33 - 126, same as the dictionaries).
+    - ?1 ... ?9: custom charsets (e.g. {"1": "áãúü?l"}), which can include the built-in classes.
+    - [áãúü]: inline custom charset.
+    - ??, ?[: literal ? and [.
+    - Any other character is a literal (e.g. p?l?l?d?d2024).
+
+Increment mode tries the first min_length to max_length positions of the mask, shortest first.
+
+The mask compiles to one keyspace per length (see keyspace.py), so its exact size is known up front
+    to split the work and estimate the remaining time.
+
+Example:
+    mask = Mask("?u?l?l?l?d?d", min_length=4)
+
+    for keyspace in mask.keyspaces:
+        ...
+
+Attention:
+    - Symbols are encoded with UTF-8 by default. ZIP tools using the legacy encryption often encode
+        passwords with the OEM code page of the system instead (e.g. cp437 or cp850), which also
+        makes every symbol a single byte (faster batch verification).
+
+"""
+
+import string
+
+from keyspace import ASCII_PRINTABLE, Keyspace
+
+
+# Built-in charsets, by mask class
+CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": string.punctuation,
+    "a": ASCII_PRINTABLE.decode("ascii"),
+}
+
+
+def _parse_charset(charset):
+    """Expands the built-in classes of a custom charset
+
+    Args:
+        charset (string): The custom charset (e.g. "áãúü?d").
+
+    Returns:
+        list: The symbols (strings), without duplicates.
+    """
+    symbols = []
+    i = 0
+
+    while i < len(charset):
+        if charset[i] == "?" and i + 1 < len(charset) and charset[i + 1] in CHARSETS:
+            symbols.extend(CHARSETS[charset[i + 1]])
+            i = i + 2
+        else:
+            symbols.append(charset[i])
+            i = i + 1
+
+    return list(dict.fromkeys(symbols))
+
+
+def parse_mask(mask, custom_charsets=None):
+    """Parses a mask into the charset of each position
+
+    Args:
+        mask (string): The mask (e.g. "?u?l?l?l?d?d").
+        custom_charsets (dict): The custom charsets, by mask class (e.g. {"1": "áãúü"}).
+
+    Returns:
+        list: The symbols (strings) of each position.
+    """
+    if not mask:
+        raise ValueError("Mask cannot be none or empty.")
+
+    custom_charsets = custom_charsets or {}
+    positions = []
+    i = 0
+
+    while i < len(mask):
+        c = mask[i]
+
+        if c == "?":
+            if i + 1 >= len(mask):
+                raise ValueError("Mask '{0}' ends with an incomplete class.".format(mask))
+
+            mask_class = mask[i + 1]
+
+            if mask_class in CHARSETS:
+                positions.append(list(CHARSETS[mask_class]))
+            elif mask_class in custom_charsets:
+                positions.append(_parse_charset(custom_charsets[mask_class]))
+            elif mask_class in "?[":
+                positions.append([mask_class])
+            else:
+                raise ValueError("Mask class '?{0}' is not supported.".format(mask_class))
+
+            i = i + 2
+        elif c == "[":
+            end = mask.find("]", i + 1)
+
+            if end < 0:
+                raise ValueError("Mask '{0}' has an unterminated charset.".format(mask))
+
+            positions.append(_parse_charset(mask[i + 1:end]))
+            i = end + 1
+        else:
+            positions.append([c])
+            i = i + 1
+
+    if not all(positions):
+        raise ValueError("Mask '{0}' has an empty charset.".format(mask))
+
+    return positions
+
+
+class Mask:
+    """Mask compiled to one keyspace per password length
+
+    Args:
+        mask (string): The mask (e.g. "?u?l?l?l?d?d").
+        custom_charsets (dict): The custom charsets, by mask class (e.g. {"1": "áãúü"}).
+        min_length (int): The min password length (increment mode). Defaults to the mask length.
+        max_length (int): The max password length (increment mode). Defaults to the mask length.
+        encoding (string): The encoding of the symbols. Defaults to UTF-8.
+    """
+
+    def __init__(self, mask, custom_charsets=None, min_length=None, max_length=None,
+                 encoding="utf-8"):
+        self.mask = mask
+        self.positions = [[symbol.encode(encoding) for symbol in charset]
+                          for charset in parse_mask(mask, custom_charsets)]
+        self.max_length = len(self.positions) if max_length is None else max_length
+        self.min_length = self.max_length if min_length is None else min_length
+
+        if not 1 <= self.min_length <= self.max_length <= len(self.positions):
+            raise ValueError("Min and max length must be between 1 and the mask length ({0})."
+                             .format(len(self.positions)))
+
+        self.keyspaces = [Keyspace(self.positions[:length])
+                          for length in range(self.min_length, self.max_length + 1)]
+        self.size = sum(keyspace.size for keyspace in self.keyspaces)
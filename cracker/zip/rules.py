@@ -0,0 +1,249 @@
+"""
+Rule engine expanding the words of a wordlist into mangled candidate passwords.
+
+People derive passwords from words (e.g. Password -> p@$$w0rd, password2024, drowssap), so each
+    word of a wordlist is expanded by every rule in memory, in the cracking process, instead of
+    writing every mangled variant to dictionary files (which multiplies the disk footprint and the
+    I/O by the number of rules).
+
+Rules use a subset of the hashcat rule syntax, one rule per line (functions are applied left to
+    right, spaces between functions are ignored, lines starting with # are comments):
+    - :     Keeps the word as is.
+    - l     Lowercases the word.
+    - u     Uppercases the word.
+    - c     Capitalizes the word (first letter uppercase, the others lowercase).
+    - C     Inverts the capitalization (first letter lowercase, the others uppercase).
+    - t     Toggles the case of every letter.
+    - r     Reverses the word.
+    - d     Duplicates the word.
+    - f     Appends the reversed word (reflection).
+    - [     Deletes the first character.
+    - ]     Deletes the last character.
+    - $X    Appends the character X (e.g. $2$0$2$4 appends 2024).
+    - ^X    Prepends the character X (e.g. ^1 prepends 1, ^2^1 prepends 12).
+    - sXY   Replaces every X with Y (e.g. sa@ ss$ so0 is leetspeak: password -> p@$$w0rd).
+    - @X    Deletes every X.
+
+Expansion is a streaming stage: the candidates of a batch of words are generated rule by rule and
+    returned in batches, so the memory stays flat whatever the number of rules.
+
+Example:
+    rule_set = RuleSet.load("c:\\temp\\common.rule")
+
+    for passwords in rule_set.expand_batches(wordlist_reader, 4096):
+        ...
+
+"""
+
+import hashlib
+
+
+# Number of candidates per batch returned by the expansion
+DEFAULT_BATCH_SIZE = 4096
+
+
+def _keep(word):
+    return word
+
+
+def _lower(word):
+    return word.lower()
+
+
+def _upper(word):
+    return word.upper()
+
+
+def _capitalize(word):
+    return word.capitalize()
+
+
+def _invert_capitalize(word):
+    return word[:1].lower() + word[1:].upper()
+
+
+def _toggle_case(word):
+    return word.swapcase()
+
+
+def _reverse(word):
+    return word[::-1]
+
+
+def _duplicate(word):
+    return word + word
+
+
+def _reflect(word):
+    return word + word[::-1]
+
+
+def _delete_first(word):
+    return word[1:]
+
+
+def _delete_last(word):
+    return word[:-1]
+
+
+def _append(word, c):
+    return word + c
+
+
+def _prepend(word, c):
+    return c + word
+
+
+def _replace(word, old, new):
+    return word.replace(old, new)
+
+
+def _purge(word, c):
+    return word.replace(c, b"")
+
+
+# Rule functions, by code: (function, number of arguments)
+_FUNCTIONS = {
+    ":": (_keep, 0),
+    "l": (_lower, 0),
+    "u": (_upper, 0),
+    "c": (_capitalize, 0),
+    "C": (_invert_capitalize, 0),
+    "t": (_toggle_case, 0),
+    "r": (_reverse, 0),
+    "d": (_duplicate, 0),
+    "f": (_reflect, 0),
+    "[": (_delete_first, 0),
+    "]": (_delete_last, 0),
+    "$": (_append, 1),
+    "^": (_prepend, 1),
+    "s": (_replace, 2),
+    "@": (_purge, 1),
+}
+
+
+def parse_rule(rule):
+    """Parses a rule into the functions to apply
+
+    Args:
+        rule (string): The rule (e.g. "c $2$0$2$4").
+
+    Returns:
+        tuple: The (function, arguments) pairs, where the arguments are bytes (UTF-8).
+    """
+    functions = []
+    i = 0
+
+    while i < len(rule):
+        code = rule[i]
+
+        if code == " ":
+            i = i + 1
+            continue
+
+        if code not in _FUNCTIONS:
+            raise ValueError("Rule function '{0}' of rule '{1}' is not supported."
+                             .format(code, rule))
+
+        function, argument_count = _FUNCTIONS[code]
+        arguments = rule[i + 1:i + 1 + argument_count]
+
+        if len(arguments) < argument_count:
+            raise ValueError("Rule function '{0}' of rule '{1}' is missing arguments."
+                             .format(code, rule))
+
+        functions.append((function, tuple(argument.encode() for argument in arguments)))
+        i = i + 1 + argument_count
+
+    return tuple(functions)
+
+
+def apply_rule(functions, word):
+    """Applies a parsed rule to a word
+
+    Args:
+        functions (tuple): The parsed rule (see parse_rule).
+        word (bytes): The word.
+
+    Returns:
+        bytes: The candidate password.
+    """
+    for function, arguments in functions:
+        word = function(word, *arguments)
+
+    return word
+
+
+class RuleSet:
+    """Rules expanding words into candidate passwords
+
+    Args:
+        rules (list): The rules (strings). Empty lines and comments (#) are ignored.
+    """
+
+    def __init__(self, rules):
+        self.rules = [rule.rstrip("\r\n") for rule in rules
+                      if rule.strip() and not rule.startswith("#")]
+
+        if not self.rules:
+            raise ValueError("Rule set must have at least one rule.")
+
+        self.functions = [parse_rule(rule) for rule in self.rules]
+
+        # Identifies the rule set across runs (e.g. in checkpoints)
+        self.fingerprint = hashlib.sha1("\n".join(self.rules).encode()).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, rules_path):
+        """Loads the rules of a rules file (one rule per line, UTF-8)
+
+        Args:
+            rules_path (string): The rules file path (e.g. c:\\temp\\common.rule).
+
+        Returns:
+            RuleSet: The rule set.
+        """
+        with open(rules_path, "r", encoding="utf-8") as rules_file:
+            return cls(rules_file.readlines())
+
+    def __len__(self):
+        return len(self.rules)
+
+    def expand(self, words):
+        """Expands words with every rule
+
+        Args:
+            words (list): The words (bytes).
+
+        Yields:
+            bytes: The candidate passwords, rule by rule (empty candidates are skipped).
+        """
+        for functions in self.functions:
+            for word in words:
+                candidate = apply_rule(functions, word)
+
+                if candidate:
+                    yield candidate
+
+    def expand_batches(self, batches, batch_size=DEFAULT_BATCH_SIZE):
+        """Expands batches of words with every rule
+
+        Args:
+            batches (iterable): The batches of words (lists of bytes).
+            batch_size (int): The max number of candidates per batch returned.
+
+        Yields:
+            list: The batches of candidate passwords.
+        """
+        batch = []
+
+        for words in batches:
+            for candidate in self.expand(words):
+                batch.append(candidate)
+
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
@@ -0,0 +1,393 @@
+"""
+Pool of cracking processes fed with work chunks over a queue.
+
+The processes are started once and stay alive for the whole run:
+    - Each process loads the archive context once, then takes chunks (see chunks) from a bounded
+        queue until it receives None.
+    - A shared event is set as soon as a process finds the password. Every process checks it
+        between batches, so all the processes stop within milliseconds of a hit.
+    - Results are reported to the main process over one pipe per process, which the main process
+        waits on (no polling, no sleep), along with the number of passwords verified by each chunk.
+    - The number of passwords verified between two checks of the stop event depends on the
+        encryption (see ArchiveContext.batch_size), so WinZip AES chunks stop as fast as ZipCrypto.
+    - Several ZIP files can be cracked at once (see ArchiveSet): each archive solved is reported
+        as soon as the chunk that solved it is done, and the processes only stop once all the
+        archives are solved.
+    - Every chunk processed is measured (passwords verified, time split between producing and
+        verifying them, false positives) and reported to the optional telemetry (see telemetry).
+    - The pool can be resized while it runs, optionally by a governor measuring the throughput (see
+        governor.py): new processes start right away, and the processes leaving finish their
+        current chunk first.
+
+Example:
+    with CrackingPool(zip_file_path, 4) as cracking_pool:
+        password = cracking_pool.run(KeyspaceChunk(keyspace, start, end)
+                                     for start, end in keyspace.ranges(250000))
+
+"""
+
+import itertools
+import multiprocessing
+import queue
+import time
+
+from multiprocessing.connection import wait
+
+from archive import ArchiveSet, get_archive_context
+from telemetry import ChunkTimer, TimedArchiveContext
+
+
+# Messages sent by the processes: (message type, chunk key, value)
+MESSAGE_DONE = "done"
+MESSAGE_FOUND = "found"
+MESSAGE_SKIPPED = "skipped"
+MESSAGE_ERROR = "error"
+MESSAGE_SOLVED = "solved"
+MESSAGE_STATS = "stats"
+
+
+def _should_retire(retire_count):
+    """Takes one of the retirements requested by the pool (see CrackingPool.resize), if any
+
+    Returns:
+        bool: True if the process must exit. Otherwise, False.
+    """
+    with retire_count.get_lock():
+        if retire_count.value > 0:
+            retire_count.value = retire_count.value - 1
+            return True
+
+    return False
+
+
+def _process_chunks(zip_file_path, chunk_queue, stop_event, connection, solved_flags=None,
+                    process_index=0, retire_count=None):
+    """Processes chunks from the queue until a None chunk is received
+
+    Args:
+        zip_file_path (object): ZIP file path (e.g. c:\\temp\\file.zip), or list of ZIP file paths.
+        chunk_queue (multiprocessing.Queue): The queue of chunks to process.
+        stop_event (multiprocessing.Event): The event set once the processing must stop.
+        connection (multiprocessing.connection.Connection): The pipe end to report results to.
+        solved_flags (multiprocessing.RawArray): The flags of the archives solved, shared by the
+            processes (list of ZIP file paths only).
+        process_index (int): The index of the process in the pool (see MESSAGE_STATS).
+        retire_count (multiprocessing.Value): The number of processes that must exit between two
+            chunks to shrink the pool, shared by the processes.
+    """
+    should_stop = stop_event.is_set
+    archive_set = None
+
+    try:
+        # Parses the ZIP file(s) once for all chunks
+        if isinstance(zip_file_path, str):
+            archive_context = get_archive_context(zip_file_path)
+        else:
+            archive_context = archive_set = ArchiveSet(
+                [get_archive_context(path) for path in zip_file_path], solved_flags)
+
+        archive_context = TimedArchiveContext(archive_context)
+        chunk_timer = ChunkTimer(archive_context)
+
+        while True:
+            if retire_count is not None and _should_retire(retire_count):
+                break
+
+            chunk = chunk_queue.get()
+
+            if chunk is None:
+                break
+
+            # Skips the remaining chunks once the password was found
+            if should_stop():
+                connection.send((MESSAGE_SKIPPED, chunk.key, None))
+                continue
+
+            verified_count = archive_context.verified_count
+            chunk_timer.start()
+
+            try:
+                password = chunk.find(archive_context, should_stop, archive_context.batch_size)
+            except Exception as ex:
+                connection.send((MESSAGE_ERROR, chunk.key, repr(ex)))
+                continue
+            finally:
+                if archive_set is not None:
+                    for solved in archive_set.pop_found():
+                        connection.send((MESSAGE_SOLVED, chunk.key, solved))
+
+            connection.send((MESSAGE_STATS, chunk.key, (process_index, chunk_timer.stop(chunk))))
+
+            if password is not None:
+                stop_event.set()
+                connection.send((MESSAGE_FOUND, chunk.key, password))
+            elif should_stop():
+                connection.send((MESSAGE_SKIPPED, chunk.key, None))
+            else:
+                connection.send((MESSAGE_DONE, chunk.key,
+                                 (chunk.size, archive_context.verified_count - verified_count)))
+    finally:
+        connection.close()
+
+
+class CrackingPool:
+    """Persistent pool of cracking processes
+
+    Args:
+        zip_file_path (object): ZIP file path (e.g. c:\\temp\\file.zip), or list of ZIP file paths
+            cracked at once (see ArchiveSet).
+        max_degree_of_parallelism (int): The number of processes.
+        queue_size (int): The max number of chunks queued. Defaults to 2 chunks per process (per
+            process of the largest pool allowed by the governor, if any).
+        telemetry (Telemetry): Optional telemetry the stats of the chunks are recorded to.
+        governor (ParallelismGovernor): Optional governor resizing the pool while it runs.
+    """
+
+    def __init__(self, zip_file_path, max_degree_of_parallelism, queue_size=None,
+                 telemetry=None, governor=None):
+        if max_degree_of_parallelism < 1:
+            raise ValueError("Max degree of parallelism must to be greater than 0.")
+
+        self.zip_file_path = zip_file_path
+        self.max_degree_of_parallelism = int(max_degree_of_parallelism)
+        self.telemetry = telemetry
+        self.governor = governor
+        self._chunk_queue = multiprocessing.Queue(maxsize=queue_size or 2 * max(
+            self.max_degree_of_parallelism, governor.max_degree_of_parallelism if governor else 0))
+        self._stop_event = multiprocessing.Event()
+        self._retire_count = multiprocessing.Value("i", 0)
+        self._process_indices = itertools.count()
+        self._solved_flags = None
+        self._processes = []
+
+        if not isinstance(zip_file_path, str):
+            self._solved_flags = multiprocessing.RawArray("b", len(zip_file_path))
+        self._connections = []
+
+        # Number of passwords verified by the chunks done (e.g. to report the throughput)
+        self.verified_count = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _start_process(self):
+        """Starts one more process
+
+        """
+        reader, writer = multiprocessing.Pipe(duplex=False)
+
+        current_process = multiprocessing.Process(
+            target=_process_chunks,
+            args=(self.zip_file_path, self._chunk_queue, self._stop_event, writer,
+                  self._solved_flags, next(self._process_indices), self._retire_count,))
+        current_process.start()
+
+        # The writer end only belongs to the child process
+        writer.close()
+
+        self._processes.append(current_process)
+        self._connections.append(reader)
+
+    def start(self):
+        """Starts the processes
+
+        """
+        for _ in range(self.max_degree_of_parallelism):
+            self._start_process()
+
+    def resize(self, max_degree_of_parallelism):
+        """Grows or shrinks the pool (the processes leaving finish their current chunk first)
+
+        Args:
+            max_degree_of_parallelism (int): The number of processes.
+        """
+        if max_degree_of_parallelism < 1:
+            raise ValueError("Max degree of parallelism must to be greater than 0.")
+
+        with self._retire_count.get_lock():
+            retire_count = self._retire_count.value
+            process_count = sum(1 for p in self._processes if p.is_alive()) - retire_count
+
+            # Cancels the retirements not taken yet before starting new processes
+            if max_degree_of_parallelism > process_count:
+                cancelled_count = min(retire_count, max_degree_of_parallelism - process_count)
+                self._retire_count.value = retire_count - cancelled_count
+                new_process_count = max_degree_of_parallelism - process_count - cancelled_count
+            else:
+                self._retire_count.value = retire_count + process_count - max_degree_of_parallelism
+                new_process_count = 0
+
+        for _ in range(new_process_count):
+            self._start_process()
+
+        self.max_degree_of_parallelism = int(max_degree_of_parallelism)
+
+    def stop(self):
+        """Asks the processes to stop processing their current chunks
+
+        """
+        self._stop_event.set()
+
+    def close(self):
+        """Stops the processes once the queued chunks are processed
+
+        """
+        self._stop_event.set()
+
+        # Counts the processes alive before sending any None, as a process exits as soon as it
+        #   receives one (checking each process while sending would skip the processes that are
+        #   still running)
+        alive_processes = [p for p in self._processes if p.is_alive()]
+
+        for _ in alive_processes:
+            self._chunk_queue.put(None)
+
+        for current_process in self._processes:
+            current_process.join()
+
+        for connection in self._connections:
+            connection.close()
+
+        self._processes = []
+        self._connections = []
+
+    @staticmethod
+    def _receive(connection):
+        """Receives the messages available on a connection
+
+        Yields:
+            tuple: The (message type, chunk key, value) messages.
+        """
+        try:
+            while connection.poll():
+                yield connection.recv()
+        except EOFError:
+            # The process exited, which is reported through its sentinel
+            return
+
+    def run(self, chunks, chunk_done_callback=None, archive_solved_callback=None):
+        """Processes chunks until all of them are done or the password is found
+
+        Args:
+            chunks (iterable): The chunks to process (generated lazily as the queue has room).
+            chunk_done_callback (callable): Optional function called with the (key, size) of every
+                chunk completely processed.
+            archive_solved_callback (callable): Optional function called with the
+                (zip_file_path, password) of every archive solved, once per archive (list of ZIP
+                file paths only).
+
+        Returns:
+            bytes: The password that decrypts the archive (the last archive solved for a list of
+                ZIP file paths), or None.
+        """
+        if not self._processes:
+            raise RuntimeError("Cracking pool was not started.")
+
+        chunks = iter(chunks)
+        pending_chunk = None
+        is_exhausted = False
+        outstanding_chunks = 0
+        password = None
+        solved_zip_file_paths = set()
+
+        def handle_messages(connection):
+            nonlocal outstanding_chunks, password
+
+            for message_type, key, value in self._receive(connection):
+                if message_type == MESSAGE_SOLVED:
+                    # Two processes can solve the same archive in different chunks before the
+                    # shared flags tell them, so an archive is only reported once
+                    if value[0] not in solved_zip_file_paths:
+                        solved_zip_file_paths.add(value[0])
+
+                        if archive_solved_callback:
+                            archive_solved_callback(*value)
+                    continue
+
+                if message_type == MESSAGE_STATS:
+                    if self.telemetry is not None:
+                        self.telemetry.record_chunk(*value)
+                    continue
+
+                outstanding_chunks = outstanding_chunks - 1
+
+                if message_type == MESSAGE_FOUND:
+                    password = password or value
+                elif message_type == MESSAGE_DONE:
+                    size, verified_count = value
+                    self.verified_count = self.verified_count + verified_count
+
+                    if chunk_done_callback:
+                        chunk_done_callback(key, size)
+                elif message_type == MESSAGE_ERROR:
+                    raise RuntimeError("Chunk '{0}' failed: {1}".format(key, value))
+
+        try:
+            while True:
+                # Feeds the queue while it has room
+                while not is_exhausted and not self._stop_event.is_set():
+                    if pending_chunk is None:
+                        feed_start = time.perf_counter()
+                        pending_chunk = next(chunks, None)
+
+                        if self.telemetry is not None:
+                            self.telemetry.record_feed(time.perf_counter() - feed_start)
+
+                        if pending_chunk is None:
+                            is_exhausted = True
+                            break
+
+                    try:
+                        self._chunk_queue.put(pending_chunk, block=False)
+                    except queue.Full:
+                        break
+
+                    pending_chunk = None
+                    outstanding_chunks = outstanding_chunks + 1
+
+                if outstanding_chunks == 0 and (is_exhausted or self._stop_event.is_set()):
+                    break
+
+                # Waits for results (or processes exiting)
+                ready_list = wait(self._connections + [p.sentinel for p in self._processes])
+
+                for connection in self._connections:
+                    if connection in ready_list:
+                        handle_messages(connection)
+
+                for current_process, connection in list(zip(self._processes, self._connections)):
+                    if current_process.sentinel not in ready_list:
+                        continue
+
+                    current_process.join()
+
+                    # Only the processes leaving a shrinking pool exit cleanly while it runs
+                    if current_process.exitcode != 0:
+                        raise RuntimeError("Cracking process exited unexpectedly (exit code {0})."
+                                           .format(current_process.exitcode))
+
+                    handle_messages(connection)
+                    connection.close()
+
+                    self._processes.remove(current_process)
+                    self._connections.remove(connection)
+
+                if self.governor is not None:
+                    max_degree_of_parallelism = self.governor.update(
+                        self.verified_count, [p.pid for p in self._processes])
+
+                    if max_degree_of_parallelism != self.max_degree_of_parallelism:
+                        self.resize(max_degree_of_parallelism)
+        except BaseException:
+            # Stops the processes quickly, the pool cannot be reused
+            self._stop_event.set()
+            raise
+
+        # Makes the pool ready for the next run
+        self._stop_event.clear()
+
+        return password
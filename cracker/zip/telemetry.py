@@ -0,0 +1,328 @@
+"""
+Throughput telemetry of cracking runs.
+
+The cracking processes measure every chunk they process (see scheduler.py) and report it to the
+    main process, which aggregates the stats per process and for the whole run:
+    - Passwords verified per second, per process and in aggregate.
+    - Keyspace processed (fraction of the exact keyspace size) and ETA.
+    - Time split between password generation (in memory), verification and I/O (reading
+        dictionaries, candidate stores and wordlists), plus the time the main process spent
+        feeding the queue (e.g. reading a wordlist or expanding a dictionary directory).
+    - False positives: passwords passing the check bytes (ZipCrypto) or the password verification
+        value (WinZip AES) that needed the full confirmation to be rejected.
+
+A snapshot of the stats is appended to a JSON-lines file at a configurable interval (by a
+    background thread, so snapshots keep coming while large chunks or WinZip AES chunks are
+    processed), and can also be served as JSON by a local HTTP endpoint (e.g. curl
+    http://127.0.0.1:8000/metrics). The counts are updated as the chunks complete, while the
+    elapsed time, rates and ETA are computed when the snapshot is taken.
+
+Stats file (one JSON object per line):
+    {"timestamp": "2024-01-01T10:00:00", "elapsed": 60.0, "verified_count": 120000000,
+     "passwords_per_second": 2000000.0,
+     "processes": {"0": {"verified_count": 60000000, "passwords_per_second": 1010000.0, ...}},
+     "time": {"generation": 30.1, "verification": 80.2, "io": 0.0, "feed": 0.3},
+     "false_positive_count": 1812,
+     "keyspace": {"size": 6634204312890625, "processed": 120000000, "fraction": 1.8e-08,
+                  "eta": 3317102.1}}
+
+Example:
+    with Telemetry("c:\\temp\\cracked\\stats.jsonl", http_port=8000) as telemetry:
+        with CrackingPool(zip_file_path, 4, telemetry=telemetry) as cracking_pool:
+            password = cracking_pool.run(chunks)
+
+"""
+
+import http.server
+import json
+import threading
+import time
+
+from datetime import datetime
+
+
+# Default number of seconds between two snapshots written to the stats file
+DEFAULT_STATS_INTERVAL = 10
+
+# Kinds of time measured by the cracking processes (see ChunkTimer) and by the main process
+TIME_GENERATION = "generation"
+TIME_VERIFICATION = "verification"
+TIME_IO = "io"
+TIME_FEED = "feed"
+
+
+class TimedArchiveContext:
+    """Archive context (or set) measuring the time spent verifying passwords
+
+    The chunks only call verify_batch and verify_packed, everything else is forwarded to the
+        archive context as is.
+
+    Args:
+        archive_context (object): The archive context (or ArchiveSet) to measure.
+    """
+
+    def __init__(self, archive_context):
+        self.archive_context = archive_context
+
+        # Number of seconds spent in verify_batch and verify_packed
+        self.verification_time = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.archive_context, name)
+
+    def verify_batch(self, passwords):
+        start = time.perf_counter()
+
+        try:
+            return self.archive_context.verify_batch(passwords)
+        finally:
+            self.verification_time = self.verification_time + time.perf_counter() - start
+
+    def verify_packed(self, *args, **kwargs):
+        start = time.perf_counter()
+
+        try:
+            return self.archive_context.verify_packed(*args, **kwargs)
+        finally:
+            self.verification_time = self.verification_time + time.perf_counter() - start
+
+
+class ChunkTimer:
+    """Measures the chunks processed by a cracking process
+
+    Args:
+        timed_archive_context (TimedArchiveContext): The archive context verifying the chunks.
+    """
+
+    def __init__(self, timed_archive_context):
+        self.timed_archive_context = timed_archive_context
+        self._start = None
+        self._verification_time = None
+        self._verified_count = None
+        self._false_positive_count = None
+
+    def start(self):
+        """Starts measuring a chunk
+
+        """
+        archive_context = self.timed_archive_context
+        self._start = time.perf_counter()
+        self._verification_time = archive_context.verification_time
+        self._verified_count = archive_context.verified_count
+        self._false_positive_count = archive_context.false_positive_count
+
+    def stop(self, chunk):
+        """Stops measuring a chunk
+
+        The time not spent verifying passwords is spent producing them, either generating them in
+            memory or reading them (see the work type of the chunk).
+
+        Args:
+            chunk (object): The chunk processed (see chunks).
+
+        Returns:
+            dict: The chunk stats (verified_count, false_positive_count and time per kind).
+        """
+        archive_context = self.timed_archive_context
+        elapsed = time.perf_counter() - self._start
+        verification_time = archive_context.verification_time - self._verification_time
+
+        return {"verified_count": archive_context.verified_count - self._verified_count,
+                "false_positive_count":
+                    archive_context.false_positive_count - self._false_positive_count,
+                "elapsed": elapsed,
+                TIME_VERIFICATION: verification_time,
+                chunk.work_type: max(elapsed - verification_time, 0.0)}
+
+
+class Telemetry:
+    """Stats of a cracking run, written to a JSON-lines file and/or served over HTTP
+
+    Args:
+        stats_path (string): Optional JSON-lines file the snapshots are appended to (e.g.
+            c:\\temp\\cracked\\stats.jsonl).
+        interval (float): The number of seconds between two snapshots written to the file.
+        http_port (int): Optional local port serving the last stats as JSON (0 picks a free port,
+            see address).
+        keyspace_size (int): The number of keyspace passwords of the run (e.g. the remaining ranges
+            of the keyspaces and masks), used to estimate the ETA.
+    """
+
+    def __init__(self, stats_path=None, interval=DEFAULT_STATS_INTERVAL, http_port=None,
+                 keyspace_size=0):
+        if interval <= 0:
+            raise ValueError("Interval must to be greater than 0.")
+
+        self.stats_path = stats_path
+        self.interval = interval
+        self.http_port = http_port
+        self.keyspace_size = keyspace_size
+        self.keyspace_processed = 0
+        self.verified_count = 0
+        self.false_positive_count = 0
+        self.times = dict.fromkeys((TIME_GENERATION, TIME_VERIFICATION, TIME_IO, TIME_FEED), 0.0)
+        self.processes = {}
+        self.address = None
+
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._writer_thread = None
+        self._server = None
+        self._server_thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """Starts the thread writing the snapshots and the HTTP endpoint (if any)
+
+        """
+        self._start = time.monotonic()
+
+        if self.stats_path:
+            self._stop_event.clear()
+            self._writer_thread = threading.Thread(target=self._write_periodically, daemon=True)
+            self._writer_thread.start()
+
+        if self.http_port is None:
+            return
+
+        telemetry = self
+
+        class StatsRequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                body = json.dumps(telemetry.snapshot()).encode()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                # Every request would otherwise be printed along with the cracking progress
+                pass
+
+        # Local only, the stats are not meant to be exposed to the network
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", self.http_port),
+                                                       StatsRequestHandler)
+        self._server.daemon_threads = True
+        self.address = "{0}:{1}".format(*self._server.server_address)
+        self._server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._server_thread.start()
+
+    def close(self):
+        """Writes the last snapshot and stops the writer thread and the HTTP endpoint
+
+        """
+        if self._writer_thread is not None:
+            self._stop_event.set()
+            self._writer_thread.join()
+            self._writer_thread = None
+
+        if self.stats_path:
+            self.write()
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join()
+            self._server = None
+
+    def record_chunk(self, process, stats):
+        """Records the stats of a chunk processed by a cracking process (see ChunkTimer)
+
+        Args:
+            process (int): The index of the process.
+            stats (dict): The chunk stats.
+        """
+        with self._lock:
+            process_stats = self.processes.setdefault(
+                process, {"verified_count": 0, "chunk_count": 0, "busy_time": 0.0})
+            process_stats["verified_count"] = process_stats["verified_count"] + \
+                stats["verified_count"]
+            process_stats["chunk_count"] = process_stats["chunk_count"] + 1
+            process_stats["busy_time"] = process_stats["busy_time"] + stats["elapsed"]
+
+            self.verified_count = self.verified_count + stats["verified_count"]
+            self.false_positive_count = self.false_positive_count + stats["false_positive_count"]
+
+            for kind in (TIME_GENERATION, TIME_VERIFICATION, TIME_IO):
+                self.times[kind] = self.times[kind] + stats.get(kind, 0.0)
+
+    def record_feed(self, seconds):
+        """Records the time the main process spent producing chunks (see CrackingPool.run)
+
+        """
+        with self._lock:
+            self.times[TIME_FEED] = self.times[TIME_FEED] + seconds
+
+    def record_keyspace_progress(self, size):
+        """Records a keyspace range done
+
+        Args:
+            size (int): The number of keyspace passwords of the range.
+        """
+        with self._lock:
+            self.keyspace_processed = self.keyspace_processed + size
+
+    def snapshot(self):
+        """Returns the current stats
+
+        Returns:
+            dict: The stats (see the stats file format).
+        """
+        with self._lock:
+            elapsed = max(time.monotonic() - self._start, 1e-6)
+            processes = dict(
+                (str(process), {
+                    "verified_count": s["verified_count"],
+                    "chunk_count": s["chunk_count"],
+                    "busy_time": round(s["busy_time"], 3),
+                    "passwords_per_second": round(
+                        s["verified_count"] / max(s["busy_time"], 1e-6), 1)})
+                for process, s in sorted(self.processes.items()))
+
+            keyspace = None
+
+            if self.keyspace_size:
+                # The keyspace rate includes the time spent on other sources, so it is pessimistic
+                #   while they are processed
+                remaining = self.keyspace_size - self.keyspace_processed
+                keyspace_rate = self.keyspace_processed / elapsed
+                keyspace = {"size": self.keyspace_size,
+                            "processed": self.keyspace_processed,
+                            "fraction": self.keyspace_processed / self.keyspace_size,
+                            "eta": round(remaining / keyspace_rate, 3) if keyspace_rate else None}
+
+            return {"timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "elapsed": round(elapsed, 3),
+                    "verified_count": self.verified_count,
+                    "passwords_per_second": round(self.verified_count / elapsed, 1),
+                    "processes": processes,
+                    "time": dict((kind, round(seconds, 3)) for kind, seconds in self.times.items()),
+                    "false_positive_count": self.false_positive_count,
+                    "keyspace": keyspace}
+
+    def write(self):
+        """Appends a snapshot to the stats file
+
+        """
+        with open(self.stats_path, "a") as stats_file:
+            stats_file.write(json.dumps(self.snapshot()) + "\n")
+
+    def _write_periodically(self):
+        """Appends a snapshot to the stats file every interval until the telemetry is closed
+
+        """
+        while not self._stop_event.wait(self.interval):
+            self.write()
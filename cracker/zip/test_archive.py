@@ -0,0 +1,279 @@
+"""Tests for the archive context.
+
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+import zipfile
+
+import pytest
+
+from archive import (AesArchiveContext, ArchiveContext, ArchiveSet, get_archive_context,
+                     read_manifest)
+from candidatestore import write_candidate_store
+from chunks import CandidateStoreChunk
+from fixtures import write_aes_zip, write_mixed_zip, write_zipcrypto_zip
+
+
+class TestArchiveContext(unittest.TestCase):
+    """Archive context tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "raw.zip")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_picks_smallest_member(self):
+        """Test the smallest non-empty member is loaded to confirm passwords.
+
+        """
+
+        members = [("large.txt", os.urandom(4096)), ("empty.txt", b""), ("small.txt", b"abc")]
+        write_zipcrypto_zip(self.zip_file_path, members, b"a1!", zipfile.ZIP_STORED)
+
+        archive_context = ArchiveContext.load(self.zip_file_path)
+
+        assert len(archive_context.zip_infos) == 3
+        assert archive_context.confirmation_entry.name == "small.txt"
+        assert archive_context.confirmation_entry.data is not None
+        assert [entry.name for entry in archive_context.entries] == ["large.txt", "empty.txt"]
+        assert all(entry.data is None for entry in archive_context.entries)
+
+    def test_verify(self):
+        """Test verifying passwords against all encrypted members.
+
+        """
+
+        members = [("a.txt", b"Hello World!" * 10), ("b.txt", b"Hello Python!" * 10)]
+        write_zipcrypto_zip(self.zip_file_path, members, b"a1!")
+
+        archive_context = ArchiveContext.load(self.zip_file_path)
+
+        assert archive_context.verify(b"a1!")
+        assert not any(archive_context.verify(str(i).encode()) for i in range(5000))
+
+    def test_false_positives(self):
+        """Test counting the passwords passing the check byte rejected by the confirmation.
+
+        """
+
+        write_zipcrypto_zip(self.zip_file_path, [("a.txt", b"Hello World!" * 10)], b"a1!")
+
+        archive_context = ArchiveContext.load(self.zip_file_path)
+
+        # ~1/256 of the wrong passwords pass the check byte of the only member
+        assert not archive_context.verify_batch([str(i).encode() for i in range(5000)])
+        assert archive_context.false_positive_count > 0
+        assert archive_context.verify(b"a1!")
+
+    def test_verify_batch(self):
+        """Test verifying a block of passwords.
+
+        """
+
+        members = [("a.txt", b"Hello World!" * 10), ("b.txt", b"Hello Python!" * 10)]
+        write_zipcrypto_zip(self.zip_file_path, members, b"a1!")
+
+        archive_context = ArchiveContext.load(self.zip_file_path)
+        passwords = [str(i).encode() for i in range(5000)]
+        passwords.insert(1234, b"a1!")
+
+        assert archive_context.verify_batch(passwords) == [b"a1!"]
+        assert archive_context.verify_batch(passwords[1230:1240]) == [b"a1!"]
+
+    def test_mixed_encryption(self):
+        """Test verifying and extracting an archive mixing ZipCrypto and WinZip AES members.
+
+        """
+
+        write_mixed_zip(self.zip_file_path, [("raw.txt", b"Hello World!")],
+                        [("aes.txt", b"Hello AES!")], b"a1!")
+
+        archive_context = get_archive_context(self.zip_file_path)
+
+        assert not archive_context.is_aes
+        assert archive_context.aes_entry.name == "aes.txt"
+        assert archive_context.verify(b"a1!")
+        assert not archive_context.verify(b"a1?")
+
+        output_directory = os.path.join(self.directory.name, "out")
+        archive_context.extract_all(output_directory, b"a1!")
+
+        for name, data in (("raw.txt", b"Hello World!"), ("aes.txt", b"Hello AES!")):
+            with open(os.path.join(output_directory, name), "rb") as member_file:
+                assert member_file.read() == data
+
+    def test_mixed_encryption_other_password(self):
+        """Test rejecting a password that decrypts the ZipCrypto members only.
+
+        """
+
+        # Archives whose ZipCrypto and WinZip AES members do not share the password
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", b"Hello World!")], b"a1!")
+        archive_context = ArchiveContext.load(self.zip_file_path)
+        aes_zip_file_path = os.path.join(self.directory.name, "aes.zip")
+        write_aes_zip(aes_zip_file_path, [("aes.txt", b"Hello AES!")], b"other")
+        archive_context.aes_entry = AesArchiveContext.load(aes_zip_file_path).confirmation_entry
+
+        assert not archive_context.verify(b"a1!")
+        assert archive_context.verify_batch([str(i).encode() for i in range(100)] + [b"a1!"]) == []
+
+    def test_get_archive_context_is_cached(self):
+        """Test the archive context is loaded once per process.
+
+        """
+
+        write_zipcrypto_zip(self.zip_file_path, [("a.txt", b"Hello World!")], b"a1!")
+
+        assert get_archive_context(self.zip_file_path) is get_archive_context(self.zip_file_path)
+
+    def test_no_encrypted_member(self):
+        """Test loading a ZIP file without encrypted members.
+
+        """
+
+        with zipfile.ZipFile(self.zip_file_path, "w") as zip_file:
+            zip_file.writestr("raw.txt", b"Hello World!")
+
+        with pytest.raises(ValueError):
+            ArchiveContext.load(self.zip_file_path)
+
+
+class TestAesArchiveContext(unittest.TestCase):
+    """WinZip AES archive context tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "aes.zip")
+        self.members = [("docs/large.txt", b"Hello World!" * 100), ("small.txt", b"abc")]
+
+        write_aes_zip(self.zip_file_path, self.members, b"a1!")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_picks_smallest_member(self):
+        """Test the context matches the encryption and verifies with the smallest member.
+
+        """
+
+        archive_context = get_archive_context(self.zip_file_path)
+
+        assert isinstance(archive_context, AesArchiveContext)
+        assert archive_context.is_aes
+        assert archive_context.key_bits == 256
+        assert archive_context.confirmation_entry.name == "small.txt"
+
+    def test_verify_batch(self):
+        """Test verifying a block of passwords.
+
+        """
+
+        archive_context = AesArchiveContext.load(self.zip_file_path)
+        passwords = [str(i).encode() for i in range(100)]
+        passwords.insert(42, b"a1!")
+
+        assert archive_context.verify(b"a1!")
+        assert archive_context.verify_batch(passwords) == [b"a1!"]
+        assert archive_context.verified_count == 101
+
+    def test_extract_all(self):
+        """Test extracting the members with the password found.
+
+        """
+
+        output_directory = os.path.join(self.directory.name, "out")
+
+        AesArchiveContext.load(self.zip_file_path).extract_all(output_directory, b"a1!")
+
+        for name, data in self.members:
+            with open(os.path.join(output_directory, name), "rb") as member_file:
+                assert member_file.read() == data
+
+
+class TestArchiveSet(unittest.TestCase):
+    """Archive set tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_paths = []
+
+        for i, password in enumerate((b"a1!", b"42", b"a1!")):
+            zip_file_path = os.path.join(self.directory.name, "raw{0}.zip".format(i))
+            write_zipcrypto_zip(zip_file_path, [("a.txt", b"Hello World!" * 10)], password)
+            self.zip_file_paths.append(zip_file_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_verify_batch(self):
+        """Test solving the archives of a set one batch at a time.
+
+        """
+
+        for batch_size in (10, 5000):
+            archive_set = ArchiveSet([ArchiveContext.load(p) for p in self.zip_file_paths])
+            passwords = [str(i + 100).encode() for i in range(batch_size)]
+            passwords.insert(batch_size // 2, b"a1!")
+
+            # Archives remain, so no password is returned
+            assert archive_set.verify_batch(passwords) == []
+            assert sorted(archive_set.pop_found()) == [(self.zip_file_paths[0], b"a1!"),
+                                                       (self.zip_file_paths[2], b"a1!")]
+            assert list(archive_set.solved_flags) == [1, 0, 1]
+
+            # The last archive solves the set
+            assert archive_set.verify_batch(passwords + [b"42"]) == [b"42"]
+            assert archive_set.pop_found() == [(self.zip_file_paths[1], b"42")]
+            assert archive_set.is_solved()
+
+    def test_candidate_store_chunk_without_numpy(self):
+        """Test solving the archives of a set from a candidate store without NumPy.
+
+        """
+
+        candidate_store_path = os.path.join(self.directory.name, "candidates.bin")
+        write_candidate_store(candidate_store_path, [b"0", b"a1!", b"1", b"42", b"2"])
+        archive_set = ArchiveSet([ArchiveContext.load(p) for p in self.zip_file_paths])
+
+        with mock.patch("batchverifier.is_available", return_value=False):
+            password = CandidateStoreChunk(candidate_store_path, 0, 5).find(
+                archive_set, lambda: False)
+
+        assert password is not None
+        assert archive_set.is_solved()
+
+        # The found passwords are bytes, so they can be sent to the main process
+        found = archive_set.pop_found()
+        assert sorted(found) == [(self.zip_file_paths[0], b"a1!"),
+                                 (self.zip_file_paths[1], b"42"),
+                                 (self.zip_file_paths[2], b"a1!")]
+        assert pickle.loads(pickle.dumps(found)) == found
+
+    def test_read_manifest(self):
+        """Test reading a manifest relative to its directory.
+
+        """
+
+        manifest_path = os.path.join(self.directory.name, "manifest.txt")
+
+        with open(manifest_path, "w") as manifest_file:
+            manifest_file.write("# Archives\nraw0.zip\n\n{0}\nraw0.zip\n"
+                                .format(self.zip_file_paths[1]))
+
+        assert read_manifest(manifest_path) == self.zip_file_paths[:2]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Tests for the NumPy-vectorized batch verification.
+
+"""
+
+import unittest
+
+import pytest
+
+from zipcrypto import ZipCryptoCipher, check_password, init_keys
+
+numpy = pytest.importorskip("numpy")
+
+from batchverifier import check_batch, init_keys_batch, pack_candidates  # noqa: E402
+
+
+class TestBatchVerifier(unittest.TestCase):
+    """Batch verification tests.
+
+    """
+
+    def setUp(self):
+        self.encryption_header = ZipCryptoCipher(b"a1!").encrypt(b"0123456789A\x42")
+        self.check_byte = 0x42
+
+    def test_pack_candidates(self):
+        """Test packing passwords of different lengths.
+
+        """
+
+        candidates, lengths = pack_candidates([b"a", b"abc", b""])
+
+        assert candidates.shape == (3, 3)
+        assert lengths.tolist() == [1, 3, 0]
+        assert candidates[0].tolist() == [ord("a"), 0, 0]
+
+    def test_init_keys_batch(self):
+        """Test the vectorized key schedule matches the scalar one.
+
+        """
+
+        passwords = [b"a", b"p@$$w0rd", b"", b"a1!"]
+        key0, key1, key2 = init_keys_batch(*pack_candidates(passwords))
+
+        for i, password in enumerate(passwords):
+            assert (int(key0[i]), int(key1[i]), int(key2[i])) == init_keys(password)
+
+    def test_check_batch(self):
+        """Test the vectorized check byte matches the scalar one.
+
+        """
+
+        passwords = [str(i).encode() for i in range(10000)] + [b"a1!"]
+        candidates, lengths = pack_candidates(passwords)
+
+        indices = check_batch(candidates, lengths, self.encryption_header, self.check_byte)
+        expected = [i for i, password in enumerate(passwords)
+                    if check_password(password, self.encryption_header, self.check_byte)]
+
+        assert indices.tolist() == expected
+        assert len(passwords) - 1 in expected
+
+
+if __name__ == '__main__':
+    unittest.main()
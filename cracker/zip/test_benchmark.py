@@ -0,0 +1,81 @@
+"""Tests for the benchmarks.
+
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from archive import ArchiveContext
+from benchmark import (ENCRYPTION_AES, ENCRYPTION_ZIPCRYPTO, SOURCE_CANDIDATE_STORE,
+                       SOURCE_KEYSPACE, SOURCE_WORDLIST, get_chunks, run_benchmarks, write_fixture,
+                       write_sources)
+from keyspace import Keyspace
+
+
+class TestBenchmark(unittest.TestCase):
+    """Benchmark tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.keyspace = Keyspace.brute_force(2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_chunks(self):
+        """Test every source splits the passwords of the keyspace into chunks, in order.
+
+        """
+
+        source_paths = write_sources(self.directory.name, self.keyspace)
+        zip_file_path = write_fixture(self.directory.name, ENCRYPTION_ZIPCRYPTO,
+                                      self.keyspace[self.keyspace.size - 1])
+
+        for source in (SOURCE_KEYSPACE, SOURCE_WORDLIST, SOURCE_CANDIDATE_STORE):
+            archive_context = ArchiveContext.load(zip_file_path)
+            passwords = [chunk.find(archive_context, lambda: False)
+                         for chunk in get_chunks(source, self.keyspace, source_paths)]
+
+            # Only the last chunk holds the password
+            assert passwords[-1] == b"~~"
+            assert not any(passwords[:-1])
+            assert archive_context.verified_count == self.keyspace.size
+
+        with pytest.raises(ValueError):
+            get_chunks("markov", self.keyspace, source_paths)
+
+    def test_run_benchmarks(self):
+        """Test running the benchmarks of both encryptions and writing the results.
+
+        """
+
+        output_path = os.path.join(self.directory.name, "results.json")
+        keyspaces = {ENCRYPTION_ZIPCRYPTO: self.keyspace,
+                     ENCRYPTION_AES: Keyspace(["0123456789"] * 2)}
+
+        results = run_benchmarks(output_path, keyspaces, [1], 0.5)
+
+        with open(output_path) as output_file:
+            assert json.load(output_file) == results
+
+        verification_results = [r for r in results["results"] if r["benchmark"] == "verification"]
+        cracking_results = [r for r in results["results"] if r["benchmark"] == "cracking"]
+
+        assert results["version"] == 1
+        assert {r["encryption"] for r in verification_results} == set(keyspaces)
+        assert len(cracking_results) == 6
+        assert all(r["found"] for r in cracking_results)
+        assert {r["position"] for r in cracking_results} == {4418, 50}
+
+        with pytest.raises(ValueError):
+            run_benchmarks(keyspaces=keyspaces, position=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
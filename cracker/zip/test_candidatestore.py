@@ -0,0 +1,105 @@
+"""Tests for the binary candidate store.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from candidatestore import (CandidateStore, convert_text_dictionaries, convert_text_dictionary,
+                            write_candidate_store)
+
+
+class TestCandidateStore(unittest.TestCase):
+    """Candidate store tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.candidate_store_path = os.path.join(self.directory.name, "dictionary_1_0.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_and_read(self):
+        """Test reading candidates of different lengths as memoryviews.
+
+        """
+
+        passwords = [b"a", b"p@$$w0rd", b"abc", "áãúü".encode()]
+
+        assert write_candidate_store(self.candidate_store_path, passwords) == 4
+
+        with CandidateStore(self.candidate_store_path) as candidate_store:
+            assert len(candidate_store) == 4
+            assert candidate_store.width == 0
+            assert candidate_store[1] == b"p@$$w0rd"
+            assert [c.tobytes() for c in candidate_store.candidates()] == passwords
+            assert [c.tobytes() for c in candidate_store.candidates(2, 100)] == passwords[2:]
+
+            with pytest.raises(IndexError):
+                candidate_store[4]
+
+    def test_convert_text_dictionary(self):
+        """Test converting a text dictionary.
+
+        """
+
+        dictionary_file_path = os.path.join(self.directory.name, "dictionary_1_0.txt")
+
+        with open(dictionary_file_path, "w") as dictionary_file:
+            dictionary_file.write("!\n\"\n#\n")
+
+        assert convert_text_dictionary(dictionary_file_path, self.candidate_store_path) == 3
+
+        with CandidateStore(self.candidate_store_path) as candidate_store:
+            assert candidate_store.width == 1
+            assert [c.tobytes() for c in candidate_store.candidates()] == [b"!", b"\"", b"#"]
+
+        output_directory = os.path.join(self.directory.name, "bin")
+        os.mkdir(output_directory)
+
+        assert convert_text_dictionaries(self.directory.name, output_directory) == [
+            os.path.join(output_directory, "dictionary_1_0.bin")]
+
+    def test_not_a_candidate_store(self):
+        """Test opening a file that is not a candidate store.
+
+        """
+
+        with open(self.candidate_store_path, "wb") as candidate_store_file:
+            candidate_store_file.write(b"!\n" * 100)
+
+        with pytest.raises(ValueError):
+            CandidateStore(self.candidate_store_path)
+
+    def test_pack(self):
+        """Test packing fixed-width and variable-width candidates.
+
+        """
+
+        pytest.importorskip("numpy")
+
+        write_candidate_store(self.candidate_store_path, [b"ab", b"cd", b"ef"])
+
+        with CandidateStore(self.candidate_store_path) as candidate_store:
+            candidates, lengths = candidate_store.pack(1, 10)
+
+            assert lengths is None
+            assert [row.tobytes() for row in candidates] == [b"cd", b"ef"]
+
+        candidate_store_path = os.path.join(self.directory.name, "dictionary_2_0.bin")
+        write_candidate_store(candidate_store_path, [b"a", b"bcd", b"", b"ef"])
+
+        with CandidateStore(candidate_store_path) as candidate_store:
+            candidates, lengths = candidate_store.pack(1, 4)
+
+            assert lengths.tolist() == [3, 0, 2]
+            assert [row.tobytes() for row in candidates] == [b"bcd", b"\0\0\0", b"ef\0"]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the checkpoint of cracking runs.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from checkpoint import Checkpoint, get_remaining_ranges, merge_range
+
+
+class TestRanges(unittest.TestCase):
+    """Range helper tests.
+
+    """
+
+    def test_merge_range(self):
+        """Test merging overlapping, adjacent and disjoint ranges.
+
+        """
+
+        ranges = []
+
+        merge_range(ranges, 10, 20)
+        merge_range(ranges, 30, 40)
+        merge_range(ranges, 0, 5)
+        merge_range(ranges, 5, 10)
+        merge_range(ranges, 35, 50)
+        merge_range(ranges, 60, 60)
+
+        assert ranges == [[0, 20], [30, 50]]
+
+        merge_range(ranges, 15, 35)
+
+        assert ranges == [[0, 50]]
+
+    def test_get_remaining_ranges(self):
+        """Test the ranges remaining after the completed ranges.
+
+        """
+
+        ranges = [[10, 20], [30, 40]]
+
+        assert get_remaining_ranges(ranges, 0, 50) == [(0, 10), (20, 30), (40, 50)]
+        assert get_remaining_ranges(ranges, 15, 35) == [(20, 30)]
+        assert get_remaining_ranges(ranges, 10, 20) == []
+        assert get_remaining_ranges([], 0, 5) == [(0, 5)]
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Checkpoint tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.directory.name, "checkpoint.json")
+        self.zip_file_path = os.path.join(self.directory.name, "file.zip")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_invalid_checkpoint_path(self):
+        """Test creating a checkpoint without path.
+
+        """
+
+        with pytest.raises(ValueError):
+            Checkpoint(" ")
+
+    def test_save_and_resume(self):
+        """Test resuming the completed ranges and password of a previous run.
+
+        """
+
+        checkpoint = Checkpoint(self.checkpoint_path)
+        checkpoint.mark_completed(self.zip_file_path, "keyspace:a", 0, 100)
+        checkpoint.mark_completed(self.zip_file_path, "keyspace:a", 200, 300)
+        checkpoint.mark_completed(self.zip_file_path, "wordlist:b", 0, 4096)
+        checkpoint.set_password(self.zip_file_path, b"p@$$w0rd")
+        checkpoint.save()
+
+        assert os.listdir(self.directory.name) == ["checkpoint.json"]
+
+        checkpoint = Checkpoint(self.checkpoint_path, resume=True)
+
+        assert checkpoint.get_remaining_ranges(self.zip_file_path, "keyspace:a", 0, 400) == \
+            [(100, 200), (300, 400)]
+        assert checkpoint.is_completed(self.zip_file_path, "keyspace:a", 50, 100)
+        assert checkpoint.get_resume_offset(self.zip_file_path, "wordlist:b") == 4096
+        assert checkpoint.get_resume_offset(self.zip_file_path, "wordlist:c") == 0
+        assert checkpoint.get_password(self.zip_file_path) == b"p@$$w0rd"
+
+    def test_no_resume(self):
+        """Test starting from scratch despite an existing checkpoint file.
+
+        """
+
+        checkpoint = Checkpoint(self.checkpoint_path)
+        checkpoint.mark_completed(self.zip_file_path, "keyspace:a", 0, 100)
+        checkpoint.save()
+
+        checkpoint = Checkpoint(self.checkpoint_path, resume=False)
+
+        assert checkpoint.get_remaining_ranges(self.zip_file_path, "keyspace:a", 0, 100) == \
+            [(0, 100)]
+        assert checkpoint.get_password(self.zip_file_path) is None
+
+    def test_save_if_due(self):
+        """Test writing the checkpoint file only once the interval elapsed.
+
+        """
+
+        checkpoint = Checkpoint(self.checkpoint_path, interval=3600)
+
+        assert not checkpoint.save_if_due()
+        assert not os.path.exists(self.checkpoint_path)
+
+        checkpoint.interval = 0
+
+        assert checkpoint.save_if_due()
+        assert os.path.exists(self.checkpoint_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
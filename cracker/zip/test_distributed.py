@@ -0,0 +1,131 @@
+"""Tests for the coordinator and workers.
+
+"""
+
+import gzip
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+import pytest
+
+from distributed import Coordinator, run_worker
+from fixtures import write_zipcrypto_zip
+from keyspace import Keyspace
+
+
+class TestCoordinator(unittest.TestCase):
+    """Coordinator tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "raw.zip")
+        self.keyspace = Keyspace.brute_force(2)
+
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", b"Hello World!")], b"z~")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_invalid_sources(self):
+        """Test creating a coordinator without keyspace nor wordlist, or with a compressed wordlist.
+
+        """
+
+        with pytest.raises(ValueError):
+            Coordinator(self.zip_file_path)
+
+        # Compressed wordlists would be decompressed from the start for every lease
+        wordlist_path = os.path.join(self.directory.name, "wordlist.txt.gz")
+
+        with gzip.open(wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(b"a\nb\n")
+
+        with pytest.raises(ValueError):
+            Coordinator(self.zip_file_path, wordlist_path=wordlist_path)
+
+    def test_workers(self):
+        """Test cracking with several worker processes on localhost.
+
+        """
+
+        with Coordinator(self.zip_file_path, keyspace=self.keyspace, host="127.0.0.1", port=0,
+                         chunk_size=1024) as coordinator:
+            workers = [multiprocessing.Process(target=run_worker,
+                                               args=(self.zip_file_path, "127.0.0.1",
+                                                     coordinator.address[1]))
+                       for _ in range(2)]
+
+            for worker in workers:
+                worker.start()
+
+            password = coordinator.serve()
+
+        for worker in workers:
+            worker.join(30)
+
+        assert password == b"z~"
+        assert all(worker.exitcode == 0 for worker in workers)
+
+    def test_lease_timeout(self):
+        """Test issuing again the range of a lease not reported in time.
+
+        """
+
+        coordinator = Coordinator(self.zip_file_path, keyspace=self.keyspace, lease_timeout=0.1,
+                                  chunk_size=5000)
+
+        lease = coordinator.handle_message({"type": "lease", "worker": "a"})
+
+        assert (lease["start"], lease["end"]) == (0, 5000)
+
+        time.sleep(0.2)
+
+        lease = coordinator.handle_message({"type": "lease", "worker": "b"})
+
+        assert (lease["start"], lease["end"]) == (0, 5000)
+
+        # Late report of the expired lease
+        assert coordinator.handle_message(
+            {"type": "done", "worker": "a", "lease": 1, "elapsed": 1})["type"] == "chunk"
+
+    def test_adaptive_chunk_size(self):
+        """Test sizing the leases from the throughput of each worker.
+
+        """
+
+        coordinator = Coordinator(self.zip_file_path, keyspace=Keyspace.brute_force(4),
+                                  lease_duration=10, chunk_size=2000)
+
+        fast_lease = coordinator.handle_message({"type": "lease", "worker": "fast"})
+        slow_lease = coordinator.handle_message({"type": "lease", "worker": "slow"})
+
+        fast_lease = coordinator.handle_message(
+            {"type": "done", "worker": "fast", "lease": fast_lease["lease"], "elapsed": 1})
+        slow_lease = coordinator.handle_message(
+            {"type": "done", "worker": "slow", "lease": slow_lease["lease"], "elapsed": 10})
+
+        assert fast_lease["end"] - fast_lease["start"] == 20000
+        assert slow_lease["end"] - slow_lease["start"] == 2000
+
+    def test_wrong_password(self):
+        """Test issuing again the range of a lease reported with a wrong password.
+
+        """
+
+        coordinator = Coordinator(self.zip_file_path, keyspace=self.keyspace, chunk_size=5000)
+
+        lease = coordinator.handle_message({"type": "lease", "worker": "a"})
+        response = coordinator.handle_message(
+            {"type": "found", "worker": "a", "lease": lease["lease"], "password": b"zz".hex()})
+
+        assert (response["start"], response["end"]) == (0, 5000)
+        assert coordinator.password is None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for the adaptive degree of parallelism governor.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import pytest
+
+import governor
+
+from governor import ParallelismGovernor, get_cpu_count, get_cpu_quota, get_degree_of_parallelism
+
+
+class TestGovernor(unittest.TestCase):
+    """Governor tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cpu_max_path = os.path.join(self.directory.name, "cpu.max")
+        self.cgroup_v2_cpu_max = governor._CGROUP_V2_CPU_MAX
+        governor._CGROUP_V2_CPU_MAX = self.cpu_max_path
+
+    def tearDown(self):
+        governor._CGROUP_V2_CPU_MAX = self.cgroup_v2_cpu_max
+        self.directory.cleanup()
+
+    def test_degree_of_parallelism(self):
+        """Test the degree of parallelism is rounded down, but never to 0.
+
+        """
+
+        assert get_degree_of_parallelism(0.5, 1) == 1
+        assert get_degree_of_parallelism(0.5, 3) == 1
+        assert get_degree_of_parallelism(0.5, 5) == 2
+        assert get_degree_of_parallelism(1, 8) == 8
+
+        with pytest.raises(ValueError):
+            get_degree_of_parallelism(0, 8)
+
+    def test_cpu_quota(self):
+        """Test reading the cgroup CPU quota.
+
+        """
+
+        with open(self.cpu_max_path, "w") as cpu_max_file:
+            cpu_max_file.write("150000 100000\n")
+
+        assert get_cpu_quota() == 1.5
+        assert get_cpu_count() <= 2
+
+        with open(self.cpu_max_path, "w") as cpu_max_file:
+            cpu_max_file.write("max 100000\n")
+
+        assert get_cpu_quota() is None
+
+    def test_update(self):
+        """Test growing the pool until the throughput stops improving, then following the envelope.
+
+        """
+
+        parallelism_governor = ParallelismGovernor(max_degree_of_parallelism=8, sample_interval=10)
+        limits = [8]
+        parallelism_governor.get_limit = lambda pids=(): limits[0]
+
+        # The throughput stops improving beyond 4 processes (e.g. 4 physical cores)
+        now = 0
+        verified_count = 0
+
+        def sample():
+            nonlocal now, verified_count
+            now = now + 10
+            verified_count = verified_count + 10 * 1000 * min(
+                parallelism_governor.degree_of_parallelism, 4)
+
+            return parallelism_governor.update(verified_count, now=now)
+
+        assert parallelism_governor.degree_of_parallelism == 4
+        assert parallelism_governor.update(0, now=now) == 4
+
+        # 4 -> 6 processes do not improve the throughput, so the pool goes back to 4
+        assert sample() == 6
+        assert sample() == 4
+        assert sample() == 4
+        assert parallelism_governor.throughputs == {4: 4000, 6: 4000}
+
+        # Another job uses the node, then finishes
+        limits[0] = 2
+        assert sample() == 2
+
+        limits[0] = 8
+        assert sample() == 3
+        assert sample() == 4
+        assert sample() == 6
+        assert sample() == 4
+
+    def test_invalid_governor(self):
+        """Test creating a governor with an invalid envelope.
+
+        """
+
+        with pytest.raises(ValueError):
+            ParallelismGovernor(memory_fraction=0)
+
+        with pytest.raises(ValueError):
+            ParallelismGovernor(min_degree_of_parallelism=0)
+
+        with pytest.raises(ValueError):
+            ParallelismGovernor(sample_interval=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
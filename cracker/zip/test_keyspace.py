@@ -0,0 +1,97 @@
+"""Tests for the index-addressable keyspace.
+
+"""
+
+import itertools
+import unittest
+
+import pytest
+
+from keyspace import ASCII_PRINTABLE, Keyspace
+
+
+class TestKeyspace(unittest.TestCase):
+    """Keyspace tests.
+
+    """
+
+    def test_invalid_keyspace(self):
+        """Test creating a keyspace with invalid charsets or length.
+
+        """
+
+        with pytest.raises(ValueError):
+            Keyspace([])
+
+        with pytest.raises(ValueError):
+            Keyspace(["ab", ""])
+
+        with pytest.raises(ValueError):
+            Keyspace.brute_force(0)
+
+    def test_brute_force_order(self):
+        """Test the keyspace has the same order as the dictionaries (itertools.product).
+
+        """
+
+        keyspace = Keyspace.brute_force(2)
+        expected = [bytes(p) for p in itertools.product(ASCII_PRINTABLE, repeat=2)]
+
+        assert keyspace.size == 94 ** 2
+        assert list(keyspace.candidates()) == expected
+        assert [keyspace[i] for i in (0, 95, keyspace.size - 1)] == [expected[0], expected[95],
+                                                                     expected[-1]]
+
+        with pytest.raises(IndexError):
+            keyspace[keyspace.size]
+
+    def test_candidates_range(self):
+        """Test generating a range crossing carries on several positions.
+
+        """
+
+        keyspace = Keyspace(["ab", "0123", "xyz"])
+
+        assert list(keyspace.candidates(10, 14)) == [b"a3y", b"a3z", b"b0x", b"b0y"]
+        assert list(keyspace.candidates(22, 100)) == [b"b3y", b"b3z"]
+        assert list(keyspace.candidates(5, 5)) == []
+
+    def test_unicode_charset(self):
+        """Test charsets with multi-byte (UTF-8) symbols.
+
+        """
+
+        keyspace = Keyspace(["áã", "ú"])
+
+        assert not keyspace.is_single_byte
+        assert [c.decode() for c in keyspace.candidates()] == ["áú", "ãú"]
+
+    def test_ranges(self):
+        """Test splitting the keyspace into ranges without gaps or overlaps.
+
+        """
+
+        keyspace = Keyspace.brute_force(3)
+        ranges = list(keyspace.ranges(250000))
+
+        assert ranges[0] == (0, 250000)
+        assert ranges[-1][1] == keyspace.size
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    def test_pack(self):
+        """Test packing a range matches the generated candidates.
+
+        """
+
+        pytest.importorskip("numpy")
+
+        keyspace = Keyspace.brute_force(3)
+        start = keyspace.size - 1000
+        candidates = keyspace.pack(start, keyspace.size + 10)
+
+        assert candidates.shape == (1000, 3)
+        assert [row.tobytes() for row in candidates] == list(keyspace.candidates(start))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Tests for the probability-ordered (Markov) keyspace.
+
+"""
+
+import itertools
+import os
+import pickle
+import tempfile
+import unittest
+
+import pytest
+
+from markov import MAX_TRANSITION_LEVEL, MarkovKeyspace
+
+
+class TestMarkovKeyspace(unittest.TestCase):
+    """Markov keyspace tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.wordlist_path = os.path.join(self.directory.name, "words.txt")
+
+        with open(self.wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(b"password\npassword1\npass\nsunshine\nsunshine1\n123456\n"
+                                b"iloveyou\nprincess\nna\xefve\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_invalid_keyspace(self):
+        """Test creating a keyspace with invalid lengths or levels.
+
+        """
+
+        with pytest.raises(ValueError):
+            MarkovKeyspace(b"ab", [bytes(6)], 0, 1)
+
+        with pytest.raises(ValueError):
+            MarkovKeyspace(b"ab", [bytes(6)], 2, 1)
+
+        with pytest.raises(ValueError):
+            MarkovKeyspace(b"ab", [bytes(6)], 1, 2)
+
+    def test_most_probable_first(self):
+        """Test the words of the wordlist are among the first candidates.
+
+        """
+
+        keyspace = MarkovKeyspace.train(self.wordlist_path, 1, 8, max_level=25)
+        candidates = list(keyspace.candidates(0, 100000))
+
+        assert candidates[:4] == [b"p", b"pa", b"pas", b"pass"]
+
+        for word in (b"password", b"sunshine", b"123456", b"iloveyou"):
+            assert candidates.index(word) < 1000
+
+        # Levels are sorted (the sum of the transition levels never decreases)
+        assert keyspace._blocks == sorted(keyspace._blocks)
+
+    def test_all_candidates(self):
+        """Test every candidate within the length bound is generated once when the level is not
+            bounded.
+
+        """
+
+        keyspace = MarkovKeyspace.train(self.wordlist_path, 1, 3, charset=b"abc")
+        candidates = list(keyspace.candidates())
+        expected = set(bytes(p) for n in range(1, 4) for p in itertools.product(b"abc", repeat=n))
+
+        assert keyspace.size == 3 + 3 ** 2 + 3 ** 3
+        assert keyspace.max_level == MAX_TRANSITION_LEVEL * 3
+        assert len(candidates) == keyspace.size
+        assert set(candidates) == expected
+
+    def test_ranges(self):
+        """Test the ranges of candidates match the whole enumeration, whatever the split.
+
+        """
+
+        keyspace = MarkovKeyspace.train(self.wordlist_path, 2, 6, max_level=18)
+        candidates = list(keyspace.candidates())
+
+        assert len(candidates) == keyspace.size
+        assert len(set(candidates)) == keyspace.size
+
+        for range_size in (1, 7, 1000):
+            assert [c for start, end in keyspace.ranges(range_size)
+                    for c in keyspace.candidates(start, end)] == candidates
+
+        assert keyspace[keyspace.size - 1] == candidates[-1]
+
+        with pytest.raises(IndexError):
+            keyspace[keyspace.size]
+
+    def test_pickle(self):
+        """Test the keyspace is sent to the processes without its tables.
+
+        """
+
+        keyspace = MarkovKeyspace.train(self.wordlist_path, 1, 8, max_level=25)
+        state = pickle.dumps(keyspace)
+        copy = pickle.loads(state)
+
+        assert b"_counts" not in state
+        assert copy.fingerprint == keyspace.fingerprint
+        assert list(copy.candidates(5000, 6000)) == list(keyspace.candidates(5000, 6000))
+
+
+if __name__ == '__main__':
+    unittest.main()
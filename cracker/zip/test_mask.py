@@ -0,0 +1,74 @@
+"""Tests for the mask attack.
+
+"""
+
+import unittest
+
+import pytest
+
+from mask import Mask, parse_mask
+
+
+class TestMask(unittest.TestCase):
+    """Mask tests.
+
+    """
+
+    def test_invalid_mask(self):
+        """Test parsing invalid masks.
+
+        """
+
+        for mask in ("", "?l?", "?x", "[ab", "?l[]"):
+            with pytest.raises(ValueError):
+                parse_mask(mask)
+
+    def test_parse_mask(self):
+        """Test parsing built-in classes, custom charsets and literals.
+
+        """
+
+        positions = parse_mask("?u?1[áãúü?d]x??", {"1": "ab?d"})
+
+        assert len(positions) == 5
+        assert positions[0] == list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        assert positions[1] == list("ab0123456789")
+        assert positions[2] == list("áãúü0123456789")
+        assert positions[3:] == [["x"], ["?"]]
+
+    def test_size_and_candidates(self):
+        """Test the exact size and candidates of a mask with Unicode symbols.
+
+        """
+
+        mask = Mask("p[áã]?d")
+
+        assert mask.size == 20
+        assert len(mask.keyspaces) == 1
+        assert mask.keyspaces[0][0] == "pá0".encode()
+        assert mask.keyspaces[0][19] == "pã9".encode()
+
+        mask = Mask("p[áã]?d", encoding="cp850")
+
+        assert mask.keyspaces[0].is_single_byte
+        assert mask.keyspaces[0][10] == "pã0".encode("cp850")
+
+    def test_increment(self):
+        """Test increment mode over min and max lengths.
+
+        """
+
+        mask = Mask("?d?d?d?d", min_length=2, max_length=3)
+
+        assert [len(k.radixes) for k in mask.keyspaces] == [2, 3]
+        assert mask.size == 100 + 1000
+
+        with pytest.raises(ValueError):
+            Mask("?d?d", min_length=3)
+
+        with pytest.raises(ValueError):
+            Mask("?d?d", min_length=2, max_length=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Tests for the rule engine.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from rules import RuleSet, apply_rule, parse_rule
+
+
+class TestRules(unittest.TestCase):
+    """Rule engine tests.
+
+    """
+
+    def apply(self, rule, word):
+        """Applies a rule to a word.
+
+        """
+
+        return apply_rule(parse_rule(rule), word)
+
+    def test_invalid_rule(self):
+        """Test parsing unsupported functions and missing arguments.
+
+        """
+
+        for rule in ("x", "$", "sa"):
+            with pytest.raises(ValueError):
+                parse_rule(rule)
+
+        with pytest.raises(ValueError):
+            RuleSet(["# comment only", ""])
+
+    def test_functions(self):
+        """Test capitalization, leetspeak, appended/prepended digits and years, and reversal.
+
+        """
+
+        assert self.apply(":", b"password") == b"password"
+        assert self.apply("c", b"pASSWORD") == b"Password"
+        assert self.apply("u", b"password") == b"PASSWORD"
+        assert self.apply("C", b"password") == b"pASSWORD"
+        assert self.apply("t", b"PassWord") == b"pASSwORD"
+        assert self.apply("sa@ ss$ so0", b"password") == b"p@$$w0rd"
+        assert self.apply("$2$0$2$4", b"password") == b"password2024"
+        assert self.apply("^2^1", b"password") == b"12password"
+        assert self.apply("r", b"password") == b"drowssap"
+        assert self.apply("c r", b"password") == b"drowssaP"
+        assert self.apply("d ] [ @s", b"pass") == b"apa"
+        assert self.apply("f", b"ab") == b"abba"
+        assert self.apply("$ã", b"a") == "aã".encode()
+
+    def test_expand_batches(self):
+        """Test expanding batches of words rule by rule in bounded batches.
+
+        """
+
+        rule_set = RuleSet([":", "c", "$1", "# comment", "", "@a"])
+        batches = list(rule_set.expand_batches([[b"a", b"b"], [b"c"]], batch_size=4))
+
+        assert len(rule_set) == 4
+        assert all(len(batch) <= 4 for batch in batches)
+        assert sum(batches, []) == [b"a", b"b", b"A", b"B", b"a1", b"b1", b"b",
+                                    b"c", b"C", b"c1", b"c"]
+
+    def test_load(self):
+        """Test loading the bundled rules file.
+
+        """
+
+        rule_set = RuleSet.load(os.path.join(os.path.dirname(__file__), "common.rule"))
+
+        assert b"p@$$w0rd" in rule_set.expand([b"password"])
+        assert b"Password2024" in rule_set.expand([b"password"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            rules_path = os.path.join(directory, "test.rule")
+
+            with open(rules_path, "w", encoding="utf-8") as rules_file:
+                rules_file.write("c\r\nr\n")
+
+            assert RuleSet.load(rules_path).rules == ["c", "r"]
+
+
+if __name__ == '__main__':
+    unittest.main()
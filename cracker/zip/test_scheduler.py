@@ -0,0 +1,119 @@
+"""Tests for the cracking pool.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from chunks import KeyspaceChunk, PasswordsChunk
+from fixtures import write_zipcrypto_zip
+from keyspace import Keyspace
+from scheduler import CrackingPool
+
+
+class TestCrackingPool(unittest.TestCase):
+    """Cracking pool tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "raw.zip")
+        self.keyspace = Keyspace.brute_force(2)
+
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", b"Hello World!")], b"z~")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_invalid_max_degree_of_parallelism(self):
+        """Test creating a pool without processes.
+
+        """
+
+        with pytest.raises(ValueError):
+            CrackingPool(self.zip_file_path, 0)
+
+    def test_run(self):
+        """Test finding the password and running the pool again.
+
+        """
+
+        done_keys = []
+        chunks = [KeyspaceChunk(self.keyspace, start, end)
+                  for start, end in self.keyspace.ranges(1000)]
+
+        with CrackingPool(self.zip_file_path, 2) as cracking_pool:
+            password = cracking_pool.run(chunks, lambda key, size: done_keys.append(key))
+
+            assert password == b"z~"
+            source = "keyspace:" + self.keyspace.fingerprint
+
+            assert (source, 0, 1000) in done_keys
+            assert (source, 8000, 8836) not in done_keys
+
+            # The pool can be reused once a run completed
+            assert cracking_pool.run([PasswordsChunk([b"a", b"b"], ("test", 0, 2))]) is None
+            assert cracking_pool.run([PasswordsChunk([b"a", b"z~"], ("test", 0, 2))]) == b"z~"
+
+    def test_resize(self):
+        """Test growing and shrinking the pool between and during runs.
+
+        """
+
+        done_keys = []
+        chunks = [KeyspaceChunk(self.keyspace, start, end)
+                  for start, end in self.keyspace.ranges(500, 0, 8000)]
+
+        with CrackingPool(self.zip_file_path, 1) as cracking_pool:
+            cracking_pool.resize(3)
+
+            assert cracking_pool.run(chunks[:4], lambda key, size: done_keys.append(key)) is None
+
+            # The processes leaving finish their current chunk, so no chunk is lost
+            cracking_pool.resize(1)
+
+            assert cracking_pool.run(chunks[4:], lambda key, size: done_keys.append(key)) is None
+            assert sorted(done_keys) == sorted(chunk.key for chunk in chunks)
+            assert cracking_pool.max_degree_of_parallelism == 1
+
+            with pytest.raises(ValueError):
+                cracking_pool.resize(0)
+
+    def test_process_failure(self):
+        """Test a process failing to load the archive fails the run.
+
+        """
+
+        with CrackingPool(os.path.join(self.directory.name, "missing.zip"), 1) as cracking_pool:
+            with pytest.raises(RuntimeError):
+                cracking_pool.run([PasswordsChunk([b"a"], ("test", 0, 2))])
+
+    def test_run_archive_set(self):
+        """Test solving several archives at once with a single pass over the passwords.
+
+        """
+
+        zip_file_paths = [self.zip_file_path]
+
+        for i, password in enumerate((b"!!", b"a~")):
+            zip_file_paths.append(os.path.join(self.directory.name, "raw{0}.zip".format(i)))
+            write_zipcrypto_zip(zip_file_paths[-1], [("raw.txt", b"Hello World!")], password)
+
+        solved = {}
+        chunks = [KeyspaceChunk(self.keyspace, start, end)
+                  for start, end in self.keyspace.ranges(1000)]
+
+        with CrackingPool(zip_file_paths, 2) as cracking_pool:
+            password = cracking_pool.run(chunks, archive_solved_callback=solved.__setitem__)
+
+        # The last archive solved depends on which process gets the last chunks
+        assert password in (b"z~", b"a~")
+        assert solved == dict(zip(zip_file_paths, (b"z~", b"!!", b"a~")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the throughput telemetry.
+
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+import urllib.request
+
+import pytest
+
+from archive import ArchiveContext
+from chunks import KeyspaceChunk
+from fixtures import write_zipcrypto_zip
+from keyspace import Keyspace
+from scheduler import CrackingPool
+from telemetry import (TIME_FEED, TIME_GENERATION, TIME_IO, TIME_VERIFICATION, ChunkTimer,
+                       Telemetry, TimedArchiveContext)
+
+
+class TestTelemetry(unittest.TestCase):
+    """Telemetry tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "raw.zip")
+        self.stats_path = os.path.join(self.directory.name, "stats.jsonl")
+        self.keyspace = Keyspace.brute_force(2)
+
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", b"Hello World!")], b"z~")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_invalid_interval(self):
+        """Test creating a telemetry without interval.
+
+        """
+
+        with pytest.raises(ValueError):
+            Telemetry(self.stats_path, 0)
+
+    def test_chunk_timer(self):
+        """Test measuring the passwords verified and the time split of a chunk.
+
+        """
+
+        archive_context = TimedArchiveContext(ArchiveContext.load(self.zip_file_path))
+        chunk_timer = ChunkTimer(archive_context)
+        chunk = KeyspaceChunk(self.keyspace, 0, 5000)
+
+        chunk_timer.start()
+        chunk.find(archive_context, lambda: False, 1000)
+        stats = chunk_timer.stop(chunk)
+
+        assert stats["verified_count"] == 5000
+        assert stats[TIME_VERIFICATION] > 0
+        assert stats[TIME_VERIFICATION] + stats[TIME_GENERATION] == pytest.approx(stats["elapsed"])
+        assert stats["false_positive_count"] == archive_context.false_positive_count
+        assert TIME_IO not in stats
+
+    def test_run(self):
+        """Test the stats of a run are written to the stats file.
+
+        """
+
+        chunks = [KeyspaceChunk(self.keyspace, start, end)
+                  for start, end in self.keyspace.ranges(1000, 0, 6000)]
+
+        with Telemetry(self.stats_path, keyspace_size=self.keyspace.size) as telemetry:
+            with CrackingPool(self.zip_file_path, 2, telemetry=telemetry) as cracking_pool:
+                assert cracking_pool.run(chunks, lambda key, size: telemetry
+                                         .record_keyspace_progress(size)) is None
+
+        with open(self.stats_path) as stats_file:
+            stats = [json.loads(line) for line in stats_file]
+
+        assert len(stats) == 1
+        assert stats[0]["verified_count"] == 6000
+        assert sum(s["chunk_count"] for s in stats[0]["processes"].values()) == 6
+        assert sorted(stats[0]["time"]) == sorted([TIME_GENERATION, TIME_VERIFICATION, TIME_IO,
+                                                   TIME_FEED])
+        assert stats[0]["keyspace"]["processed"] == 6000
+        assert stats[0]["keyspace"]["fraction"] == 6000 / self.keyspace.size
+        assert stats[0]["keyspace"]["eta"] > 0
+
+    def test_periodic_snapshots(self):
+        """Test snapshots are written every interval while no chunk completes.
+
+        """
+
+        with Telemetry(self.stats_path, 0.05):
+            time.sleep(0.3)
+
+        with open(self.stats_path) as stats_file:
+            stats = [json.loads(line) for line in stats_file]
+
+        # Periodic snapshots plus the last one, written when closing
+        assert len(stats) >= 4
+        assert stats[0]["elapsed"] < stats[-1]["elapsed"]
+
+    def test_http_endpoint(self):
+        """Test the stats are served over HTTP.
+
+        """
+
+        with Telemetry(http_port=0) as telemetry:
+            telemetry.record_chunk(0, {"verified_count": 100, "false_positive_count": 1,
+                                       "elapsed": 0.5, TIME_VERIFICATION: 0.4, TIME_IO: 0.1})
+
+            url = "http://{0}/metrics".format(telemetry.address)
+
+            with urllib.request.urlopen(url, timeout=10) as response:
+                stats = json.loads(response.read())
+
+        assert stats["verified_count"] == 100
+        assert stats["false_positive_count"] == 1
+        assert stats["processes"]["0"]["passwords_per_second"] == 200
+        assert stats["time"][TIME_IO] == 0.1
+        assert stats["keyspace"] is None
+
+
+if __name__ == '__main__':
+    unittest.main()
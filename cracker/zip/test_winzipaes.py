@@ -0,0 +1,142 @@
+"""Tests for the WinZip AES password verification engine.
+
+"""
+
+import os
+import struct
+import tempfile
+import unittest
+import zipfile
+
+import pytest
+
+from fixtures import write_aes_zip
+from winzipaes import (EXTRA_FIELD_ID, VENDOR_VERSION_AE1, VENDOR_VERSION_AE2, WinZipAesCipher,
+                       WinZipAesEntry, derive_keys, encrypt_block, expand_key, parse_extra_field)
+
+
+def load_entry(zip_file_path):
+    """Loads the first member of a ZIP file.
+
+    """
+
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        return WinZipAesEntry.from_zip_info(zip_file.fp, zip_file.infolist()[0])
+
+
+class TestWinZipAes(unittest.TestCase):
+    """WinZip AES verification engine tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "aes.zip")
+        self.data = b"Hello World!" * 100
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_block_cipher(self):
+        """Test the AES block cipher against the FIPS 197 examples.
+
+        """
+
+        block = bytes.fromhex("00112233445566778899aabbccddeeff")
+
+        assert encrypt_block(expand_key(bytes(range(16))), block).hex() \
+            == "69c4e0d86a7b0430d8cdb78070b4c55a"
+        assert encrypt_block(expand_key(bytes(range(24))), block).hex() \
+            == "dda97ca4864cdfe06eaf70a0ec0d7191"
+        assert encrypt_block(expand_key(bytes(range(32))), block).hex() \
+            == "8ea2b7ca516745bfeafc49904b496089"
+
+        with pytest.raises(ValueError):
+            expand_key(bytes(15))
+
+    def test_cipher_round_trip(self):
+        """Test decrypting data in blocks that are not aligned with the AES blocks.
+
+        """
+
+        encrypted = WinZipAesCipher(bytes(range(32))).encrypt(self.data)
+        cipher = WinZipAesCipher(bytes(range(32)))
+
+        assert encrypted != self.data
+        assert cipher.decrypt(encrypted[:7]) + cipher.decrypt(encrypted[7:]) == self.data
+
+    def test_verify_deflated(self):
+        """Test verifying passwords against a deflated AE-2 member.
+
+        """
+
+        write_aes_zip(self.zip_file_path, [("aes.txt", self.data)], b"a1!")
+
+        entry = load_entry(self.zip_file_path)
+
+        assert entry.vendor_version == VENDOR_VERSION_AE2
+        assert entry.verify(b"a1!")
+        assert not entry.verify(b"a1?")
+        assert entry.decrypt(b"a1!") == self.data
+
+        with pytest.raises(ValueError):
+            entry.decrypt(b"a1?")
+
+    def test_verify_stored(self):
+        """Test verifying passwords against a stored AE-1 member (AES-128).
+
+        """
+
+        write_aes_zip(self.zip_file_path, [("aes.txt", self.data)], b"a1!", 1, VENDOR_VERSION_AE1,
+                      zipfile.ZIP_STORED)
+
+        entry = load_entry(self.zip_file_path)
+
+        assert entry.key_length == 16
+        assert entry.verify(b"a1!")
+        assert not entry.verify(b"")
+        assert entry.decrypt(b"a1!") == self.data
+
+    def test_verifier_false_positives_are_rejected(self):
+        """Test passwords passing the password verification value are rejected by the HMAC.
+
+        """
+
+        write_aes_zip(self.zip_file_path, [("aes.txt", self.data)], b"a1!")
+
+        entry = load_entry(self.zip_file_path)
+
+        # ~1/65536 of the wrong passwords pass the verification value, so one is simulated
+        entry.password_verifier = derive_keys(b"a1?", entry.salt, entry.key_length)[2]
+
+        assert entry.check(b"a1?") is not None
+        assert not entry.confirm(b"a1?")
+        assert not entry.verify(b"a1!")
+
+    def test_parse_extra_field(self):
+        """Test finding the WinZip AES record among other extra field records.
+
+        """
+
+        record = struct.pack("<2HH2sBH", EXTRA_FIELD_ID, 7, VENDOR_VERSION_AE2, b"AE", 3, 8)
+
+        assert parse_extra_field(struct.pack("<2H4s", 0x5455, 4, b"time") + record) == (2, 3, 8)
+        assert parse_extra_field(b"") is None
+
+        with pytest.raises(ValueError):
+            parse_extra_field(record.replace(b"AE", b"XX"))
+
+    def test_not_aes(self):
+        """Test loading a member that is not encrypted with WinZip AES.
+
+        """
+
+        with zipfile.ZipFile(self.zip_file_path, "w") as zip_file:
+            zip_file.writestr("aes.txt", self.data)
+
+        with pytest.raises(ValueError):
+            load_entry(self.zip_file_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for the streaming wordlist reader.
+
+"""
+
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from wordlist import (WordlistReader, get_wordlist_size, is_compressed_wordlist,
+                      read_wordlist_range)
+
+
+class TestWordlistReader(unittest.TestCase):
+    """Wordlist reader tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.wordlist_path = os.path.join(self.directory.name, "wordlist.txt")
+        self.passwords = [("p@$$w0rd{0}".format(i)).encode() for i in range(1000)]
+        self.data = b"\n".join(self.passwords) + b"\n"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, **kwargs):
+        """Reads the wordlist and returns the batches.
+
+        """
+
+        with WordlistReader(self.wordlist_path, **kwargs) as wordlist_reader:
+            return list(wordlist_reader)
+
+    def test_invalid_wordlist(self):
+        """Test reading a wordlist that does not exist.
+
+        """
+
+        with pytest.raises(IOError):
+            WordlistReader(self.wordlist_path)
+
+    def test_batches(self):
+        """Test reading fixed-size batches with chunks splitting lines.
+
+        """
+
+        with open(self.wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(self.data)
+
+        batches = self.read(batch_size=300, chunk_size=7)
+
+        assert [len(batch) for batch in batches] == [300, 300, 300, 100]
+        assert sum(batches, []) == self.passwords
+
+    def test_windows_newlines_and_empty_lines(self):
+        """Test carriage returns and empty lines are removed.
+
+        """
+
+        with open(self.wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(b"a\r\n\r\n\nbb\r\nccc")
+
+        assert self.read(chunk_size=2) == [[b"a", b"bb", b"ccc"]]
+
+    def test_compressed(self):
+        """Test reading gzip and xz compressed wordlists.
+
+        """
+
+        for open_compressed in (gzip.open, lzma.open):
+            with open_compressed(self.wordlist_path, "wb") as wordlist_file:
+                wordlist_file.write(self.data)
+
+            assert sum(self.read(batch_size=128), []) == self.passwords
+
+    def test_resume_from_offset(self):
+        """Test resuming from the offset reported after a batch.
+
+        """
+
+        with open(self.wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(self.data)
+
+        with WordlistReader(self.wordlist_path, batch_size=100) as wordlist_reader:
+            next(iter(wordlist_reader))
+            offset = wordlist_reader.offset
+
+        assert offset == len(b"\n".join(self.passwords[:100])) + 1
+        assert sum(self.read(start_offset=offset), []) == self.passwords[100:]
+
+    def test_ranges(self):
+        """Test reading a wordlist split into byte ranges at arbitrary offsets.
+
+        """
+
+        with open(self.wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(self.data)
+
+        size = get_wordlist_size(self.wordlist_path)
+        passwords = []
+
+        assert size == len(self.data)
+
+        for start in range(0, size, 997):
+            for batch in read_wordlist_range(self.wordlist_path, start, min(start + 997, size),
+                                             batch_size=64):
+                passwords.extend(batch)
+
+        assert passwords == self.passwords
+
+    def test_ranges_compressed(self):
+        """Test compressed wordlists cannot be read by byte range.
+
+        """
+
+        with gzip.open(self.wordlist_path, "wb") as wordlist_file:
+            wordlist_file.write(self.data)
+
+        assert is_compressed_wordlist(self.wordlist_path)
+
+        with pytest.raises(ValueError):
+            list(read_wordlist_range(self.wordlist_path, 0, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
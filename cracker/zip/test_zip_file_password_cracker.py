@@ -0,0 +1,213 @@
+"""Tests for the cracking entry points of the script.
+
+"""
+
+import csv
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import unittest
+
+from checkpoint import Checkpoint
+from distributed import run_worker
+from fixtures import write_mixed_zip, write_zipcrypto_zip
+from keyspace import Keyspace
+from mask import Mask
+
+# The script name is not a valid module name
+cracker = importlib.import_module("zip-file-password-cracker")
+
+
+class TestZipFilePasswordCracker(unittest.TestCase):
+    """Cracking entry points tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_directory = os.path.join(self.directory.name, "cracked")
+        os.makedirs(self.output_directory)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_zip(self, name, password):
+        """Writes a ZipCrypto archive with a single member
+
+        """
+
+        zip_file_path = os.path.join(self.directory.name, name)
+        write_zipcrypto_zip(zip_file_path, [("raw.txt", b"Hello World!")], password)
+
+        return zip_file_path
+
+    def test_non_utf8_password(self):
+        """Test extracting with a password that is not valid UTF-8 (e.g. cp1252 mask).
+
+        """
+
+        zip_file_path = self.write_zip("raw.zip", b"ab\xe9")
+
+        assert cracker.try_crack_zip_file_password(zip_file_path, self.output_directory,
+                                                   b"ab\xe9")
+
+        with open(os.path.join(self.output_directory, "raw.txt"), "rb") as raw_file:
+            assert raw_file.read() == b"Hello World!"
+
+        with open(os.path.join(self.output_directory, "password.txt"), "rb") as password_file:
+            assert password_file.read() == b"ab\xe9\n"
+
+        assert cracker.format_password(b"ab\xe9") == "ab\\xe9"
+
+    def test_whitespace_password(self):
+        """Test extracting with a password made of whitespace only.
+
+        """
+
+        zip_file_path = self.write_zip("raw.zip", b"   ")
+
+        assert cracker.try_crack_zip_file_password(zip_file_path, self.output_directory, b"   ")
+
+        with open(os.path.join(self.output_directory, "password.txt"), "rb") as password_file:
+            assert password_file.read() == b"   \n"
+
+    def test_crack_zip_file_non_utf8_password(self):
+        """Test cracking an archive with a password that is not valid UTF-8.
+
+        """
+
+        zip_file_path = self.write_zip("raw.zip", b"z\xe7")
+
+        assert cracker.crack_zip_file(zip_file_path, self.output_directory,
+                                      mask=Mask("?1?1", {"1": "z\xe0\xe7\xe9"}, encoding="cp1252"))
+
+        with open(os.path.join(self.output_directory, "password.txt"), "rb") as password_file:
+            assert password_file.read() == b"z\xe7\n"
+
+    def test_crack_zip_files_non_utf8_password(self):
+        """Test the results of several archives with passwords that are not valid UTF-8.
+
+        """
+
+        manifest_path = os.path.join(self.directory.name, "manifest.txt")
+
+        with open(manifest_path, "w") as manifest_file:
+            manifest_file.write(self.write_zip("a.zip", b"\xe9\xe0") + "\n")
+            manifest_file.write(self.write_zip("b.zip", b"z\xe7") + "\n")
+
+        passwords = cracker.crack_zip_files(manifest_path, self.output_directory,
+                                            mask=Mask("?1?1", {"1": "z\xe0\xe7\xe9"},
+                                                      encoding="cp1252"))
+
+        assert list(passwords.values()) == [b"\xe9\xe0", b"z\xe7"]
+
+        with open(os.path.join(self.output_directory, "results.csv"), newline="") as results_file:
+            rows = list(csv.DictReader(results_file))
+
+        assert [row["password_hex"] for row in rows] == ["e9e0", "7ae7"]
+        assert [row["password"] for row in rows] == ["\\xe9\\xe0", "z\\xe7"]
+
+    def test_crack_zip_files_resumed_keyspace_size(self):
+        """Test the keyspace size of the stats excludes the ranges completed by a previous run.
+
+        """
+
+        keyspace = Keyspace.brute_force(2)
+        manifest_path = os.path.join(self.directory.name, "manifest.txt")
+        checkpoint_path = os.path.join(self.directory.name, "checkpoint.json")
+        stats_path = os.path.join(self.directory.name, "stats.jsonl")
+
+        with open(manifest_path, "w") as manifest_file:
+            manifest_file.write(self.write_zip("a.zip", b"~~") + "\n")
+
+        checkpoint = Checkpoint(checkpoint_path)
+        checkpoint.mark_completed(os.path.join(self.directory.name, "a.zip"),
+                                  "keyspace:" + keyspace.fingerprint, 0, 4000)
+        checkpoint.save()
+
+        passwords = cracker.crack_zip_files(manifest_path, self.output_directory,
+                                            keyspace=keyspace, chunk_size=1000,
+                                            checkpoint_path=checkpoint_path, resume=True,
+                                            stats_path=stats_path)
+
+        assert list(passwords.values()) == [b"~~"]
+
+        with open(stats_path) as stats_file:
+            stats = [json.loads(line) for line in stats_file]
+
+        assert stats[-1]["keyspace"]["size"] == keyspace.size - 4000
+
+    def test_crack_zip_files_resumed_solved_archive(self):
+        """Test archives solved by a previous run are reported but not extracted again.
+
+        """
+
+        manifest_path = os.path.join(self.directory.name, "manifest.txt")
+        checkpoint_path = os.path.join(self.directory.name, "checkpoint.json")
+
+        with open(manifest_path, "w") as manifest_file:
+            manifest_file.write(self.write_zip("a.zip", b"~~") + "\n")
+            manifest_file.write(self.write_zip("b.zip", b"z~") + "\n")
+
+        checkpoint = Checkpoint(checkpoint_path)
+        checkpoint.set_password(os.path.join(self.directory.name, "a.zip"), b"~~")
+        checkpoint.save()
+
+        passwords = cracker.crack_zip_files(manifest_path, self.output_directory,
+                                            keyspace=Keyspace.brute_force(2),
+                                            checkpoint_path=checkpoint_path, resume=True)
+
+        assert list(passwords.values()) == [b"~~", b"z~"]
+        assert not os.path.exists(os.path.join(self.output_directory, "a"))
+        assert os.path.isfile(os.path.join(self.output_directory, "b", "raw.txt"))
+
+        with open(os.path.join(self.output_directory, "results.csv"), newline="") as results_file:
+            rows = list(csv.DictReader(results_file))
+
+        assert [row["status"] for row in rows] == ["CRACKED", "CRACKED"]
+
+    def test_crack_zip_file_with_workers(self):
+        """Test cracking with a coordinator and worker processes on localhost, end to end.
+
+        """
+
+        # The password found by a worker extracts the members of both encryption methods
+        zip_file_path = os.path.join(self.directory.name, "raw.zip")
+        write_mixed_zip(zip_file_path, [("raw.txt", b"Hello World!")],
+                        [("aes.txt", b"Hello AES!")], b"z~")
+
+        # Free port the workers connect to once the coordinator listens
+        with socket.socket() as free_socket:
+            free_socket.bind(("127.0.0.1", 0))
+            port = free_socket.getsockname()[1]
+
+        workers = [multiprocessing.Process(target=run_worker,
+                                           args=(zip_file_path, "127.0.0.1", port))
+                   for _ in range(2)]
+
+        for worker in workers:
+            worker.start()
+
+        try:
+            assert cracker.crack_zip_file_with_workers(zip_file_path, self.output_directory,
+                                                       keyspace=Keyspace.brute_force(2),
+                                                       port=port)
+        finally:
+            for worker in workers:
+                worker.join(30)
+
+        assert all(worker.exitcode == 0 for worker in workers)
+
+        with open(os.path.join(self.output_directory, "password.txt"), "rb") as password_file:
+            assert password_file.read() == b"z~\n"
+
+        for name, data in (("raw.txt", b"Hello World!"), ("aes.txt", b"Hello AES!")):
+            with open(os.path.join(self.output_directory, name), "rb") as member_file:
+                assert member_file.read() == data
+
+
+if __name__ == '__main__':
+    unittest.main()
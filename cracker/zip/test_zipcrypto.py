@@ -0,0 +1,115 @@
+"""Tests for the ZipCrypto password verification engine.
+
+"""
+
+import os
+import tempfile
+import unittest
+import zipfile
+
+import pytest
+
+from fixtures import write_zipcrypto_zip
+from zipcrypto import ZipCryptoCipher, ZipCryptoEntry, check_password, create_decompressor
+
+
+def load_entry(zip_file_path):
+    """Loads the first member of a ZIP file.
+
+    """
+
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        return ZipCryptoEntry.from_zip_info(zip_file.fp, zip_file.infolist()[0])
+
+
+class TestZipCrypto(unittest.TestCase):
+    """ZipCrypto verification engine tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.directory.name, "raw.zip")
+        self.data = b"Hello World!" * 100
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cipher_round_trip(self):
+        """Test encrypting and decrypting data with the same password.
+
+        """
+
+        encrypted = ZipCryptoCipher(b"p@$$w0rd").encrypt(self.data)
+
+        assert encrypted != self.data
+        assert ZipCryptoCipher(b"p@$$w0rd").decrypt(encrypted) == self.data
+
+    def test_verify_deflated(self):
+        """Test verifying passwords against a deflated member.
+
+        """
+
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", self.data)], b"a1!")
+
+        entry = load_entry(self.zip_file_path)
+
+        assert entry.verify(b"a1!")
+        assert not entry.verify(b"a1?")
+
+        # The password decrypts the file with the standard library as well
+        with zipfile.ZipFile(self.zip_file_path) as zip_file:
+            assert zip_file.read("raw.txt", pwd=b"a1!") == self.data
+
+    def test_verify_stored(self):
+        """Test verifying passwords against a stored member.
+
+        """
+
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", self.data)], b"a1!",
+                            zipfile.ZIP_STORED)
+
+        entry = load_entry(self.zip_file_path)
+
+        assert entry.verify(b"a1!")
+        assert not entry.verify(b"")
+
+    def test_check_byte_false_positives_are_rejected(self):
+        """Test passwords passing the check byte are rejected by the full confirmation.
+
+        """
+
+        write_zipcrypto_zip(self.zip_file_path, [("raw.txt", self.data)], b"a1!")
+
+        entry = load_entry(self.zip_file_path)
+        survivors = [password for password in (str(i).encode() for i in range(5000))
+                     if check_password(password, entry.encryption_header, entry.check_byte)]
+
+        # ~1/256 of the wrong passwords survive the check byte
+        assert 0 < len(survivors) < 100
+        assert not any(entry.confirm(password) for password in survivors)
+
+    def test_not_encrypted(self):
+        """Test loading a member that is not encrypted.
+
+        """
+
+        with zipfile.ZipFile(self.zip_file_path, "w") as zip_file:
+            zip_file.writestr("raw.txt", self.data)
+
+        with pytest.raises(ValueError):
+            load_entry(self.zip_file_path)
+
+    def test_unsupported_compression_method(self):
+        """Test creating a decompressor for a compression method that is not supported.
+
+        """
+
+        assert create_decompressor(zipfile.ZIP_STORED) is None
+
+        with pytest.raises(ValueError):
+            create_decompressor(zipfile.ZIP_LZMA)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,435 @@
+"""
+WinZip AES (AE-1/AE-2) password verification engine.
+
+Members encrypted with WinZip AES use the compression method 99 and carry an extra field (0x9901)
+    with the AES key strength (128, 192 or 256 bits) and the actual compression method. Their data
+    starts with a salt and a 2-byte password verification value, and ends with a 10-byte
+    authentication code:
+    - PBKDF2-HMAC-SHA1 (1000 iterations) derives the AES key, the HMAC key and the password
+        verification value from the password and the salt. The derivation is ~2000 SHA-1
+        compressions, so it dominates the cost of every password (~1000 times ZipCrypto).
+    - The password verification value rejects ~65535/65536 wrong passwords.
+    - The authentication code is an HMAC-SHA1 over the encrypted data, which rejects the remaining
+        false positives without decrypting anything (AE-2 members do not even store the CRC-32).
+
+Decrypting (AES-CTR) is only needed to extract the members once the password is found. The AES
+    block cipher is implemented here (encryption only, which is all the CTR mode uses), so no
+    cryptography library is required.
+
+References:
+    - WinZip AES Encryption Information (https://www.winzip.com/en/support/aes-encryption/)
+    - FIPS 197, Advanced Encryption Standard (AES)
+
+"""
+
+import hashlib
+import hmac
+import struct
+import zlib
+
+from zipcrypto import FLAG_ENCRYPTED, create_decompressor, read_local_file_header
+
+
+# Compression method of the members encrypted with WinZip AES
+COMPRESS_TYPE_AES = 99
+
+# Extra field holding the WinZip AES parameters of a member
+EXTRA_FIELD_ID = 0x9901
+_EXTRA_FIELD_HEADER_STRUCT = struct.Struct("<2H")
+_EXTRA_FIELD_STRUCT = struct.Struct("<H2sBH")
+_VENDOR_ID = b"AE"
+
+# Vendor versions: AE-1 stores the CRC-32 of the member, AE-2 does not (it is 0)
+VENDOR_VERSION_AE1 = 1
+VENDOR_VERSION_AE2 = 2
+
+# AES key length (bytes), by key strength (the salt is half as long)
+KEY_LENGTHS = {1: 16, 2: 24, 3: 32}
+
+PBKDF2_ITERATIONS = 1000
+PASSWORD_VERIFIER_LENGTH = 2
+AUTHENTICATION_CODE_LENGTH = 10
+
+_BLOCK_SIZE = 16
+
+# Number of blocks of key stream generated at a time while decrypting
+_KEY_STREAM_BLOCKS = 256
+
+
+def _create_tables():
+    """Creates the AES S-box and the lookup tables combining SubBytes, ShiftRows and MixColumns
+
+    Returns:
+        tuple: The S-box and the four 256-entry round tables.
+    """
+    sbox = [0] * 256
+    p = q = 1
+
+    # Walks the multiplicative group of GF(2^8) with the generator 3 (p) and its inverse (q)
+    while True:
+        p = p ^ ((p << 1) & 0xFF) ^ (0x1B if p & 0x80 else 0)
+
+        q = q ^ (q << 1)
+        q = q ^ (q << 2)
+        q = q ^ (q << 4)
+        q = q & 0xFF
+
+        if q & 0x80:
+            q = q ^ 0x09
+
+        x = q ^ ((q << 1) | (q >> 7)) ^ ((q << 2) | (q >> 6)) ^ ((q << 3) | (q >> 5)) \
+            ^ ((q << 4) | (q >> 4))
+        sbox[p] = (x ^ 0x63) & 0xFF
+
+        if p == 1:
+            break
+
+    sbox[0] = 0x63
+
+    table0 = []
+
+    for s in sbox:
+        s2 = ((s << 1) ^ (0x1B if s & 0x80 else 0)) & 0xFF
+        table0.append((s2 << 24) | (s << 16) | (s << 8) | (s2 ^ s))
+
+    table1 = [((t >> 8) | (t << 24)) & 0xFFFFFFFF for t in table0]
+    table2 = [((t >> 16) | (t << 16)) & 0xFFFFFFFF for t in table0]
+    table3 = [((t >> 24) | (t << 8)) & 0xFFFFFFFF for t in table0]
+
+    return tuple(sbox), tuple(table0), tuple(table1), tuple(table2), tuple(table3)
+
+
+SBOX, _TABLE0, _TABLE1, _TABLE2, _TABLE3 = _create_tables()
+
+
+def expand_key(key):
+    """Runs the AES key expansion
+
+    Args:
+        key (bytes): The 16, 24 or 32-byte AES key.
+
+    Returns:
+        tuple: The round keys (32-bit words, four per round).
+    """
+    if len(key) not in KEY_LENGTHS.values():
+        raise ValueError("AES key must be 16, 24 or 32 bytes long.")
+
+    sbox = SBOX
+    key_words = len(key) // 4
+    rounds = key_words + 6
+    words = list(struct.unpack(">{0}L".format(key_words), key))
+    rcon = 1
+
+    for i in range(key_words, 4 * (rounds + 1)):
+        t = words[i - 1]
+
+        if i % key_words == 0:
+            t = ((sbox[(t >> 16) & 0xFF] << 24) | (sbox[(t >> 8) & 0xFF] << 16)
+                 | (sbox[t & 0xFF] << 8) | sbox[t >> 24]) ^ (rcon << 24)
+            rcon = ((rcon << 1) ^ (0x1B if rcon & 0x80 else 0)) & 0xFF
+        elif key_words > 6 and i % key_words == 4:
+            t = ((sbox[t >> 24] << 24) | (sbox[(t >> 16) & 0xFF] << 16)
+                 | (sbox[(t >> 8) & 0xFF] << 8) | sbox[t & 0xFF])
+
+        words.append(words[i - key_words] ^ t)
+
+    return tuple(words)
+
+
+def encrypt_block(round_keys, block):
+    """Encrypts a 16-byte block with AES
+
+    Args:
+        round_keys (tuple): The round keys (see expand_key).
+        block (bytes): The plain block.
+
+    Returns:
+        bytes: The encrypted block.
+    """
+    sbox, t0, t1, t2, t3 = SBOX, _TABLE0, _TABLE1, _TABLE2, _TABLE3
+    s0, s1, s2, s3 = struct.unpack(">4L", block)
+    s0 = s0 ^ round_keys[0]
+    s1 = s1 ^ round_keys[1]
+    s2 = s2 ^ round_keys[2]
+    s3 = s3 ^ round_keys[3]
+    rounds = len(round_keys) // 4 - 1
+
+    for r in range(4, 4 * rounds, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[(s1 >> 16) & 0xFF] ^ t2[(s2 >> 8) & 0xFF] ^ t3[s3 & 0xFF]
+            ^ round_keys[r],
+            t0[s1 >> 24] ^ t1[(s2 >> 16) & 0xFF] ^ t2[(s3 >> 8) & 0xFF] ^ t3[s0 & 0xFF]
+            ^ round_keys[r + 1],
+            t0[s2 >> 24] ^ t1[(s3 >> 16) & 0xFF] ^ t2[(s0 >> 8) & 0xFF] ^ t3[s1 & 0xFF]
+            ^ round_keys[r + 2],
+            t0[s3 >> 24] ^ t1[(s0 >> 16) & 0xFF] ^ t2[(s1 >> 8) & 0xFF] ^ t3[s2 & 0xFF]
+            ^ round_keys[r + 3])
+
+    r = 4 * rounds
+
+    return struct.pack(
+        ">4L",
+        ((sbox[s0 >> 24] << 24) | (sbox[(s1 >> 16) & 0xFF] << 16)
+         | (sbox[(s2 >> 8) & 0xFF] << 8) | sbox[s3 & 0xFF]) ^ round_keys[r],
+        ((sbox[s1 >> 24] << 24) | (sbox[(s2 >> 16) & 0xFF] << 16)
+         | (sbox[(s3 >> 8) & 0xFF] << 8) | sbox[s0 & 0xFF]) ^ round_keys[r + 1],
+        ((sbox[s2 >> 24] << 24) | (sbox[(s3 >> 16) & 0xFF] << 16)
+         | (sbox[(s0 >> 8) & 0xFF] << 8) | sbox[s1 & 0xFF]) ^ round_keys[r + 2],
+        ((sbox[s3 >> 24] << 24) | (sbox[(s0 >> 16) & 0xFF] << 16)
+         | (sbox[(s1 >> 8) & 0xFF] << 8) | sbox[s2 & 0xFF]) ^ round_keys[r + 3])
+
+
+def derive_keys(password, salt, key_length):
+    """Derives the WinZip AES keys from a password (PBKDF2-HMAC-SHA1)
+
+    Args:
+        password (bytes): The candidate password.
+        salt (bytes): The salt of the member.
+        key_length (int): The AES key length (see KEY_LENGTHS).
+
+    Returns:
+        tuple: The (AES key, HMAC key, password verification value).
+    """
+    derived = hashlib.pbkdf2_hmac("sha1", password, salt, PBKDF2_ITERATIONS,
+                                  2 * key_length + PASSWORD_VERIFIER_LENGTH)
+
+    return derived[:key_length], derived[key_length:2 * key_length], derived[2 * key_length:]
+
+
+def parse_extra_field(extra):
+    """Finds the WinZip AES parameters in the extra field of a member
+
+    Args:
+        extra (bytes): The extra field (e.g. zipfile.ZipInfo.extra).
+
+    Returns:
+        tuple: The (vendor version, key strength, actual compression method), or None if the
+            extra field has no WinZip AES record.
+    """
+    offset = 0
+
+    while offset + _EXTRA_FIELD_HEADER_STRUCT.size <= len(extra):
+        field_id, size = _EXTRA_FIELD_HEADER_STRUCT.unpack_from(extra, offset)
+        offset = offset + _EXTRA_FIELD_HEADER_STRUCT.size
+
+        if field_id == EXTRA_FIELD_ID and size >= _EXTRA_FIELD_STRUCT.size:
+            vendor_version, vendor_id, strength, compress_type = _EXTRA_FIELD_STRUCT.unpack_from(
+                extra, offset)
+
+            if vendor_id != _VENDOR_ID or strength not in KEY_LENGTHS:
+                raise ValueError("WinZip AES extra field is not supported (vendor '{0}', "
+                                 "strength {1}).".format(vendor_id, strength))
+
+            return vendor_version, strength, compress_type
+
+        offset = offset + size
+
+    return None
+
+
+def is_aes_encrypted(zip_info):
+    """Returns whether a member is encrypted with WinZip AES
+
+    Args:
+        zip_info (zipfile.ZipInfo): The member entry from the central directory.
+
+    Returns:
+        bool: True if the member is encrypted with WinZip AES. Otherwise, False.
+    """
+    return bool(zip_info.flag_bits & FLAG_ENCRYPTED) and zip_info.compress_type == COMPRESS_TYPE_AES
+
+
+class WinZipAesCipher:
+    """Stateful AES-CTR stream cipher, as used by WinZip (little-endian counter starting at 1)
+
+    Encryption and decryption are the same operation.
+
+    Args:
+        key (bytes): The AES key (see derive_keys).
+    """
+
+    def __init__(self, key):
+        self.round_keys = expand_key(key)
+        self.counter = 0
+        self.key_stream = b""
+
+    def decrypt(self, data):
+        """Decrypts a block of data, advancing the counter
+
+        Args:
+            data (bytes): The encrypted data.
+
+        Returns:
+            bytes: The decrypted data.
+        """
+        length = len(data)
+        key_stream = [self.key_stream]
+        available = len(self.key_stream)
+
+        while available < length:
+            blocks = max(_KEY_STREAM_BLOCKS, (length - available + _BLOCK_SIZE - 1) // _BLOCK_SIZE)
+
+            for counter in range(self.counter + 1, self.counter + blocks + 1):
+                key_stream.append(encrypt_block(self.round_keys,
+                                                counter.to_bytes(_BLOCK_SIZE, "little")))
+
+            self.counter = self.counter + blocks
+            available = available + blocks * _BLOCK_SIZE
+
+        key_stream = b"".join(key_stream)
+        self.key_stream = key_stream[length:]
+
+        return (int.from_bytes(data, "big") ^ int.from_bytes(key_stream[:length], "big")).to_bytes(
+            length, "big")
+
+    encrypt = decrypt
+
+
+class WinZipAesEntry:
+    """WinZip AES encrypted member loaded in memory
+
+    Args:
+        name (string): The member name inside the archive.
+        vendor_version (int): The WinZip AES vendor version (AE-1 or AE-2).
+        strength (int): The AES key strength (see KEY_LENGTHS).
+        compress_type (int): The actual compression method of the member.
+        crc (int): The CRC-32 of the uncompressed member (0 for AE-2).
+        file_size (int): The uncompressed size of the member.
+        salt (bytes): The salt of the key derivation.
+        password_verifier (bytes): The 2-byte password verification value.
+        authentication_code (bytes): The 10-byte HMAC-SHA1 of the encrypted data.
+        data (bytes): The encrypted member data (between the password verification value and the
+            authentication code).
+    """
+
+    def __init__(self, name, vendor_version, strength, compress_type, crc, file_size, salt,
+                 password_verifier, authentication_code, data):
+        self.name = name
+        self.vendor_version = vendor_version
+        self.strength = strength
+        self.key_length = KEY_LENGTHS[strength]
+        self.compress_type = compress_type
+        self.crc = crc
+        self.file_size = file_size
+        self.salt = salt
+        self.password_verifier = password_verifier
+        self.authentication_code = authentication_code
+        self.data = data
+
+    @classmethod
+    def from_zip_info(cls, file, zip_info):
+        """Reads the salt, password verification value, data and authentication code of a member
+
+        Args:
+            file (file): The archive opened in binary mode.
+            zip_info (zipfile.ZipInfo): The member entry from the central directory.
+
+        Returns:
+            WinZipAesEntry: The member loaded in memory.
+        """
+        if not is_aes_encrypted(zip_info):
+            raise ValueError("Member '{0}' is not encrypted with WinZip AES."
+                             .format(zip_info.filename))
+
+        parameters = parse_extra_field(zip_info.extra)
+
+        if parameters is None:
+            raise ValueError("Member '{0}' has no WinZip AES extra field."
+                             .format(zip_info.filename))
+
+        vendor_version, strength, compress_type = parameters
+        salt_length = KEY_LENGTHS[strength] // 2
+
+        read_local_file_header(file, zip_info)
+        data = file.read(zip_info.compress_size)
+
+        if len(data) != zip_info.compress_size or len(data) < (
+                salt_length + PASSWORD_VERIFIER_LENGTH + AUTHENTICATION_CODE_LENGTH):
+            raise ValueError("Truncated data for member '{0}'.".format(zip_info.filename))
+
+        verifier_end = salt_length + PASSWORD_VERIFIER_LENGTH
+
+        return cls(zip_info.filename, vendor_version, strength, compress_type, zip_info.CRC,
+                   zip_info.file_size, data[:salt_length], data[salt_length:verifier_end],
+                   data[-AUTHENTICATION_CODE_LENGTH:],
+                   data[verifier_end:-AUTHENTICATION_CODE_LENGTH])
+
+    def check(self, password):
+        """Fast-reject check of a candidate password against the password verification value
+
+        Args:
+            password (bytes): The candidate password.
+
+        Returns:
+            tuple: The (AES key, HMAC key) if the password verification value matches. Otherwise,
+                None.
+        """
+        aes_key, hmac_key, password_verifier = derive_keys(password, self.salt, self.key_length)
+
+        if password_verifier != self.password_verifier:
+            return None
+
+        return aes_key, hmac_key
+
+    def confirm(self, password, keys=None):
+        """Compares the HMAC-SHA1 of the encrypted data with the authentication code
+
+        Args:
+            password (bytes): The candidate password.
+            keys (tuple): Optional keys returned by check() to skip the key derivation.
+
+        Returns:
+            bool: True if the authentication code matches. Otherwise, False.
+        """
+        if keys is None:
+            keys = self.check(password)
+
+            if keys is None:
+                return False
+
+        authentication_code = hmac.new(keys[1], self.data, hashlib.sha1).digest()
+
+        return hmac.compare_digest(authentication_code[:AUTHENTICATION_CODE_LENGTH],
+                                   self.authentication_code)
+
+    def verify(self, password):
+        """Verifies a candidate password (fast-reject check followed by confirmation)
+
+        Args:
+            password (bytes): The candidate password.
+
+        Returns:
+            bool: True if the password decrypts the member. Otherwise, False.
+        """
+        keys = self.check(password)
+
+        if keys is None:
+            return False
+
+        return self.confirm(password, keys)
+
+    def decrypt(self, password):
+        """Decrypts and decompresses the member
+
+        Args:
+            password (bytes): The password of the member.
+
+        Returns:
+            bytes: The uncompressed member.
+        """
+        keys = self.check(password)
+
+        if keys is None or not self.confirm(password, keys):
+            raise ValueError("Bad password for member '{0}'.".format(self.name))
+
+        data = WinZipAesCipher(keys[0]).decrypt(self.data)
+        decompressor = create_decompressor(self.compress_type)
+
+        if decompressor:
+            data = decompressor.decompress(data)
+
+        # Only AE-1 members store the CRC-32 (the authentication code protects AE-2 members)
+        if self.vendor_version == VENDOR_VERSION_AE1 and zlib.crc32(data) != self.crc:
+            raise ValueError("Bad CRC-32 for member '{0}'.".format(self.name))
+
+        return data
@@ -0,0 +1,280 @@
+"""
+Streaming reader for arbitrarily large external wordlists.
+
+Wordlists (e.g. tens of GB of leaked passwords) are read in byte chunks and split on newlines
+    without decoding each line, and the passwords are returned in fixed-size batches. Only one
+    chunk and one batch are held in memory at a time, whatever the size of the wordlist.
+
+Wordlists compressed with gzip or xz are detected by their magic bytes and decompressed on the fly.
+    Byte ranges (see read_wordlist_range) can only be read from uncompressed wordlists, as seeking
+    into a compressed wordlist decompresses it from the start for every range.
+
+Progress is reported by byte offset:
+    - offset: position (uncompressed) right after the last password returned, which can be used to
+        resume reading the wordlist later.
+    - progress(): fraction of the file on disk (compressed) read so far.
+
+"""
+
+import gzip
+import lzma
+import os
+
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+# Default number of bytes read from the wordlist at a time
+DEFAULT_CHUNK_SIZE = 1048576
+
+# Default number of passwords per batch
+DEFAULT_BATCH_SIZE = 4096
+
+
+def open_wordlist(wordlist_path):
+    """Opens a wordlist in binary mode, decompressing it on the fly if needed
+
+    Args:
+        wordlist_path (string): The wordlist file path (e.g. c:\\temp\\rockyou.txt.gz).
+
+    Returns:
+        tuple: The (file, raw_file) file objects, where file returns the uncompressed bytes and
+            raw_file is the file on disk.
+    """
+    raw_file = open(wordlist_path, "rb")
+
+    try:
+        magic = raw_file.read(len(_XZ_MAGIC))
+        raw_file.seek(0)
+
+        if magic.startswith(_GZIP_MAGIC):
+            return gzip.GzipFile(fileobj=raw_file, mode="rb"), raw_file
+
+        if magic.startswith(_XZ_MAGIC):
+            return lzma.LZMAFile(raw_file, mode="rb"), raw_file
+
+        return raw_file, raw_file
+    except Exception:
+        raw_file.close()
+        raise
+
+
+def is_compressed_wordlist(wordlist_path):
+    """Returns whether a wordlist is compressed (gzip or xz)
+
+    Args:
+        wordlist_path (string): The wordlist file path (e.g. c:\\temp\\rockyou.txt.gz).
+
+    Returns:
+        bool: True if the wordlist is compressed. Otherwise, False.
+    """
+    with open(wordlist_path, "rb") as raw_file:
+        magic = raw_file.read(len(_XZ_MAGIC))
+
+    return magic.startswith(_GZIP_MAGIC) or magic.startswith(_XZ_MAGIC)
+
+
+class WordlistReader:
+    """Reads a wordlist in fixed-size batches of passwords with bounded memory
+
+    Args:
+        wordlist_path (string): The wordlist file path (e.g. c:\\temp\\rockyou.txt).
+        batch_size (int): The number of passwords per batch.
+        chunk_size (int): The number of bytes read at a time.
+        start_offset (int): The (uncompressed) byte offset to start reading from, which must be the
+            beginning of a line (e.g. the offset of a previous run).
+    """
+
+    def __init__(self, wordlist_path, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+                 start_offset=0):
+        if batch_size < 1:
+            raise ValueError("Batch size must to be greater than 0.")
+
+        if chunk_size < 1:
+            raise ValueError("Chunk size must to be greater than 0.")
+
+        if not os.path.isfile(wordlist_path):
+            raise IOError("Wordlist '{0}' was not found.".format(wordlist_path))
+
+        self.wordlist_path = wordlist_path
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.size = os.path.getsize(wordlist_path)
+        self.offset = start_offset
+
+        self._file, self._raw_file = open_wordlist(wordlist_path)
+
+        if start_offset:
+            # Compressed files are decompressed up to the offset
+            self._file.seek(start_offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the wordlist
+
+        """
+        self._file.close()
+        self._raw_file.close()
+
+    def progress(self):
+        """Returns the fraction of the wordlist (on disk) read so far
+
+        Returns:
+            float: The fraction between 0 and 1.
+        """
+        if not self.size or self._raw_file.closed:
+            return 1.0
+
+        return min(self._raw_file.tell() / self.size, 1.0)
+
+    def __iter__(self):
+        """Reads the wordlist
+
+        Yields:
+            list: The batches of passwords (bytes). The offset attribute is the position right
+                after the last password of the batch when the batch is yielded.
+        """
+        batch = []
+        batch_size = self.batch_size
+        offset = self.offset
+        remainder = b""
+
+        while True:
+            chunk = self._file.read(self.chunk_size)
+
+            if not chunk:
+                break
+
+            data = remainder + chunk
+            has_carriage_returns = b"\r" in data
+            lines = data.split(b"\n")
+
+            # The last line may continue in the next chunk
+            remainder = lines.pop()
+
+            i = 0
+
+            while i < len(lines):
+                lines_slice = lines[i:i + batch_size - len(batch)]
+                i = i + len(lines_slice)
+                offset = offset + sum(map(len, lines_slice)) + len(lines_slice)
+
+                if has_carriage_returns:
+                    lines_slice = [l[:-1] if l.endswith(b"\r") else l for l in lines_slice]
+
+                batch.extend(filter(None, lines_slice))
+
+                if len(batch) >= batch_size:
+                    self.offset = offset
+                    yield batch
+                    batch = []
+
+        # Last line without a trailing newline
+        offset = offset + len(remainder)
+
+        if remainder.endswith(b"\r"):
+            remainder = remainder[:-1]
+
+        if remainder:
+            batch.append(remainder)
+
+        self.offset = offset
+
+        if batch:
+            yield batch
+
+
+def get_wordlist_size(wordlist_path):
+    """Returns the uncompressed size of a wordlist
+
+    Compressed wordlists are decompressed (without being kept in memory) to get their size.
+
+    Args:
+        wordlist_path (string): The wordlist file path (e.g. c:\\temp\\rockyou.txt.gz).
+
+    Returns:
+        int: The number of (uncompressed) bytes.
+    """
+    file, raw_file = open_wordlist(wordlist_path)
+
+    try:
+        if file is raw_file:
+            return os.path.getsize(wordlist_path)
+
+        size = 0
+
+        while True:
+            chunk = file.read(DEFAULT_CHUNK_SIZE)
+
+            if not chunk:
+                return size
+
+            size = size + len(chunk)
+    finally:
+        file.close()
+        raw_file.close()
+
+
+def read_wordlist_range(wordlist_path, start_offset, end_offset, batch_size=DEFAULT_BATCH_SIZE):
+    """Reads the passwords of a byte range of a wordlist
+
+    A password belongs to the range where its first byte is, so ranges split at any offset (e.g.
+        leased to several nodes) cover every password of the wordlist exactly once.
+
+    Only uncompressed wordlists can be read by range (see is_compressed_wordlist).
+
+    Args:
+        wordlist_path (string): The wordlist file path (e.g. c:\\temp\\rockyou.txt).
+        start_offset (int): The first byte offset of the range (inclusive).
+        end_offset (int): The last byte offset of the range (exclusive).
+        batch_size (int): The number of passwords per batch.
+
+    Yields:
+        list: The batches of passwords (bytes).
+    """
+    if is_compressed_wordlist(wordlist_path):
+        raise ValueError("Wordlist '{0}' is compressed, decompress it to read it by byte range."
+                         .format(wordlist_path))
+
+    file, raw_file = open_wordlist(wordlist_path)
+
+    try:
+        offset = 0
+
+        if start_offset > 0:
+            # Skips the end of the password started before the range
+            file.seek(start_offset - 1)
+            offset = start_offset - 1 + len(file.readline())
+
+        batch = []
+
+        while offset < end_offset:
+            line = file.readline()
+
+            if not line:
+                break
+
+            offset = offset + len(line)
+            if line.endswith(b"\n"):
+                line = line[:-1]
+
+            if line.endswith(b"\r"):
+                line = line[:-1]
+
+            if line:
+                batch.append(line)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        file.close()
+        raw_file.close()
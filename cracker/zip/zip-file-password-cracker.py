@@ -32,6 +32,16 @@ Attention - Dictionary:
     - The max slots defines the length of the passwords resulted from the permutation operation.
         Therefore, the default slot configured in this script is 4, which generates 319 text files.
     - CAUTION: increasing the slots may fill up your disk space.
+    - The files are created by a bounded pool of processes (one file at a time per process), and
+        running it again only creates the files missing or left truncated by an interrupted run.
+    - Brute force can run without dictionary files instead: passwords are generated in memory by
+        each process from a keyspace range (see keyspace.py), so longer lengths use no disk space.
+    - Rules (e.g. capitalization, leetspeak such as p@$$w0rd, appended years) expand the words of
+        the dictionaries in memory instead of writing every variant to disk (see rules.py).
+    - Masks with one charset per position (e.g. ?u?l?l?l?d?d, including accented chars such as
+        {á,ã,ú,ü}) search realistic password structures only (see mask.py).
+    - A Markov model trained from a wordlist generates the most probable passwords first, within a
+        length bound, as an index-addressable keyspace split across processes (see markov.py).
     - The default maximum number of rows per file is 250K.
     - It takes ~2 minutes to generate these password files under the following conditions:
         - OS = Windows 10 Home Edition (64-bit)
@@ -45,17 +55,44 @@ Attention - Dictionary:
 Attention - Password Cracking:
     - The execution is throttled based on the number of logical cores available and a % factor to
         make sure the script won't consume 100% of CPU.
+    - Alternatively, a governor grows or shrinks the cracking processes while they run, within a
+        CPU and memory envelope (including cgroup quotas in containers), until the throughput stops
+        improving (see governor.py).
+    - The cracking processes are started once and receive chunks of passwords over a queue (see
+        scheduler.py). All of them stop between two batches as soon as the password is found.
+    - Several ZIP files can be cracked at once (see crack_zip_files): every password is generated or
+        read once and verified against all the ZIP files not solved yet.
+    - Cracking can also be spread across several nodes: a coordinator leases chunks over TCP to
+        workers running their own pool of processes (see distributed.py).
+    - ZIP files encrypted with WinZip AES (AE-1/AE-2) are verified with their PBKDF2 password
+        verification value and HMAC-SHA1 (see winzipaes.py), and extracted without zipfile, which
+        cannot decrypt them. Expect ~1000 passwords/s per process instead of millions.
+    - Throughput (per process and in aggregate), keyspace processed, ETA, time split between
+        generation, verification and I/O and false positives can be written to a JSON-lines stats
+        file and served by a local HTTP endpoint (see telemetry.py).
 
 """
 
+import csv
 import itertools
 import multiprocessing
 import os
-import time
-import zipfile
 
 from datetime import datetime
-from zipfile import BadZipFile
+
+from archive import AES_CHUNK_SIZE, get_archive_context, read_manifest
+from candidatestore import CANDIDATE_STORE_EXTENSION, CandidateStore, convert_text_dictionaries
+from checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpoint, merge_range
+from chunks import CandidateStoreChunk, DictionaryChunk, KeyspaceChunk, PasswordsChunk, get_source
+from distributed import DEFAULT_PORT, Coordinator, run_worker
+from governor import ParallelismGovernor, get_degree_of_parallelism
+from keyspace import Keyspace
+from markov import MarkovKeyspace
+from mask import Mask
+from rules import RuleSet
+from scheduler import CrackingPool
+from telemetry import DEFAULT_STATS_INTERVAL, Telemetry
+from wordlist import WordlistReader
 
 
 def __get_max_degree_of_parallelism():
@@ -64,7 +101,6 @@ def __get_max_degree_of_parallelism():
     Returns:
          int: The max degree of parallelism.
     """
-    logical_processor_count = os.cpu_count()
 
     # 1     = 100% of CPUs will be used in a given point in time (1 process per CPU)
     #           CAUTION: this setting may cause your CPU % to be 100% constantly until:
@@ -73,21 +109,151 @@ def __get_max_degree_of_parallelism():
     # 0.5   = 50% of CPUs will be used in a given point in time
     #           This may be useful to throttle CPU usage
     max_processes_factor_per_cpu = 0.5
-    max_degree_of_parallelism = round((max_processes_factor_per_cpu * logical_processor_count), 0)
+
+    # CPUs available to the process (affinity and cgroup CPU quota in containers), rounded down but
+    #   never to 0 processes (see governor)
+    max_degree_of_parallelism = get_degree_of_parallelism(max_processes_factor_per_cpu)
 
     return max_degree_of_parallelism
 
 
-def create_dictionary_if_not_exists(output_directory, permutation_slots):
-    """Creates a new file of possible passwords if does not exist yet
+# ASCII table char range to generate permutations
+__ASCII_START_INDEX = 33  # ! (Inclusive)
+__ASCII_END_INDEX = 127   # ~ (Exclusive)
+
+# File rollover settings
+__MAX_LINES_PER_FILE = 250000
+
+# Number of trailing chars generated at once for every prefix of leading chars (94^2 passwords
+#   per writelines call)
+__SUFFIX_SLOTS = 2
+
+
+def __get_dictionary_shards(permutation_slots):
+    """Returns the files of possible passwords of a permutation length
+
+    Every file is a shard: a range of the permutations (in lexicographic order) that can be created
+        by any process, independently of the others.
+
+    Args:
+        permutation_slots (int): The target slots to generated password permutations.
+
+    Returns:
+        list: The (permutation slots, file number, first permutation, last permutation (exclusive))
+            of every file.
+    """
+    permutation_count = (__ASCII_END_INDEX - __ASCII_START_INDEX) ** permutation_slots
+
+    return [(permutation_slots, file_number, shard_start,
+             min(shard_start + __MAX_LINES_PER_FILE, permutation_count))
+            for file_number, shard_start in enumerate(
+                range(0, permutation_count, __MAX_LINES_PER_FILE))]
+
+
+def __get_dictionary_file_path(output_directory, permutation_slots, file_number):
+    """Returns the path of a file of possible passwords (e.g. c:\temp\dictionary_4_0.txt)
+
+    """
+    file_name = "dictionary_{0}_{1}.txt".format(permutation_slots, file_number)
+
+    return os.path.join(output_directory, file_name)
+
+
+def __is_dictionary_shard_complete(file_path, shard_start, shard_end, permutation_slots):
+    """Returns whether a file of possible passwords was completely written by a previous run
+
+    The size of a complete file is known up front (one password and a line break per line), so
+        files left truncated by an interrupted run are created again.
+
+    """
+    expected_size = (shard_end - shard_start) * (permutation_slots + len(os.linesep))
+
+    return os.path.isfile(file_path) and os.path.getsize(file_path) == expected_size
+
+
+def create_dictionary_shard(output_directory, permutation_slots, file_number, shard_start,
+                            shard_end):
+    """Creates a file of possible passwords (a range of the permutations) if not complete yet
+
+    The passwords are generated one prefix of leading chars at a time: the trailing chars are
+        generated once and appended to every prefix, and all the lines of a prefix are written
+        with a single writelines call.
 
     Args:
         output_directory (string): Output directory where the dictionary files will be written to
             (e.g. c:\temp).
         permutation_slots (int): The target slots to generated password permutations.
+        file_number (int): The number of the file within the permutation length.
+        shard_start (int): The first permutation of the file (inclusive).
+        shard_end (int): The last permutation of the file (exclusive).
 
+    Returns:
+        int: The number of passwords written (0 if the file was already complete).
     """
+    file_path = __get_dictionary_file_path(output_directory, permutation_slots, file_number)
+
+    if __is_dictionary_shard_complete(file_path, shard_start, shard_end, permutation_slots):
+        print("\nFile '{0}' already exists. Skipping it...".format(file_path))
+        return 0
 
+    start = datetime.now()
+
+    # Current process
+    current_process = multiprocessing.process.current_process()
+
+    # Generates passwords using characters from the ASCII table
+    ascii_chars = [chr(i) for i in range(__ASCII_START_INDEX, __ASCII_END_INDEX)]
+
+    suffix_slots = min(permutation_slots, __SUFFIX_SLOTS)
+    prefix_slots = permutation_slots - suffix_slots
+    suffixes = ["".join(suffix) + "\n"
+                for suffix in itertools.product(ascii_chars, repeat=suffix_slots)]
+
+    first_prefix = shard_start // len(suffixes)
+    last_prefix = (shard_end - 1) // len(suffixes)
+
+    # Large buffer so the lines of several prefixes are written to the disk at once
+    with open(file_path, "w", buffering=1024 * 1024) as file:
+        for prefix_index in range(first_prefix, last_prefix + 1):
+            prefix_start = prefix_index * len(suffixes)
+
+            # Leading chars of the prefix (base-94 digits of its index)
+            prefix = []
+
+            for _ in range(prefix_slots):
+                prefix_index, digit = divmod(prefix_index, len(ascii_chars))
+                prefix.append(ascii_chars[digit])
+
+            prefix = "".join(reversed(prefix))
+            lines = suffixes[max(shard_start - prefix_start, 0):shard_end - prefix_start]
+
+            file.writelines([prefix + line for line in lines] if prefix else lines)
+
+    end = datetime.now()
+
+    print("\n[PID={0}] Dictionary file '{1}' created successfully (Elapsed Time => {2})"
+          .format(current_process.pid, file_path, (end - start)))
+
+    return shard_end - shard_start
+
+
+def __create_dictionary_shard(shard):
+    """Creates a file of possible passwords (see create_dictionary_shard) from a process pool
+
+    Args:
+        shard (tuple): The (output directory, permutation slots, file number, first permutation,
+            last permutation).
+
+    Returns:
+        int: The number of passwords written.
+    """
+    return create_dictionary_shard(*shard)
+
+
+def __validate_dictionary_arguments(output_directory, permutation_slots):
+    """Validates the output directory and the slots of the files with passwords
+
+    """
     # Input validation
     if not output_directory or output_directory.isspace():
         raise ValueError("Directory cannot be none, empty or whitespace.")
@@ -106,190 +272,316 @@ def create_dictionary_if_not_exists(output_directory, permutation_slots):
     if not os.path.exists(output_directory):
         raise IOError("Directory '{0}' does not exist.".format(output_directory))
 
-    start = datetime.now()
 
-    # Current process
-    current_process = multiprocessing.process.current_process()
+def create_dictionary_if_not_exists(output_directory, permutation_slots):
+    """Creates the files of possible passwords of a permutation length that are not complete yet
 
-    # ASCII table
-    ascii_chars = []
+    Args:
+        output_directory (string): Output directory where the dictionary files will be written to
+            (e.g. c:\temp).
+        permutation_slots (int): The target slots to generated password permutations.
 
-    # ASCII table char range to generate permutations
-    ascii_start_index = 33  # ! (Inclusive)
-    ascii_end_index = 127   # ~ (Exclusive)
+    Returns:
+        int: The number of passwords written.
+    """
 
-    # Generates passwords using characters from the ASCII table
-    for i in range(ascii_start_index, ascii_end_index):
-        ascii_chars.append(chr(i))
-
-    # File rollover settings
-    max_lines_per_file = 250000
-    current_line_number = 0
-    current_file_number = 0
-
-    # File with possible passwords
-    file = None
-    file_path = None
-
-    try:
-        for password in itertools.product(ascii_chars, repeat=permutation_slots):
-            # Rollover file if max number of rows is reached
-            if current_line_number % max_lines_per_file == 0:
-                file_name = "dictionary_{0}_{1}.txt".format(permutation_slots, current_file_number)
-                file_path = os.path.join(output_directory, file_name)
-
-                if os.path.isfile(file_path):
-                    print("\nFile '{0}' already exists. Skipping it...".format(file_path))
-                    return
-                else:
-                    print("\nCreating file '{0}' with passwords...".format(file_path))
-
-                # Open a new file if max lines per file has been reached
-                file = open(file_path, "w")
-
-                current_file_number = current_file_number + 1
-                current_line_number = 0
-
-            # Write password to file
-            file.write("{0}\n".format("".join(password)))
-
-            current_line_number = current_line_number + 1
-    finally:
-        if file and not file.closed:
-            file.close()
-    
-    end = datetime.now()
+    __validate_dictionary_arguments(output_directory, permutation_slots)
 
-    print("\n[PID={0}] Dictionary file '{1}' created successfully (Elapsed Time => {2})"
-          .format(current_process.pid, file_path, (end - start)))
+    return sum(create_dictionary_shard(output_directory, *shard)
+               for shard in __get_dictionary_shards(permutation_slots))
 
 
-def create_dictionaries(output_directory):
+def create_dictionaries(output_directory, permutation_slots=4, max_degree_of_parallelism=None):
     """Coordinates multiple processes to create files with passwords
 
+    The files of all the permutation lengths are shards of at most 250K passwords, created by a
+        bounded pool of processes. Creating 4-long passwords (~78M) is then spread evenly across
+        the processes, instead of one process per permutation length creating 4-long passwords
+        alone while the others are done in a split second.
+
+    Files completely written by a previous run are skipped, so an interrupted run is resumed by
+        creating the missing (or truncated) files only.
+
     Args:
         output_directory (string): Output directory where the dictionary files will be written to
             (e.g. c:\temp).
-
-    TODO:
-        Implement max degree of parallelism
+        permutation_slots (int): The target slots to generated password permutations (1 to N).
+        max_degree_of_parallelism (int): The number of processes. Defaults to the max degree of
+            parallelism for resource governance purposes.
     """
 
+    __validate_dictionary_arguments(output_directory, permutation_slots)
+
     start = datetime.now()
 
-    # Target slot to generate password permutations
-    permutations_slots = 4
+    if max_degree_of_parallelism is None:
+        max_degree_of_parallelism = __get_max_degree_of_parallelism()
+
+    max_degree_of_parallelism = int(max(max_degree_of_parallelism, 1))
+
+    shards = [(output_directory,) + shard
+              for i in range(1, permutation_slots + 1)
+              for shard in __get_dictionary_shards(i)]
 
-    processes = []
+    # Largest shards first, so the last ones to finish are the smallest
+    shards.sort(key=lambda shard: shard[4] - shard[3], reverse=True)
 
-    total_files_created = 0
+    print("***** [Dictionary] Max degree of parallelism = {0}, Files = {1} *****"
+          .format(max_degree_of_parallelism, len(shards)))
 
-    for i in range(1, permutations_slots + 1):
-        current_process = multiprocessing.Process(
-            target=create_dictionary_if_not_exists,
-            args=(output_directory, i,))
-        processes.append(current_process)
-        current_process.start()
-        total_files_created = total_files_created + 1
+    total_passwords_written = 0
 
-    for current_process in processes:
-        current_process.join()
+    with multiprocessing.Pool(max_degree_of_parallelism) as pool:
+        for passwords_written in pool.imap_unordered(__create_dictionary_shard, shards):
+            total_passwords_written = total_passwords_written + passwords_written
 
     end = datetime.now()
 
-    print("\n***** [Dictionary] {0} dictionaries created successfully (Elapsed Time => {1}) *****"
-          .format(total_files_created, (end - start)))
+    print("\n***** [Dictionary] {0} dictionaries created successfully ({1} passwords written) "
+          "(Elapsed Time => {2}) *****".format(len(shards), total_passwords_written, (end - start)))
+
+
+def format_password(password):
+    """Returns a password as text, bytes that are not valid UTF-8 being escaped (e.g. '\\xe9')
+
+    Args:
+        password (bytes): The password.
+
+    Returns:
+        string: The password as text.
+    """
+    return password.decode(errors="backslashreplace")
 
 
-def try_crack_zip_file_password(zip_file_path, output_directory, password):
+def try_crack_zip_file_password(zip_file_path, output_directory, password, archive_context=None):
     """Tries to crack ZIP file with password
 
+    The password is verified in memory against the ZipCrypto encryption header (or the WinZip AES
+        password verification value) first, and the ZIP file is only extracted once the password
+        is confirmed.
+
     Args;
         zip_file_path (string): ZIP file path (e.g. c:\temp\file.zip).
         output_directory (string): Output directory where the password will be written to along
             with uncompressed version of the file(e.g. c:\temp\cracked).
-        password (string): The password to try it out
+        password (bytes): The password to try it out, as found (e.g. cp1252 passwords of a mask
+            are not valid UTF-8)
+        archive_context (ArchiveContext): Optional archive context already loaded for the ZIP
+            file. Defaults to the context cached by the current process.
     """
 
-    if not password or password.isspace():
-        raise ValueError("Password cannot be none, empty or whitespace.")
+    # Whitespace-only passwords are valid (e.g. found by a wordlist or rules)
+    if not password:
+        raise ValueError("Password cannot be none or empty.")
 
-    zip_file = zipfile.ZipFile(zip_file_path)
+    if archive_context is None:
+        archive_context = get_archive_context(zip_file_path)
 
-    try:
-        # Tries to extract the file with password
-        zip_file.extractall(path=output_directory, pwd=password.encode())
+    if not archive_context.verify(password):
+        return False
 
-        # Password FOUND, displaying it on the console and saving it to a file
-        print("------------------------------------------------------------------------->")
-        print("> Password FOUND -> '{0}'".format(password))
+    # Password CONFIRMED, extracting the file with it
+    archive_context.extract_all(output_directory, password)
 
-        password_file_path = os.path.join(output_directory, "password.txt")
+    # Password FOUND, displaying it on the console and saving it to a file (as is, whatever its
+    #   encoding)
+    print("------------------------------------------------------------------------->")
+    print("> Password FOUND -> '{0}'".format(format_password(password)))
 
-        print("> Writing password to file '{0}'...".format(password_file_path))
-        print("------------------------------------------------------------------------->")
+    password_file_path = os.path.join(output_directory, "password.txt")
 
-        with open(password_file_path, 'w') as password_file:
-            password_file.write("{0}\n".format(password))
+    print("> Writing password to file '{0}'...".format(password_file_path))
+    print("------------------------------------------------------------------------->")
 
-        return True
+    with open(password_file_path, 'wb') as password_file:
+        password_file.write(password + b"\n")
 
-    except RuntimeError:
-        # Swallow runtime exception because the password is wrong
-        # RuntimeError: Bad password for file
-        #   <ZipInfo filename='raw.txt' external_attr=0x20 file_size=12 compress_size=24>
-        return False
+    return True
 
-    except BadZipFile:
-        # Swallow the bad zip file exception
-        # zipfile.BadZipFile: Bad CRC-32 for file 'raw.txt'
-        return False
 
+def __get_governor_description(governor):
+    """Returns the envelope of a governor, as shown along with the max degree of parallelism
 
-def crack_zip_file_with_dictionary(
-        zip_file_path,
-        output_directory,
-        dictionary_file_path,
-        return_dictionary):
-    """Cracks ZIP file based on words defined in various dictionaries.
+    Args:
+        governor (ParallelismGovernor): The governor, or None.
+
+    Returns:
+        string: The description (e.g. " (adaptive, 1 - 8 of 8 CPUs)"), or an empty string.
+    """
+    if governor is None:
+        return ""
+
+    return " (adaptive, {0} - {1} of {2} CPUs)".format(governor.min_degree_of_parallelism,
+                                                      governor.max_degree_of_parallelism,
+                                                      governor.cpu_count)
+
+
+def __get_telemetry(stats_path, stats_interval, metrics_port, keyspace_size):
+    """Starts the telemetry of a cracking run, if stats are requested
 
     Args:
-        zip_file_path (string): ZIP file path (e.g. c:\temp\file.zip).
-        output_directory (string): Output directory where the password will be written to
-            along with uncompressed version of the file(e.g. c:\temp\cracked).
-        dictionary_file_path (string): The current file with password being processed by
-            this process (c:\temp\dic\dictionary_1_0.txt).
-        return_dictionary (dict): The dictionary to enable sharing state accross the main
-            process and children ones.
+        stats_path (string): Optional JSON-lines file the stats are appended to.
+        stats_interval (int): The number of seconds between two stats written to the file.
+        metrics_port (int): Optional local port serving the stats over HTTP.
+        keyspace_size (int): The number of keyspace passwords of the run (see Telemetry).
+
+    Returns:
+        Telemetry: The telemetry, or None.
     """
+    if not stats_path and metrics_port is None:
+        return None
 
-    current_process = multiprocessing.process.current_process()
+    telemetry = Telemetry(stats_path, stats_interval, metrics_port, keyspace_size)
+    telemetry.start()
+
+    if telemetry.address:
+        print("***** [Telemetry] Stats served on http://{0}/metrics *****"
+              .format(telemetry.address))
+
+    return telemetry
+
+
+def __get_remaining_ranges(checkpoint, zip_file_paths, source, start, end):
+    """Returns the parts of a range of a source of passwords not completed by a previous run
+
+    Args:
+        checkpoint (Checkpoint): The checkpoint of the previous run (if any).
+        zip_file_paths (list): The ZIP file paths cracked at once. A part remains if any of them
+            did not complete it.
+        source (string): The source of passwords (e.g. "keyspace:0123456789abcdef").
+        start (int): The range start (inclusive).
+        end (int): The range end (exclusive).
+
+    Returns:
+        list: The (start, end) remaining ranges.
+    """
+    if checkpoint is None:
+        return [(start, end)] if start < end else []
+
+    remaining_ranges = []
+
+    for zip_file_path in zip_file_paths:
+        for range_start, range_end in checkpoint.get_remaining_ranges(zip_file_path, source, start,
+                                                                      end):
+            merge_range(remaining_ranges, range_start, range_end)
+
+    return [tuple(r) for r in remaining_ranges]
+
+
+def __get_chunks(zip_file_paths, dictionary_directory, wordlist_path, keyspaces, chunk_size,
+                 checkpoint=None, rule_set=None):
+    """Generates the chunks of passwords to try
+
+    Args:
+        zip_file_paths (list): The ZIP file paths cracked at once (e.g. [c:\temp\file.zip]).
+        dictionary_directory (string): The directory where to find the files with possible passwords
+            (text dictionaries or candidate stores).
+        wordlist_path (string): The external wordlist file path.
+        keyspaces (list): The keyspaces to generate possible passwords from.
+        chunk_size (int): The number of passwords per chunk (keyspace and candidate store ranges).
+        checkpoint (Checkpoint): Optional checkpoint of a previous run, whose completed ranges are
+            skipped. The remaining ranges are split in chunks again, so they are rebalanced
+            across the processes.
+        rule_set (RuleSet): Optional rules expanding the words of the text dictionaries and of the
+            wordlist (by the cracking processes).
+
+    Yields:
+        object: The chunks (see chunks).
+    """
+    if dictionary_directory:
+        for dictionary_file_name in sorted(os.listdir(dictionary_directory)):
+            dictionary_file_path = os.path.abspath(
+                os.path.join(dictionary_directory, dictionary_file_name))
+
+            if not dictionary_file_name.endswith(CANDIDATE_STORE_EXTENSION):
+                if __get_remaining_ranges(checkpoint, zip_file_paths,
+                                          get_source("dictionary", dictionary_file_path, rule_set),
+                                          0, 1):
+                    yield DictionaryChunk(dictionary_file_path, rule_set)
+
+                continue
+
+            with CandidateStore(dictionary_file_path) as candidate_store:
+                candidate_store_count = len(candidate_store)
+
+            remaining_ranges = __get_remaining_ranges(
+                checkpoint, zip_file_paths, "candidate_store:" + dictionary_file_path, 0,
+                candidate_store_count)
+
+            for range_start, range_end in remaining_ranges:
+                for chunk_start in range(range_start, range_end, chunk_size):
+                    yield CandidateStoreChunk(dictionary_file_path, chunk_start,
+                                              min(chunk_start + chunk_size, range_end))
+
+    if wordlist_path:
+        wordlist_path = os.path.abspath(wordlist_path)
+        source = get_source("wordlist", wordlist_path, rule_set)
+        start_offset = min(checkpoint.get_resume_offset(zip_file_path, source)
+                           for zip_file_path in zip_file_paths) if checkpoint else 0
+
+        # Every word is expanded by each rule, so fewer words are sent per chunk
+        batch_size = max(16384 // len(rule_set), 64) if rule_set else 16384
 
-    return_dictionary[current_process.pid] = False
+        # Reads the wordlist in this process, bounded by the size of the cracking pool queue
+        with WordlistReader(wordlist_path, batch_size=batch_size,
+                            start_offset=start_offset) as wordlist_reader:
+            for passwords in wordlist_reader:
+                end_offset = wordlist_reader.offset
 
-    with open(dictionary_file_path, "r") as dictionary_file:
-        for line in dictionary_file.readlines():
-            password = line.strip("\n")
-            found = try_crack_zip_file_password(zip_file_path, output_directory, password)
-            if found:
-                print(">>> setting return to true = {0}".format(found))
-                return_dictionary[current_process.pid] = True
+                if not checkpoint or not all(
+                        checkpoint.is_completed(zip_file_path, source, start_offset, end_offset)
+                        for zip_file_path in zip_file_paths):
+                    yield PasswordsChunk(passwords, (source, start_offset, end_offset), rule_set)
 
-                # Password FOUND, stop execution
-                return
+                start_offset = end_offset
 
-    print("\n[PID={0}] Done trying passwords in file '{1}'"
-          .format(current_process.pid, dictionary_file_path))
+    for keyspace in keyspaces:
+        remaining_ranges = __get_remaining_ranges(
+            checkpoint, zip_file_paths, "keyspace:" + keyspace.fingerprint, 0, keyspace.size)
 
+        for range_start, range_end in remaining_ranges:
+            for keyspace_start, keyspace_end in keyspace.ranges(chunk_size, range_start, range_end):
+                yield KeyspaceChunk(keyspace, keyspace_start, keyspace_end)
 
-def crack_zip_file(zip_file_path, output_directory, dictionary_directory):
-    """Cracks ZIP file based on words defined in various dictionaries.
+
+def crack_zip_file(zip_file_path, output_directory, dictionary_directory=None, keyspace=None,
+                   wordlist_path=None, chunk_size=250000, checkpoint_path=None,
+                   checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, resume=False, mask=None,
+                   rules_path=None, stats_path=None, stats_interval=DEFAULT_STATS_INTERVAL,
+                   metrics_port=None, governor=None):
+    """Cracks ZIP file based on words defined in various dictionaries, an external wordlist and/or
+        generated in memory from a keyspace or a mask (brute force without dictionary files).
+
+    The passwords are split into chunks processed by a pool of processes started once for the
+        whole run (see scheduler).
 
     Args:
         zip_file_path (string): ZIP file path (e.g. c:\temp\file.zip).
         output_directory (string): Output directory where the password will be written to along
             with uncompressed version of the file(e.g. c:\temp\cracked).
         dictionary_directory (string): The directory where to find the files with possible passwords
+            (text dictionaries or candidate stores)
+        keyspace (Keyspace): The keyspace to generate possible passwords from (e.g.
+            Keyspace.brute_force(5) or a MarkovKeyspace).
+        wordlist_path (string): The external wordlist file path, optionally gzip/xz compressed
+            (e.g. c:\temp\rockyou.txt.gz).
+        chunk_size (int): The number of passwords per chunk (keyspace and candidate store ranges).
+        checkpoint_path (string): Optional checkpoint file where the completed ranges are recorded
+            (e.g. c:\temp\cracked\checkpoint.json).
+        checkpoint_interval (int): The min number of seconds between two checkpoint writes.
+        resume (bool): Whether to skip the work recorded in the checkpoint file by a previous run.
+        mask (Mask): The mask to generate possible passwords from (e.g. Mask("?u?l?l?l?d?d")).
+        rules_path (string): Optional rules file expanding every word of the text dictionaries and
+            of the wordlist (e.g. c:\temp\common.rule, see rules).
+        stats_path (string): Optional JSON-lines file the throughput stats are appended to (e.g.
+            c:\temp\cracked\stats.jsonl, see telemetry).
+        stats_interval (int): The number of seconds between two stats written to the file.
+        metrics_port (int): Optional local port serving the throughput stats over HTTP.
+        governor (ParallelismGovernor): Optional governor resizing the cracking processes while
+            they run, instead of the fixed max degree of parallelism.
+
+    Returns:
+        bool: True if the password was found. Otherwise, False.
     """
 
     # Input validation
@@ -299,6 +591,12 @@ def crack_zip_file(zip_file_path, output_directory, dictionary_directory):
     if not output_directory or output_directory.isspace():
         raise ValueError("Output file path cannot be none, empty or whitespace.")
 
+    if rules_path and not dictionary_directory and not wordlist_path:
+        raise ValueError("Rules require a dictionary directory or a wordlist.")
+
+    if not dictionary_directory and not keyspace and not wordlist_path and not mask:
+        raise ValueError("Dictionary directory, keyspace, wordlist and mask cannot be all none.")
+
     # Ensures the ZIP file EXISTS
     if not os.path.isfile(zip_file_path):
         raise IOError("Zip file '{0}' was not found.".format(zip_file_path))
@@ -308,72 +606,420 @@ def crack_zip_file(zip_file_path, output_directory, dictionary_directory):
         raise IOError("Output directory '{0}' was not found.".format(output_directory))
 
     # Ensures the dictionary directory EXISTS
-    if not os.path.exists(dictionary_directory):
+    if dictionary_directory and not os.path.exists(dictionary_directory):
         raise IOError("Dictionary directory '{0}' was not found.".format(dictionary_directory))
 
+    # Ensures the wordlist EXISTS
+    if wordlist_path and not os.path.isfile(wordlist_path):
+        raise IOError("Wordlist '{0}' was not found.".format(wordlist_path))
+
+    # Ensures the rules file EXISTS
+    if rules_path and not os.path.isfile(rules_path):
+        raise IOError("Rules file '{0}' was not found.".format(rules_path))
+
     start = datetime.now()
 
+    rule_set = RuleSet.load(rules_path) if rules_path else None
+
+    # Max degree of parallelism for resource governance purposes
+    max_degree_of_parallelism = governor.degree_of_parallelism if governor \
+        else __get_max_degree_of_parallelism()
+
+    print("***** [CrackingPassword] Max degree of parallelism = {0}{1} *****"
+          .format(max_degree_of_parallelism, __get_governor_description(governor)))
+
+    archive_context = get_archive_context(zip_file_path)
+
+    # WinZip AES passwords are ~1000 times more expensive to verify (PBKDF2), so smaller chunks
+    #   keep all the processes busy until the end of the run
+    if archive_context.is_aes:
+        chunk_size = min(chunk_size, AES_CHUNK_SIZE)
+
+        print("***** [CrackingPassword] WinZip AES-{0} (PBKDF2-HMAC-SHA1, {1} iterations) *****"
+              .format(archive_context.key_bits, archive_context.iterations))
+
+    checkpoint = None
+    password = None
+
+    if checkpoint_path:
+        checkpoint = Checkpoint(checkpoint_path, checkpoint_interval, resume)
+        password = checkpoint.get_password(zip_file_path)
+
+        if password is not None:
+            print("***** [Checkpoint] Password already found by a previous run *****")
+
+    keyspaces = ([keyspace] if keyspace else []) + (mask.keyspaces if mask else [])
+
+    # The size of keyspaces and masks is known up front, so their remaining time is estimated
+    keyspace_sources = set("keyspace:" + k.fingerprint for k in keyspaces)
+    keyspace_total_size = sum(
+        range_end - range_start
+        for k in keyspaces
+        for range_start, range_end in __get_remaining_ranges(
+            checkpoint, [zip_file_path], "keyspace:" + k.fingerprint, 0, k.size))
+    keyspace_processed_size = 0
+
+    if keyspaces:
+        print("***** [CrackingPassword] Keyspace size = {0} passwords *****"
+              .format(keyspace_total_size))
+
+    telemetry = None
+    total_chunks_processed = 0
+
+    def on_chunk_done(key, size):
+        nonlocal total_chunks_processed, keyspace_processed_size, max_degree_of_parallelism
+        total_chunks_processed = total_chunks_processed + 1
+
+        print("\n***** Chunks processed = {0} (Last = {1}) *****"
+              .format(total_chunks_processed, key))
+
+        if cracking_pool.max_degree_of_parallelism != max_degree_of_parallelism:
+            max_degree_of_parallelism = cracking_pool.max_degree_of_parallelism
+
+            print("***** [Governor] Degree of parallelism = {0} *****"
+                  .format(max_degree_of_parallelism))
+
+        if key[0] in keyspace_sources:
+            keyspace_processed_size = keyspace_processed_size + size
+
+            if telemetry:
+                telemetry.record_keyspace_progress(size)
+
+            elapsed = datetime.now() - start
+            remaining = elapsed * ((keyspace_total_size - keyspace_processed_size)
+                                   / keyspace_processed_size)
+
+            print("***** Keyspace processed = {0:.2%} (ETA => {1}) *****"
+                  .format(keyspace_processed_size / keyspace_total_size, remaining))
+
+        # The key derivation bounds the WinZip AES throughput, which is worth tracking
+        if archive_context.is_aes:
+            throughput = cracking_pool.verified_count / max(
+                (datetime.now() - start).total_seconds(), 1e-6)
+
+            print("***** [WinZip AES] Throughput = {0:.0f} passwords/s ({1:.0f} per process) *****"
+                  .format(throughput, throughput / cracking_pool.max_degree_of_parallelism))
+
+        if checkpoint:
+            checkpoint.mark_completed(zip_file_path, *key)
+            checkpoint.save_if_due()
+
+    if password is None:
+        chunks = __get_chunks([zip_file_path], dictionary_directory, wordlist_path, keyspaces,
+                              chunk_size, checkpoint, rule_set)
+        telemetry = __get_telemetry(stats_path, stats_interval, metrics_port, keyspace_total_size)
+
+        try:
+            with CrackingPool(zip_file_path, max_degree_of_parallelism, telemetry=telemetry,
+                              governor=governor) as cracking_pool:
+                password = cracking_pool.run(chunks, on_chunk_done)
+        finally:
+            # Records the work done so far, even if the run is interrupted
+            if checkpoint:
+                if password is not None:
+                    checkpoint.set_password(zip_file_path, password)
+
+                checkpoint.save()
+
+            if telemetry:
+                telemetry.close()
+
+    # Password FOUND, extracting the file with it
+    is_password_cracked = password is not None and try_crack_zip_file_password(
+        zip_file_path, output_directory, password, archive_context)
+
+    end = datetime.now()
+
+    if is_password_cracked:
+        print("\n***** [CrackingPassword] Password CRACKED successfully (Elapsed Time => {0}) *****"
+              .format((end - start)))
+    else:
+        print("\n***** [CrackingPassword] Password NOT FOUND (Elapsed Time => {0}) *****"
+              .format((end - start)))
+
+    return is_password_cracked
+
+
+def crack_zip_files(manifest_path, output_directory, dictionary_directory=None, keyspace=None,
+                    wordlist_path=None, chunk_size=250000, checkpoint_path=None,
+                    checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, resume=False, mask=None,
+                    rules_path=None, stats_path=None, stats_interval=DEFAULT_STATS_INTERVAL,
+                    metrics_port=None, governor=None):
+    """Cracks several ZIP files at once, generating or reading every password only once
+
+    Every batch of passwords is verified against all the archives not solved yet (see ArchiveSet),
+        and each archive is extracted as soon as it is solved.
+
+    Args:
+        manifest_path (string): The manifest file with one ZIP file path per line (e.g.
+            c:\temp\manifest.txt, see read_manifest).
+        output_directory (string): Output directory where a directory is created per ZIP file
+            solved, with the password and the uncompressed version of the file, along with the
+            results of all the ZIP files (results.csv, where the password is escaped as in
+            format_password, along with its bytes in hexadecimal).
+        dictionary_directory (string): The directory where to find the files with possible passwords
+            (text dictionaries or candidate stores)
+        keyspace (Keyspace): The keyspace to generate possible passwords from.
+        wordlist_path (string): The external wordlist file path, optionally gzip/xz compressed.
+        chunk_size (int): The number of passwords per chunk (keyspace and candidate store ranges).
+        checkpoint_path (string): Optional checkpoint file where the completed ranges are recorded.
+        checkpoint_interval (int): The min number of seconds between two checkpoint writes.
+        resume (bool): Whether to skip the work recorded in the checkpoint file by a previous run.
+        mask (Mask): The mask to generate possible passwords from.
+        rules_path (string): Optional rules file expanding every word of the text dictionaries and
+            of the wordlist.
+        stats_path (string): Optional JSON-lines file the throughput stats are appended to.
+        stats_interval (int): The number of seconds between two stats written to the file.
+        metrics_port (int): Optional local port serving the throughput stats over HTTP.
+        governor (ParallelismGovernor): Optional governor resizing the cracking processes while
+            they run, instead of the fixed max degree of parallelism.
+
+    Returns:
+        dict: The password found for each ZIP file path (None if not found).
+    """
+
+    # Input validation
+    if not manifest_path or manifest_path.isspace():
+        raise ValueError("Manifest path cannot be none, empty or whitespace.")
+
+    if not output_directory or output_directory.isspace():
+        raise ValueError("Output file path cannot be none, empty or whitespace.")
+
+    if rules_path and not dictionary_directory and not wordlist_path:
+        raise ValueError("Rules require a dictionary directory or a wordlist.")
+
+    if not dictionary_directory and not keyspace and not wordlist_path and not mask:
+        raise ValueError("Dictionary directory, keyspace, wordlist and mask cannot be all none.")
+
+    # Ensures the manifest EXISTS
+    if not os.path.isfile(manifest_path):
+        raise IOError("Manifest '{0}' was not found.".format(manifest_path))
+
+    # Ensures the output directory EXISTS
+    if not os.path.exists(output_directory):
+        raise IOError("Output directory '{0}' was not found.".format(output_directory))
+
+    # Ensures the dictionary directory EXISTS
+    if dictionary_directory and not os.path.exists(dictionary_directory):
+        raise IOError("Dictionary directory '{0}' was not found.".format(dictionary_directory))
+
+    # Ensures the wordlist EXISTS
+    if wordlist_path and not os.path.isfile(wordlist_path):
+        raise IOError("Wordlist '{0}' was not found.".format(wordlist_path))
+
+    # Ensures the rules file EXISTS
+    if rules_path and not os.path.isfile(rules_path):
+        raise IOError("Rules file '{0}' was not found.".format(rules_path))
+
+    zip_file_paths = read_manifest(manifest_path)
+
+    # Ensures the ZIP files EXIST
+    for zip_file_path in zip_file_paths:
+        if not os.path.isfile(zip_file_path):
+            raise IOError("Zip file '{0}' was not found.".format(zip_file_path))
+
+    start = datetime.now()
+
+    rule_set = RuleSet.load(rules_path) if rules_path else None
+
     # Max degree of parallelism for resource governance purposes
-    max_degree_of_parallelism = __get_max_degree_of_parallelism()
-    processes = []
+    max_degree_of_parallelism = governor.degree_of_parallelism if governor \
+        else __get_max_degree_of_parallelism()
+
+    print("***** [CrackingPassword] Max degree of parallelism = {0}{1}, Zip files = {2} *****"
+          .format(max_degree_of_parallelism, __get_governor_description(governor),
+                  len(zip_file_paths)))
+
+    checkpoint = Checkpoint(checkpoint_path, checkpoint_interval, resume) \
+        if checkpoint_path else None
+
+    passwords = dict((zip_file_path, checkpoint.get_password(zip_file_path) if checkpoint else None)
+                     for zip_file_path in zip_file_paths)
+
+    # One output directory per ZIP file (e.g. c:\temp\cracked\file)
+    output_directories = {}
+
+    for zip_file_path in zip_file_paths:
+        name = os.path.splitext(os.path.basename(zip_file_path))[0]
+
+        if name in output_directories.values():
+            name = "{0}_{1}".format(name, len(output_directories))
+
+        output_directories[zip_file_path] = name
+
+    def on_archive_solved(zip_file_path, password):
+        passwords[zip_file_path] = password
+
+        print("\n***** [CrackingPassword] Zip file '{0}' solved ({1} remaining) *****"
+              .format(zip_file_path, sum(1 for p in passwords.values() if p is None)))
+
+        if checkpoint:
+            checkpoint.set_password(zip_file_path, password)
+
+        archive_output_directory = os.path.join(output_directory,
+                                                output_directories[zip_file_path])
+        os.makedirs(archive_output_directory, exist_ok=True)
+
+        try_crack_zip_file_password(zip_file_path, archive_output_directory, password)
+
+    # The ZIP files solved by a previous run were already extracted and checkpointed
+    for zip_file_path, password in passwords.items():
+        if password is not None:
+            print("***** [Checkpoint] Zip file '{0}' already solved by a previous run *****"
+                  .format(zip_file_path))
+
+    # Only the ZIP files not solved yet are verified
+    active_zip_file_paths = [p for p in zip_file_paths if passwords[p] is None]
+
+    # WinZip AES archives bound the cost of every password (see crack_zip_file)
+    if any(get_archive_context(p).is_aes for p in active_zip_file_paths):
+        chunk_size = min(chunk_size, AES_CHUNK_SIZE)
+    keyspaces = ([keyspace] if keyspace else []) + (mask.keyspaces if mask else [])
+    keyspace_sources = set("keyspace:" + k.fingerprint for k in keyspaces)
+
+    # Only the ranges not completed by a previous run remain (see crack_zip_file)
+    keyspace_total_size = sum(
+        range_end - range_start
+        for k in keyspaces
+        for range_start, range_end in __get_remaining_ranges(
+            checkpoint, active_zip_file_paths, "keyspace:" + k.fingerprint, 0, k.size))
+    telemetry = None
+    total_chunks_processed = 0
+
+    def on_chunk_done(key, size):
+        nonlocal total_chunks_processed, max_degree_of_parallelism
+        total_chunks_processed = total_chunks_processed + 1
+
+        print("\n***** Chunks processed = {0} (Last = {1}) *****"
+              .format(total_chunks_processed, key))
+
+        if cracking_pool.max_degree_of_parallelism != max_degree_of_parallelism:
+            max_degree_of_parallelism = cracking_pool.max_degree_of_parallelism
+
+            print("***** [Governor] Degree of parallelism = {0} *****"
+                  .format(max_degree_of_parallelism))
+
+        if telemetry and key[0] in keyspace_sources:
+            telemetry.record_keyspace_progress(size)
+
+        if checkpoint:
+            for zip_file_path in active_zip_file_paths:
+                if passwords[zip_file_path] is None:
+                    checkpoint.mark_completed(zip_file_path, *key)
+
+            checkpoint.save_if_due()
+
+    if active_zip_file_paths:
+        chunks = __get_chunks(active_zip_file_paths, dictionary_directory, wordlist_path,
+                              keyspaces, chunk_size, checkpoint, rule_set)
+        telemetry = __get_telemetry(stats_path, stats_interval, metrics_port,
+                                    keyspace_total_size)
+
+        try:
+            with CrackingPool(active_zip_file_paths, max_degree_of_parallelism,
+                              telemetry=telemetry, governor=governor) as cracking_pool:
+                cracking_pool.run(chunks, on_chunk_done, on_archive_solved)
+        finally:
+            # Records the work done so far, even if the run is interrupted
+            if checkpoint:
+                checkpoint.save()
+
+            if telemetry:
+                telemetry.close()
+
+    # Results of all the ZIP files
+    with open(os.path.join(output_directory, "results.csv"), "w", newline="") as results_file:
+        results_writer = csv.writer(results_file)
+        results_writer.writerow(["zip_file_path", "status", "password", "password_hex",
+                                 "output_directory"])
+
+        for zip_file_path in zip_file_paths:
+            password = passwords[zip_file_path]
+
+            results_writer.writerow([
+                zip_file_path,
+                "CRACKED" if password is not None else "NOT FOUND",
+                format_password(password) if password is not None else "",
+                password.hex() if password is not None else "",
+                output_directories[zip_file_path] if password is not None else ""])
+
+    end = datetime.now()
 
-    print("***** [CrackingPassword] Max degree of parallelism = {0} *****"
-          .format(max_degree_of_parallelism))
+    print("\n***** [CrackingPassword] {0} of {1} passwords CRACKED (Elapsed Time => {2}) *****"
+          .format(sum(1 for p in passwords.values() if p is not None), len(zip_file_paths),
+                  (end - start)))
 
-    # Shared state to enable determining when the password was found and stop processing
-    manager = multiprocessing.Manager()
-    return_dictionary = manager.dict()
-    is_password_cracked = False
+    return passwords
 
-    total_files_processed = 0
 
-    for dictionary_file_name in os.listdir(dictionary_directory):
-        if is_password_cracked:
-            break
+def crack_zip_file_with_workers(zip_file_path, output_directory, keyspace=None, wordlist_path=None,
+                                port=DEFAULT_PORT, checkpoint_path=None,
+                                checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, resume=False,
+                                mask=None):
+    """Cracks ZIP file by leasing chunks of passwords to workers on other nodes (see distributed)
 
-        dictionary_file_path = os.path.join(dictionary_directory, dictionary_file_name)
+    The workers are started on every node with run_worker(zip_file_path, coordinator_host), each
+        with its own copy of the ZIP file (and of the wordlist, if any).
 
-        current_process = multiprocessing.Process(
-            target=crack_zip_file_with_dictionary,
-            args=(zip_file_path, output_directory, dictionary_file_path, return_dictionary,))
+    Args:
+        zip_file_path (string): ZIP file path (e.g. c:\temp\file.zip).
+        output_directory (string): Output directory where the password will be written to along
+            with uncompressed version of the file(e.g. c:\temp\cracked).
+        keyspace (Keyspace): The keyspace to generate possible passwords from (e.g.
+            Keyspace.brute_force(7) or a MarkovKeyspace).
+        wordlist_path (string): The external wordlist file path, uncompressed so the workers can
+            read it by byte range (e.g. c:\temp\rockyou.txt).
+        port (int): The port the workers connect to.
+        checkpoint_path (string): Optional checkpoint file where the completed ranges are recorded
+            (e.g. c:\temp\cracked\checkpoint.json).
+        checkpoint_interval (int): The min number of seconds between two checkpoint writes.
+        resume (bool): Whether to skip the work recorded in the checkpoint file by a previous run.
+        mask (Mask): The mask to generate possible passwords from (e.g. Mask("?u?l?l?l?d?d")).
 
-        processes.append(current_process)
-        current_process.start()
+    Returns:
+        bool: True if the password was found. Otherwise, False.
+    """
+
+    # Input validation
+    if not zip_file_path or zip_file_path.isspace():
+        raise ValueError("Zip file path cannot be none, empty or whitespace.")
+
+    if not output_directory or output_directory.isspace():
+        raise ValueError("Output file path cannot be none, empty or whitespace.")
+
+    if not keyspace and not wordlist_path and not mask:
+        raise ValueError("Keyspace, wordlist and mask cannot be all none.")
+
+    # Ensures the ZIP file EXISTS
+    if not os.path.isfile(zip_file_path):
+        raise IOError("Zip file '{0}' was not found.".format(zip_file_path))
 
-        print("\n[PID={0}] Start trying to crack ZIP file '{1}' with passwords in file '{2}'"
-              .format(current_process.pid, zip_file_path, dictionary_file_path))
+    # Ensures the output directory EXISTS
+    if not os.path.exists(output_directory):
+        raise IOError("Output directory '{0}' was not found.".format(output_directory))
 
-        # Resource governance
-        while len(processes) >= max_degree_of_parallelism:
-            if is_password_cracked:
-                break
+    # Ensures the wordlist EXISTS
+    if wordlist_path and not os.path.isfile(wordlist_path):
+        raise IOError("Wordlist '{0}' was not found.".format(wordlist_path))
 
-            for current_process in processes:
-                if not current_process.is_alive():
-                    processes.remove(current_process)
+    start = datetime.now()
 
-                    total_files_processed = total_files_processed + 1
+    checkpoint = Checkpoint(checkpoint_path, checkpoint_interval, resume) \
+        if checkpoint_path else None
 
-                    print("\n***** Dictionary files processed = {0} *****"
-                          .format(total_files_processed))
+    def on_chunk_done(key, size):
+        print("\n***** Chunk leased to a worker processed (Key = {0}) *****".format(key))
 
-                    if return_dictionary.get(current_process.pid, False):
-                        is_password_cracked = True
-                        break 
+    with Coordinator(zip_file_path, keyspace=keyspace, wordlist_path=wordlist_path, port=port,
+                     checkpoint=checkpoint, mask=mask) as coordinator:
+        print("***** [CrackingPassword] Waiting for workers on {0} *****"
+              .format(coordinator.address))
 
-                    if len(processes) < max_degree_of_parallelism:
-                        break
-            
-                time.sleep(0.1)
+        password = coordinator.serve(on_chunk_done)
 
-    # Wait on remaining processes to finish executing
-    for current_process in processes:
-        if is_password_cracked:
-            print("\nTerminating process '{0}'...".format(current_process.pid))
-            current_process.terminate()
-        else:
-            print("\nWaiting on process '{0}' to complete...".format(current_process.pid))
-            current_process.join()
+    # Password FOUND, extracting the file with it
+    is_password_cracked = password is not None and try_crack_zip_file_password(
+        zip_file_path, output_directory, password)
 
     end = datetime.now()
 
@@ -384,6 +1030,8 @@ def crack_zip_file(zip_file_path, output_directory, dictionary_directory):
         print("\n***** [CrackingPassword] Password NOT FOUND (Elapsed Time => {0}) *****"
               .format((end - start)))
 
+    return is_password_cracked
+
 
 def main():
     """Entry point
@@ -399,8 +1047,49 @@ def main():
 
     # create_dictionaries(dictionary_directory)
 
+    # Converts the text dictionaries to binary candidate stores (faster to load)
+    # convert_text_dictionaries(dictionary_directory, "C:\\Temp\\CrackZip\\bin")
+
     # crack_zip_file(zip_file_path, output_directory, dictionary_directory)
 
+    # External wordlist streamed in batches (optionally gzip/xz compressed)
+    # crack_zip_file(zip_file_path, output_directory, wordlist_path="C:\\Temp\\rockyou.txt.gz")
+
+    # Wordlist mangled with rules (e.g. capitalization, leetspeak, years), expanded in memory
+    # crack_zip_file(zip_file_path, output_directory, wordlist_path="C:\\Temp\\rockyou.txt.gz",
+    #                rules_path="common.rule")
+
+    # Brute force without dictionary files (passwords are generated in memory by each process)
+    # crack_zip_file(zip_file_path, output_directory, keyspace=Keyspace.brute_force(5))
+
+    # Mask attack (e.g. capital letter, 5 lowercase letters with pt-br accents and 2 digits)
+    # crack_zip_file(zip_file_path, output_directory,
+    #                mask=Mask("?u?1?1?1?1?1?d?d", {"1": "?láãçéêíóõú"}))
+
+    # Most probable passwords first (Markov model trained from a wordlist, lengths 1 - 8)
+    # crack_zip_file(zip_file_path, output_directory,
+    #                keyspace=MarkovKeyspace.train("C:\\Temp\\rockyou.txt.gz", 1, 8, max_level=30))
+
+    # Processes grown or shrunk while cracking, within 75% of the CPUs (cgroup quota aware)
+    # crack_zip_file(zip_file_path, output_directory, keyspace=Keyspace.brute_force(6),
+    #                governor=ParallelismGovernor(cpu_fraction=0.75))
+
+    # Throughput stats (JSON lines every 10 seconds and http://127.0.0.1:8000/metrics)
+    # crack_zip_file(zip_file_path, output_directory, keyspace=Keyspace.brute_force(6),
+    #                stats_path="C:\\Temp\\CrackZip\\stats.jsonl", metrics_port=8000)
+
+    # Several ZIP files at once (one path per line in the manifest), sharing the same passwords
+    # crack_zip_files("C:\\Temp\\CrackZip\\manifest.txt", output_directory,
+    #                 wordlist_path="C:\\Temp\\rockyou.txt.gz")
+
+    # Long runs: records the completed work and resumes from it after a restart
+    # crack_zip_file(zip_file_path, output_directory, keyspace=Keyspace.brute_force(6),
+    #                checkpoint_path="C:\\Temp\\CrackZip\\checkpoint.json", resume=True)
+
+    # Several nodes: the coordinator leases chunks to the workers started on every node
+    # crack_zip_file_with_workers(zip_file_path, output_directory, keyspace=Keyspace.brute_force(7))
+    # run_worker(zip_file_path, "coordinator-host", max_degree_of_parallelism=8)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,385 @@
+"""
+ZipCrypto (traditional PKWARE encryption) password verification engine.
+
+Every member encrypted with ZipCrypto starts with a 12-byte encryption header. Once decrypted, the
+    last byte of that header must match a "check byte" taken from the member's CRC-32 (or from the
+    modification time when the member uses a data descriptor). Running the key schedule over the
+    password and the 12-byte header is a few hundred byte operations, and it rejects ~255/256 wrong
+    passwords without touching the disk.
+
+Only candidates that survive the check byte are fully decrypted, decompressed and compared against
+    the member CRC-32, which rejects the remaining false positives.
+
+References:
+    - PKWARE APPNOTE.TXT, section 6.1 "Traditional PKWARE Encryption"
+
+"""
+
+import bz2
+import struct
+import zipfile
+import zlib
+
+
+# Local file header layout (see zipfile.structFileHeader)
+_LOCAL_FILE_HEADER_STRUCT = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_FILE_HEADER_SIGNATURE = b"PK\003\004"
+_LOCAL_FILE_HEADER_TIME_INDEX = 5
+_LOCAL_FILE_HEADER_FILE_NAME_LENGTH_INDEX = 10
+_LOCAL_FILE_HEADER_EXTRA_FIELD_LENGTH_INDEX = 11
+
+# General purpose bit flags
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+
+ENCRYPTION_HEADER_LENGTH = 12
+
+# Size of the blocks decrypted at a time while confirming a candidate password
+_CONFIRMATION_BLOCK_SIZE = 4096
+
+
+def _create_crc_table():
+    """Creates the CRC-32 lookup table used by the ZipCrypto key schedule
+
+    Returns:
+        tuple: The 256 entries of the CRC-32 table (polynomial 0xEDB88320).
+    """
+    table = []
+
+    for i in range(256):
+        crc = i
+
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xEDB88320
+            else:
+                crc = crc >> 1
+
+        table.append(crc)
+
+    return tuple(table)
+
+
+CRC_TABLE = _create_crc_table()
+
+
+def init_keys(password):
+    """Runs the ZipCrypto key schedule over a password
+
+    Args:
+        password (bytes): The candidate password.
+
+    Returns:
+        tuple: The (key0, key1, key2) internal state after processing the password.
+    """
+    crc_table = CRC_TABLE
+    key0 = 0x12345678
+    key1 = 0x23456789
+    key2 = 0x34567890
+
+    for c in password:
+        key0 = (key0 >> 8) ^ crc_table[(key0 ^ c) & 0xFF]
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = (key2 >> 8) ^ crc_table[(key2 ^ (key1 >> 24)) & 0xFF]
+
+    return key0, key1, key2
+
+
+def check_header(keys, encryption_header, check_byte):
+    """Decrypts the 12-byte encryption header and compares the last byte with the check byte
+
+    This is the fast-reject path: it only runs the key schedule, so wrong passwords are discarded
+        in memory and ~1/256 of them survive to the full confirmation.
+
+    Args:
+        keys (tuple): The (key0, key1, key2) state returned by init_keys for the password.
+        encryption_header (bytes): The 12-byte encryption header of the member.
+        check_byte (int): The expected value of the last decrypted header byte.
+
+    Returns:
+        tuple: The (key0, key1, key2) state after the header if the check byte matches, so the
+            confirmation can resume decrypting the member data. Otherwise, None.
+    """
+    crc_table = CRC_TABLE
+    key0, key1, key2 = keys
+    c = 0
+
+    for encrypted_byte in encryption_header:
+        temp = (key2 | 2) & 0xFFFF
+        c = encrypted_byte ^ (((temp * (temp ^ 1)) >> 8) & 0xFF)
+        key0 = (key0 >> 8) ^ crc_table[(key0 ^ c) & 0xFF]
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = (key2 >> 8) ^ crc_table[(key2 ^ (key1 >> 24)) & 0xFF]
+
+    if c != check_byte:
+        return None
+
+    return key0, key1, key2
+
+
+def check_password(password, encryption_header, check_byte):
+    """Runs the key schedule over a password and checks it against an encryption header
+
+    Args:
+        password (bytes): The candidate password.
+        encryption_header (bytes): The 12-byte encryption header of the member.
+        check_byte (int): The expected value of the last decrypted header byte.
+
+    Returns:
+        tuple: The (key0, key1, key2) state after the header if the check byte matches. Otherwise,
+            None.
+    """
+    return check_header(init_keys(password), encryption_header, check_byte)
+
+
+class ZipCryptoCipher:
+    """Stateful ZipCrypto stream cipher
+
+    Args:
+        password (bytes): The password used to initialize the keys.
+        keys (tuple): Optional (key0, key1, key2) state to resume from (e.g. the state returned by
+            check_password), which takes precedence over the password.
+    """
+
+    def __init__(self, password=b"", keys=None):
+        self.key0, self.key1, self.key2 = keys if keys else init_keys(password)
+
+    def decrypt(self, data):
+        """Decrypts a block of data, advancing the cipher state
+
+        Args:
+            data (bytes): The encrypted data.
+
+        Returns:
+            bytes: The decrypted data.
+        """
+        crc_table = CRC_TABLE
+        key0, key1, key2 = self.key0, self.key1, self.key2
+        result = bytearray(len(data))
+
+        for i, encrypted_byte in enumerate(data):
+            temp = (key2 | 2) & 0xFFFF
+            c = encrypted_byte ^ (((temp * (temp ^ 1)) >> 8) & 0xFF)
+            key0 = (key0 >> 8) ^ crc_table[(key0 ^ c) & 0xFF]
+            key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            key2 = (key2 >> 8) ^ crc_table[(key2 ^ (key1 >> 24)) & 0xFF]
+            result[i] = c
+
+        self.key0, self.key1, self.key2 = key0, key1, key2
+
+        return bytes(result)
+
+    def encrypt(self, data):
+        """Encrypts a block of data, advancing the cipher state
+
+        Args:
+            data (bytes): The plain data.
+
+        Returns:
+            bytes: The encrypted data.
+        """
+        crc_table = CRC_TABLE
+        key0, key1, key2 = self.key0, self.key1, self.key2
+        result = bytearray(len(data))
+
+        for i, c in enumerate(data):
+            temp = (key2 | 2) & 0xFFFF
+            result[i] = c ^ (((temp * (temp ^ 1)) >> 8) & 0xFF)
+            key0 = (key0 >> 8) ^ crc_table[(key0 ^ c) & 0xFF]
+            key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            key2 = (key2 >> 8) ^ crc_table[(key2 ^ (key1 >> 24)) & 0xFF]
+
+        self.key0, self.key1, self.key2 = key0, key1, key2
+
+        return bytes(result)
+
+
+def create_decompressor(compress_type):
+    """Creates an incremental decompressor for a member compression method
+
+    Args:
+        compress_type (int): The ZIP compression method (e.g. zipfile.ZIP_DEFLATED).
+
+    Returns:
+        object: An object exposing decompress(data), or None for stored members.
+    """
+    if compress_type == zipfile.ZIP_STORED:
+        return None
+
+    if compress_type == zipfile.ZIP_DEFLATED:
+        return zlib.decompressobj(-15)
+
+    if compress_type == zipfile.ZIP_BZIP2:
+        return bz2.BZ2Decompressor()
+
+    raise ValueError("Compression method '{0}' is not supported.".format(compress_type))
+
+
+def read_local_file_header(file, zip_info):
+    """Reads the local file header of a member, leaving the file at the start of its data
+
+    Args:
+        file (file): The archive opened in binary mode.
+        zip_info (zipfile.ZipInfo): The member entry from the central directory.
+
+    Returns:
+        tuple: The local file header fields (see zipfile.structFileHeader).
+    """
+    file.seek(zip_info.header_offset)
+    local_file_header = file.read(_LOCAL_FILE_HEADER_STRUCT.size)
+
+    if len(local_file_header) != _LOCAL_FILE_HEADER_STRUCT.size:
+        raise zipfile.BadZipFile("Truncated local file header for member '{0}'."
+                                 .format(zip_info.filename))
+
+    fields = _LOCAL_FILE_HEADER_STRUCT.unpack(local_file_header)
+
+    if fields[0] != _LOCAL_FILE_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile("Bad local file header signature for member '{0}'."
+                                 .format(zip_info.filename))
+
+    file.seek(fields[_LOCAL_FILE_HEADER_FILE_NAME_LENGTH_INDEX]
+              + fields[_LOCAL_FILE_HEADER_EXTRA_FIELD_LENGTH_INDEX], 1)
+
+    return fields
+
+
+class ZipCryptoEntry:
+    """ZipCrypto encrypted member loaded in memory
+
+    Args:
+        name (string): The member name inside the archive.
+        encryption_header (bytes): The 12-byte encryption header.
+        check_byte (int): The expected value of the last decrypted header byte.
+        crc (int): The CRC-32 of the uncompressed member.
+        compress_type (int): The ZIP compression method.
+        file_size (int): The uncompressed size of the member.
+        compress_size (int): The compressed size of the member, including the encryption header.
+        data (bytes): The encrypted member data that follows the encryption header, or None if
+            only the headers were loaded (confirmation is not possible in this case).
+    """
+
+    def __init__(self, name, encryption_header, check_byte, crc, compress_type, file_size,
+                 compress_size, data=None):
+        self.name = name
+        self.encryption_header = encryption_header
+        self.check_byte = check_byte
+        self.crc = crc
+        self.compress_type = compress_type
+        self.file_size = file_size
+        self.compress_size = compress_size
+        self.data = data
+
+    @classmethod
+    def from_zip_info(cls, file, zip_info, load_data=True):
+        """Reads the local file header, encryption header and data of an encrypted member
+
+        Args:
+            file (file): The archive opened in binary mode.
+            zip_info (zipfile.ZipInfo): The member entry from the central directory.
+            load_data (bool): Whether to load the encrypted member data required by confirm() or
+                only the headers required by check().
+
+        Returns:
+            ZipCryptoEntry: The member loaded in memory.
+        """
+        if not zip_info.flag_bits & FLAG_ENCRYPTED:
+            raise ValueError("Member '{0}' is not encrypted.".format(zip_info.filename))
+
+        fields = read_local_file_header(file, zip_info)
+
+        encryption_header = file.read(ENCRYPTION_HEADER_LENGTH)
+
+        if len(encryption_header) != ENCRYPTION_HEADER_LENGTH:
+            raise zipfile.BadZipFile("Truncated encryption header for member '{0}'."
+                                     .format(zip_info.filename))
+
+        data = None
+
+        if load_data:
+            data = file.read(zip_info.compress_size - ENCRYPTION_HEADER_LENGTH)
+
+            if len(data) != zip_info.compress_size - ENCRYPTION_HEADER_LENGTH:
+                raise zipfile.BadZipFile("Truncated data for member '{0}'."
+                                         .format(zip_info.filename))
+
+        # When the sizes and CRC are stored after the data (data descriptor), the check byte is
+        #   the high byte of the modification time instead of the high byte of the CRC-32
+        if zip_info.flag_bits & FLAG_DATA_DESCRIPTOR:
+            check_byte = (fields[_LOCAL_FILE_HEADER_TIME_INDEX] >> 8) & 0xFF
+        else:
+            check_byte = (zip_info.CRC >> 24) & 0xFF
+
+        return cls(zip_info.filename, encryption_header, check_byte, zip_info.CRC,
+                   zip_info.compress_type, zip_info.file_size, zip_info.compress_size, data)
+
+    def check(self, password):
+        """Fast-reject check of a candidate password against the encryption header
+
+        Args:
+            password (bytes): The candidate password.
+
+        Returns:
+            tuple: The cipher keys after the header if the check byte matches. Otherwise, None.
+        """
+        return check_password(password, self.encryption_header, self.check_byte)
+
+    def confirm(self, password, keys=None):
+        """Fully decrypts and decompresses the member and compares its CRC-32
+
+        Args:
+            password (bytes): The candidate password.
+            keys (tuple): Optional cipher keys returned by check() to skip the header decryption.
+
+        Returns:
+            bool: True if the member decrypts to the expected CRC-32 and size. Otherwise, False.
+        """
+        if self.data is None:
+            raise ValueError("Data of member '{0}' was not loaded.".format(self.name))
+
+        if keys is None:
+            keys = self.check(password)
+
+            if keys is None:
+                return False
+
+        cipher = ZipCryptoCipher(keys=keys)
+        decompressor = create_decompressor(self.compress_type)
+        crc = 0
+        size = 0
+
+        try:
+            for offset in range(0, len(self.data), _CONFIRMATION_BLOCK_SIZE):
+                block = cipher.decrypt(self.data[offset:offset + _CONFIRMATION_BLOCK_SIZE])
+
+                if decompressor:
+                    block = decompressor.decompress(block)
+
+                size = size + len(block)
+
+                # Wrong passwords usually inflate to garbage, so bail out as soon as possible
+                if size > self.file_size:
+                    return False
+
+                crc = zlib.crc32(block, crc)
+        except (zlib.error, OSError, EOFError):
+            # Wrong passwords produce corrupted compressed streams
+            return False
+
+        return size == self.file_size and crc == self.crc
+
+    def verify(self, password):
+        """Verifies a candidate password (fast-reject check followed by confirmation)
+
+        Args:
+            password (bytes): The candidate password.
+
+        Returns:
+            bool: True if the password decrypts the member. Otherwise, False.
+        """
+        keys = self.check(password)
+
+        if keys is None:
+            return False
+
+        return self.confirm(password, keys)
@@ -0,0 +1,332 @@
+"""
+Asynchronous TCP connect engine.
+
+A single event loop keeps thousands of non-blocking connects in flight instead of one blocking
+    connect per process:
+    - A fixed number of workers (the concurrency cap) take (host, port) targets from a shared
+        iterator, so targets are never materialized and at most max_concurrency sockets are open
+        at any point in time. The iterator can be asynchronous (e.g. hosts resolved as the scan
+        goes), so the connects in flight never drain while the next targets are awaited.
+    - Results are reported as soon as each connect completes, not in target order.
+    - Optionally, at most max_concurrency_per_host connects are in flight per host (e.g. scanning
+        many hosts without hammering any of them). The targets of a host at its cap are set aside
+        and connected by the workers of that host as they finish, so a slow host never holds the
+        workers the other hosts could use.
+    - Each port is classified as open (connect accepted), closed (connect refused, i.e. RST) or
+        filtered (no answer, or host/network unreachable). Other connect errors are local faults
+        (e.g. out of file descriptors) and fail the scan instead.
+    - The timeout adapts to the RTT of each host, measured from the connects that complete (see
+        rtt.py), so filtered ports cost a few RTTs instead of a fixed second on fast networks.
+        Connects that time out are retried up to max_retries times with a doubled timeout before
+        the port is reported as filtered.
+
+Example:
+    async for result in connect_all((("127.0.0.1", port) for port in range(1, 1025)), 500):
+        if result.state == PORT_OPEN:
+            print(result.port)
+
+Attention:
+    - Each connect in flight holds a socket, so the concurrency cap must stay below the max number
+        of open files of the process (e.g. ulimit -n).
+
+"""
+
+import asyncio
+import collections
+import errno
+import time
+
+from socket import AF_INET, AF_INET6, SOCK_STREAM, socket
+from typing import (AsyncIterable, AsyncIterator, Dict, Iterable, NamedTuple, Optional, Tuple,
+                    Union)
+
+from rtt import DEFAULT_INITIAL_TIMEOUT, DEFAULT_MAX_TIMEOUT, RttEstimator
+
+
+# Port states
+PORT_OPEN = "open"
+PORT_CLOSED = "closed"
+PORT_FILTERED = "filtered"
+
+# Max number of connects in flight
+DEFAULT_MAX_CONCURRENCY = 1000
+
+# Max number of seconds to wait for a connect to complete before the first RTT sample of a host
+DEFAULT_TIMEOUT = DEFAULT_INITIAL_TIMEOUT
+
+# Max number of retries of a connect that timed out
+DEFAULT_MAX_RETRIES = 1
+
+# Max number of targets set aside while their host is at its max_concurrency_per_host (beyond it,
+#   the workers wait for the host instead)
+_MAX_DEFERRED_TARGETS = 65536
+
+# Connect errors reporting the port as filtered (other errors are local faults, e.g. EMFILE)
+_UNREACHABLE_ERRNOS = (errno.EHOSTUNREACH, errno.ENETUNREACH)
+
+# Max number of RTT estimators kept (the oldest hosts are forgotten first, e.g. hosts whose ports
+#   were all scanned already)
+_MAX_RTT_ESTIMATORS = 65536
+
+
+class ConnectResult(NamedTuple):
+    """Result of a connect
+
+    """
+
+    host: str
+    port: int
+    state: str
+    latency: float  # Seconds (of the last attempt)
+    attempts: int = 1
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == PORT_OPEN
+
+
+async def _try_connect_once(target_host: str, target_port: int,
+                            timeout: float) -> Tuple[Optional[str], float]:
+    """Tries to connect to a target host and port once
+
+    Returns:
+        The (port state, seconds elapsed) of the attempt. The state is None if the attempt timed
+            out, as only timeouts are ambiguous (e.g. a packet lost).
+
+    """
+
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+
+    # IPv6 addresses (e.g. ::1) are the only ones with colons
+    family = AF_INET6 if ":" in target_host else AF_INET
+
+    with socket(family, SOCK_STREAM) as soc:
+        soc.setblocking(False)
+
+        try:
+            await asyncio.wait_for(loop.sock_connect(soc, (target_host, target_port)), timeout)
+            state = PORT_OPEN
+        except asyncio.TimeoutError:
+            state = None
+        except ConnectionRefusedError:
+            state = PORT_CLOSED
+        except OSError as ex:
+            # Local faults (e.g. out of file descriptors or buffers) say nothing about the port
+            if ex.errno not in _UNREACHABLE_ERRNOS:
+                raise
+
+            # Host or network unreachable (e.g. ICMP unreachable sent by a firewall)
+            state = PORT_FILTERED
+
+    return state, time.perf_counter() - start_time
+
+
+async def try_connect_async(target_host: str, target_port: int,
+                            rtt_estimator: Optional[RttEstimator] = None,
+                            max_retries: int = DEFAULT_MAX_RETRIES) -> ConnectResult:
+    """Tries to connect to a target host and port without blocking the event loop
+
+    Args:
+        target_host: The target host IP address (e.g. 10.0.0.1 or ::1).
+        target_port: The target port (e.g. 80).
+        rtt_estimator: The RTT estimator of the target host, which provides the timeout and is
+            updated with the RTT of the connect. Defaults to a new estimator.
+        max_retries: The max number of retries if the connect times out.
+
+    Returns:
+        The result of the connect.
+
+    """
+
+    if rtt_estimator is None:
+        rtt_estimator = RttEstimator()
+
+    for attempt in range(max_retries + 1):
+        state, latency = await _try_connect_once(target_host, target_port,
+                                                 rtt_estimator.get_timeout(attempt))
+
+        if state is None:
+            continue
+
+        # Accepted and refused connects took exactly one round trip
+        if state != PORT_FILTERED:
+            rtt_estimator.add_sample(latency)
+
+        return ConnectResult(target_host, target_port, state, latency, attempt + 1)
+
+    return ConnectResult(target_host, target_port, PORT_FILTERED, latency, max_retries + 1)
+
+
+async def connect_all(targets: Union[Iterable[Tuple[str, int]], AsyncIterable[Tuple[str, int]]],
+                      max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                      timeout: float = DEFAULT_TIMEOUT,
+                      max_retries: int = DEFAULT_MAX_RETRIES,
+                      rtt_estimators: Optional[Dict[str, RttEstimator]] = None,
+                      max_concurrency_per_host: Optional[int] = None)\
+        -> AsyncIterator[ConnectResult]:
+    """Tries to connect to every target, with up to max_concurrency connects in flight
+
+    Args:
+        targets: The (host IP address, port) targets, consumed lazily. Asynchronous targets (e.g.
+            hosts resolved as the scan goes) keep the connects in flight while the next targets
+            are awaited.
+        max_concurrency: The max number of connects in flight.
+        timeout: The max number of seconds to wait for a connect to complete before the first
+            RTT sample of its host.
+        max_retries: The max number of retries of a connect that timed out.
+        rtt_estimators: The RTT estimator of each host, created on the first connect to the host
+            (e.g. shared by several calls to keep the RTT of the hosts).
+        max_concurrency_per_host: The max number of connects in flight per host. Defaults to
+            max_concurrency.
+
+    Yields:
+        The result of every connect, as soon as it completes.
+
+    """
+
+    if max_concurrency < 1:
+        raise ValueError("Max concurrency must be greater than 0.")
+
+    if max_retries < 0:
+        raise ValueError("Max retries cannot be negative.")
+
+    if max_concurrency_per_host is not None and max_concurrency_per_host < 1:
+        raise ValueError("Max concurrency per host must be greater than 0.")
+
+    if rtt_estimators is None:
+        rtt_estimators = {}
+
+    if hasattr(targets, "__aiter__"):
+        targets = targets.__aiter__()
+
+        # An asynchronous generator cannot be reentered while it awaits, so one worker at a time
+        #   takes the next target
+        targets_lock = asyncio.Lock()
+
+        async def get_next_target():
+            async with targets_lock:
+                try:
+                    return await targets.__anext__()
+                except StopAsyncIteration:
+                    return None
+    else:
+        targets = iter(targets)
+        targets_lock = None
+
+        async def get_next_target():
+            # The iterator is shared by the workers (next() never awaits, so it is never reentered)
+            return next(targets, None)
+
+    # Semaphore of each host with connects in flight (or waiting), with its number of users
+    host_semaphores = {}
+
+    # Ports of the hosts at their cap, connected by the workers of the host as they finish
+    deferred_ports = {}
+    deferred_count = 0
+
+    # Bounded, so the workers wait for the results to be consumed
+    results = asyncio.Queue(maxsize=max_concurrency)
+
+    def get_rtt_estimator(target_host):
+        rtt_estimator = rtt_estimators.get(target_host)
+
+        if rtt_estimator is None:
+            if len(rtt_estimators) >= _MAX_RTT_ESTIMATORS:
+                del rtt_estimators[next(iter(rtt_estimators))]
+
+            rtt_estimator = rtt_estimators[target_host] = RttEstimator(
+                timeout, max_timeout=max(timeout, DEFAULT_MAX_TIMEOUT))
+
+        return rtt_estimator
+
+    async def connect_host(target_host, target_port):
+        nonlocal deferred_count
+
+        semaphore, user_count = host_semaphores.get(target_host) or (
+            asyncio.Semaphore(max_concurrency_per_host), 0)
+        host_semaphores[target_host] = (semaphore, user_count + 1)
+
+        try:
+            async with semaphore:
+                while True:
+                    await results.put(await try_connect_async(
+                        target_host, target_port, get_rtt_estimator(target_host), max_retries))
+
+                    # The slot of the host goes to its next deferred port
+                    ports = deferred_ports.get(target_host)
+
+                    if not ports:
+                        break
+
+                    target_port = ports.popleft()
+                    deferred_count = deferred_count - 1
+
+                    if not ports:
+                        del deferred_ports[target_host]
+        finally:
+            semaphore, user_count = host_semaphores[target_host]
+
+            if user_count > 1:
+                host_semaphores[target_host] = (semaphore, user_count - 1)
+            else:
+                del host_semaphores[target_host]
+
+    async def worker():
+        nonlocal deferred_count
+
+        try:
+            while True:
+                target = await get_next_target()
+
+                if target is None:
+                    break
+
+                target_host, target_port = target
+
+                if max_concurrency_per_host is None:
+                    await results.put(await try_connect_async(
+                        target_host, target_port, get_rtt_estimator(target_host), max_retries))
+                    continue
+
+                # A host at its cap already has workers, which connect the port once they finish
+                semaphore, _ = host_semaphores.get(target_host) or (None, 0)
+
+                if semaphore is not None and semaphore.locked() \
+                        and deferred_count < _MAX_DEFERRED_TARGETS:
+                    deferred_ports.setdefault(target_host, collections.deque()).append(target_port)
+                    deferred_count = deferred_count + 1
+                    continue
+
+                await connect_host(target_host, target_port)
+        except Exception as ex:
+            # Reported to the caller (e.g. an invalid target)
+            await results.put(ex)
+
+        await results.put(None)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max_concurrency)]
+    running_worker_count = len(workers)
+
+    try:
+        while running_worker_count:
+            result = await results.get()
+
+            if result is None:
+                running_worker_count = running_worker_count - 1
+                continue
+
+            if isinstance(result, Exception):
+                raise result
+
+            yield result
+    finally:
+        # Stops the connects in flight if the caller stops early
+        for current_worker in workers:
+            current_worker.cancel()
+
+        # Asynchronous targets (e.g. hosts being resolved) are closed once the worker taking the
+        #   next target, if any, has stopped
+        if targets_lock is not None:
+            async with targets_lock:
+                await targets.aclose()
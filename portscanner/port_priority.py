@@ -0,0 +1,193 @@
+"""
+Priority of the ports scanned, so the ports most likely to be open are probed first.
+
+The priority of a port blends two estimates of the fraction of hosts with the port open:
+    - A prior from the bundled ranking of the most frequently open TCP ports (TOP_PORTS), in the
+        order of the top ports of Nmap (nmap --top-ports 100, ranked by the open frequencies of
+        its nmap-services file). Only the ranking is bundled, not the frequencies: the prior is
+        modelled as decaying with the rank (Zipf's law), TOP_PORT_PRIOR / (rank + 1), and ports
+        out of the ranking get DEFAULT_PRIOR.
+    - The hit rates of earlier scans (see PortHistory), which take over as the number of probes
+        of a port grows: priority = (open count + PRIOR_WEIGHT * prior) / (probe count +
+        PRIOR_WEIGHT).
+
+Port history file (JSON):
+    {"version": 1, "ports": {"22": {"probe_count": 1200, "open_count": 830}, ...}}
+
+Ordered ports are swept in passes of growing size over all the hosts (see split_port_passes), so
+    the top ports of every host are probed before the less likely ports of any host, however many
+    hosts are scanned.
+
+Example:
+    port_history = PortHistory("c:\\temp\\scan\\port_history.json")
+    ports = prioritize_ports(PortSet.parse("1-65535"), port_history)[:100]
+
+    for port_pass in split_port_passes(ports):
+        print(port_pass)
+
+Attention:
+    - The prior is a model of the ranking, not a measured frequency, so it only orders the ports
+        until earlier scans have probed them.
+
+"""
+
+import json
+import os
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+# Port orders
+ORDER_KNOWN_FIRST = "known_first"
+ORDER_FREQUENCY = "frequency"
+ORDER_NUMERIC = "numeric"
+
+# Most frequently open TCP ports, most frequent first (order of nmap --top-ports 100)
+TOP_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993,
+    5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000,
+    8443, 8000, 32768, 554, 26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631,
+    631, 49153, 8081, 2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357, 427,
+    49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009, 7070, 5190, 3000, 5432,
+    1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+)
+
+# Prior of the first port of the ranking (the prior of the others decays with their rank)
+TOP_PORT_PRIOR = 0.5
+
+# Prior of the ports out of the ranking
+DEFAULT_PRIOR = 0.000001
+
+# Number of ports of the first pass over all the hosts (each pass is PASS_GROWTH times larger than
+#   the previous one, see split_port_passes)
+DEFAULT_FIRST_PASS_SIZE = 10
+
+PASS_GROWTH = 10
+
+# Number of probes the prior weighs against the hit rates of earlier scans
+PRIOR_WEIGHT = 20
+
+_TOP_PORT_RANKS = {port: rank for rank, port in enumerate(TOP_PORTS)}
+
+_HISTORY_VERSION = 1
+
+
+def get_prior(port: int) -> float:
+    """Returns the prior of a port, from its rank in TOP_PORTS (see the module docstring)
+
+    """
+
+    rank = _TOP_PORT_RANKS.get(port)
+
+    return DEFAULT_PRIOR if rank is None else TOP_PORT_PRIOR / (rank + 1)
+
+
+class PortHistory:
+    """Hit rates of the ports probed by earlier scans
+
+    Args:
+        history_path: Optional port history file path the hit rates are loaded from (if it exists)
+            and saved to (e.g. c:\\temp\\scan\\port_history.json).
+
+    """
+
+    def __init__(self, history_path: Optional[str] = None):
+        self.history_path = history_path
+        self.probe_counts: Dict[int, int] = {}
+        self.open_counts: Dict[int, int] = {}
+
+        if history_path and os.path.exists(history_path):
+            with open(history_path) as history_file:
+                history = json.load(history_file)
+
+            for port, counts in history["ports"].items():
+                self.probe_counts[int(port)] = counts["probe_count"]
+                self.open_counts[int(port)] = counts["open_count"]
+
+    def record(self, port: int, is_open: bool):
+        """Records the result of a probe
+
+        Args:
+            port: The port probed.
+            is_open: True if the port was open. Otherwise, False.
+
+        """
+
+        self.probe_counts[port] = self.probe_counts.get(port, 0) + 1
+
+        if is_open:
+            self.open_counts[port] = self.open_counts.get(port, 0) + 1
+
+    def save(self):
+        """Saves the hit rates to the port history file
+
+        """
+
+        if not self.history_path:
+            raise ValueError("Port history has no file path.")
+
+        history = {"version": _HISTORY_VERSION,
+                   "ports": {str(port): {"probe_count": probe_count,
+                                         "open_count": self.open_counts.get(port, 0)}
+                             for port, probe_count in sorted(self.probe_counts.items())}}
+
+        # Replaces the previous history only once the new one is completely written
+        temp_path = self.history_path + ".tmp"
+
+        with open(temp_path, "w") as history_file:
+            json.dump(history, history_file)
+
+        os.replace(temp_path, self.history_path)
+
+    def get_priority(self, port: int) -> float:
+        """Returns the priority of a port (estimated fraction of hosts with the port open)
+
+        """
+
+        return ((self.open_counts.get(port, 0) + PRIOR_WEIGHT * get_prior(port))
+                / (self.probe_counts.get(port, 0) + PRIOR_WEIGHT))
+
+
+def prioritize_ports(ports: Iterable[int], port_history: Optional[PortHistory] = None) -> List[int]:
+    """Orders ports by priority, the ports most likely to be open first
+
+    Args:
+        ports: The ports.
+        port_history: The hit rates of earlier scans. Defaults to the bundled ranking only.
+
+    Returns:
+        The ports, by descending priority (then ascending port number).
+
+    """
+
+    port_history = port_history or PortHistory()
+
+    return sorted(ports, key=lambda port: (-port_history.get_priority(port), port))
+
+
+def split_port_passes(ports: Sequence[int],
+                      first_pass_size: int = DEFAULT_FIRST_PASS_SIZE) -> List[List[int]]:
+    """Splits ordered ports into passes over all the hosts, PASS_GROWTH times larger every pass
+
+    Args:
+        ports: The ports, in order (e.g. see prioritize_ports).
+        first_pass_size: The number of ports of the first pass.
+
+    Returns:
+        The ports of every pass (e.g. the first 10 ports, the next 90, the next 900 and so on).
+
+    """
+
+    if first_pass_size < 1:
+        raise ValueError("First pass size must be greater than 0.")
+
+    port_passes = []
+    start = 0
+    end = first_pass_size
+
+    while start < len(ports):
+        port_passes.append(list(ports[start:end]))
+        start = end
+        end = end * PASS_GROWTH
+
+    return port_passes
@@ -1,6 +1,6 @@
 """
 This script demonstrates the following:
-    - How to scan a target host for known ports and other port ranges from 0 - 65536
+    - How to scan target hosts for known ports and other port ranges from 1 - 65535
 
 My primary focus while coding this script is LEARN how to program in Python. It is NOT my intention
     to cause any harm to 3rd parties (people and/or organizations)
@@ -17,9 +17,24 @@ Attention:
         - Physical Cores = 4
         - Logical Cores = 8
 
-    - It takes ~ 18 minutes to scan the ports for a given target host with current environment and
-        settings
-        - Increase the max_processes_factor_per_cpu to boost parallelism
+    - All the ports are scanned from a single event loop (see connect_engine.py), with up to
+        max_concurrency connects in flight
+        - Increase max_concurrency to boost parallelism (below the max number of open files)
+        - The timeout adapts to the RTT of the target host, so filtered ports cost a few RTTs (see
+            rtt.py). Decrease the initial timeout on fast networks (e.g. LAN)
+        - Host names are resolved concurrently to both IPv4 and IPv6 addresses (see resolver.py)
+        - Results are written by a single writer, in batches, to one JSON-lines or CSV file (see
+            result_sink.py), optionally along with a bitmap of the open ports of every host
+        - The ports scanned are compiled from a port specification (e.g. 1-1024,3306,!135 or
+            top-100, see port_set.py), and can be split into shards with the same number of ports
+            (e.g. one per machine)
+        - Several hosts can be scanned at once (lists, files and CIDR blocks, see targets.py): the
+            ports of the hosts are interleaved, and max_concurrency_per_host bounds the connects in
+            flight per host
+        - The ports can be probed by frequency, the ports most likely to be open first, from a
+            bundled ranking of the top ports refined by the hit rates of earlier scans (see
+            port_priority.py), and port_budget stops each host after its top-N ports (e.g. fast
+            triage sweeps). The top ports are swept over all the hosts before the next ones
 
 Recommendations:
     - AWS -> Enable GuardDuty and monitor threat event as the following
@@ -72,229 +87,220 @@ Recommendations:
 """
 
 
-import multiprocessing
+import asyncio
+import itertools
 import os
-import time
-import uuid
 
 from datetime import datetime
 from socket import *
-from typing import List
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Sequence, Union
 
+from connect_engine import (DEFAULT_MAX_CONCURRENCY, DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT,
+                            PORT_CLOSED, PORT_FILTERED, PORT_OPEN, connect_all)
+from port_priority import (ORDER_FREQUENCY, ORDER_KNOWN_FIRST, ORDER_NUMERIC, PortHistory,
+                           prioritize_ports, split_port_passes)
+from port_set import PortSet
+from resolver import Resolver
+from result_sink import FORMAT_JSONL, ResultSink
+from targets import DEFAULT_HOST_WINDOW, expand_targets, interleave_targets
 
-def get_max_degree_of_parallelism() -> int:
-    """Returns the max degree of parallelism for resource governance purposes
 
-    Returns:
-        The max degree of parallelism.
+# Ports scanned by default
+DEFAULT_PORTS = "1-65535"
 
-    """
-
-    logical_processor_count = os.cpu_count()
-
-    # 1     = 100% of CPUs will be used in a given point in time (1 process per CPU)
-    #           CAUTION: this setting may cause your CPU % to be 100% constantly until:
-    #               a) the dictionaries are created.
-    #               b) dictionary files are scanned to try to find the password.
-    # 0.5   = 50% of CPUs will be used in a given point in time
-    #           This may be useful to throttle CPU usage
-    max_processes_factor_per_cpu = 8
-    max_degree_of_parallelism = round((max_processes_factor_per_cpu * logical_processor_count), 0)
-
-    return max_degree_of_parallelism
-
-
-def start_process_for_range(output_directory: str,
-                            target_host: str,
-                            known_ports: List[int],
-                            target_port_start: int,
-                            target_port_end: int,
-                            running_processes: List[multiprocessing.Process])\
-        -> multiprocessing.Process:
-    """Starts a new process to scan a port range for a given target host
 
-    Args:
-        output_directory: The output directory where opened ports will be written too.
-        target_host: The target host (e.g. www.google.com)
-        known_ports: The list of known ports (e.g. 80/HTTP, etc.).
-        target_port_start: The target port range start number (e.g. 1).
-        target_port_end: The target port range end number (e.g. 1000).
-        running_processes: The list of processes currently running.
+def format_endpoint(host: str, port: int) -> str:
+    """Returns the {host}:{port} endpoint of a port ([{host}]:{port} for IPv6 addresses)
 
-    Returns:
-        The process that was just created and started.
+    """
 
-     """
+    if ":" in host:
+        return "[{0}]:{1}".format(host, port)
 
-    current_process = multiprocessing.Process(
-        target=try_connect_range,
-        args=(output_directory, target_host, known_ports, target_port_start, target_port_end,))
+    return "{0}:{1}".format(host, port)
 
-    running_processes.append(current_process)
 
-    current_process.start()
+async def resolve_windows(hosts: Iterable[str],
+                          resolver: Resolver,
+                          host_window: int = DEFAULT_HOST_WINDOW) -> AsyncIterator[List[str]]:
+    """Resolves hosts one window at a time, the next window being resolved while the current one
+    is scanned
 
-    return current_process
+    Args:
+        hosts: The hosts (host names or IP addresses).
+        resolver: The resolver.
+        host_window: The number of hosts per window.
 
+    Yields:
+        The IP addresses of the hosts of every window.
 
-def throttle_process_start(start_time: datetime,
-                           running_processes: List[multiprocessing.Process],
-                           completed_processes: List[multiprocessing.Process],
-                           max_degree_of_parallelism: int):
-    """Throttles creating new processes for resource government purposes
+    """
 
-    Args:
-        start_time: The overall scan start date/time.
-        running_processes: The running processes to be throttled.
-        completed_processes: The processes that completed execution so far.
-        max_degree_of_parallelism: The max degree of desired parallelism.
+    hosts = iter(hosts)
 
-    """
+    def resolve_next_window():
+        return asyncio.ensure_future(resolver.resolve_many(itertools.islice(hosts, host_window)))
 
-    is_throttled = False
+    pending_window = resolve_next_window()
 
-    while len(running_processes) >= max_degree_of_parallelism:
-        is_throttled = True
+    while True:
+        resolved_hosts = await pending_window
 
-        for current_process in running_processes:
-            if not current_process.is_alive():
-                completed_processes.append(current_process)
-                running_processes.remove(current_process)
+        if not resolved_hosts:
+            return
 
-                if len(running_processes) < max_degree_of_parallelism:
-                    break
+        pending_window = resolve_next_window()
 
-            time.sleep(0.1)
+        yield [address for _, addresses in resolved_hosts for address in addresses
+               if address != "255.255.255.255"]
 
-    # Tracks running time so far if throttling was applied
-    if is_throttled:
-        end_time = datetime.now()
-        print("\n--- Ranges => Completed = {0}; Running = {1}; Partial Elapsed Time = {2} ---"
-              .format(len(completed_processes), len(running_processes), end_time - start_time))
 
+async def scan_ports(result_sink: ResultSink,
+                     get_target_hosts: Callable[[], Iterable[str]],
+                     port_passes: Sequence[Sequence[int]],
+                     max_concurrency: int,
+                     max_concurrency_per_host: Optional[int],
+                     timeout: float,
+                     max_retries: int,
+                     resolver: Resolver,
+                     port_history: Optional[PortHistory] = None):
+    """Scans ports of target hosts
 
-def try_connect(target_host, target_port):
-    """Return a bool indicating whether the connection was successfully established or not.
+    Results are fed to the result sink as soon as they are found. Every pass of ports is probed on
+        all the hosts before the next pass, and every port of a pass on all the hosts of a window
+        before the next port, so the first ports are found first across hosts.
 
     Args:
-        target_host (string): The target host to try to connect
-        target_port (int): The target port to try to connect
-
-    Returns:
-        bool: True if the connection was successfully established to the target host and port.
-            Otherwise, it returns False
+        result_sink: The sink the results are written to.
+        get_target_hosts: Returns the target hosts (host names or IP addresses), once per pass.
+        port_passes: The ports scanned on every host, in order, split into passes over all the
+            hosts (e.g. see split_port_passes).
+        max_concurrency: The max number of connects in flight.
+        max_concurrency_per_host: The max number of connects in flight per host.
+        timeout: The max number of seconds to wait for a connect to complete before the first
+            RTT sample of its host.
+        max_retries: The max number of retries of a connect that timed out.
+        resolver: The resolver of the target hosts.
+        port_history: Optional hit rates of earlier scans, updated with the results (see
+            port_priority.py).
 
     """
 
-    try:
-        # AF_INET -> Create sockets of the IPv4 address family.
-        # Used to create connection-oriented sockets, which provide full error detection and
-        #   correction facilities.
-        with socket(AF_INET, SOCK_STREAM) as soc:
-            # Sets timeout to 1 second
-            soc.settimeout(1)
-
-            # .connect (()) because address is a tuple
-            # Connect to a TCP service listening on the Internet address (a 2-tuple (host, port)),
-            #   and return the socket object
-            soc.connect((target_host, target_port))
+    state_counts = {PORT_OPEN: 0, PORT_CLOSED: 0, PORT_FILTERED: 0}
+    address_count = 0
+    rtt_estimators = {}
 
-            print("\n***** Port '{0}' = OPEN *****".format(target_port))
+    async def generate_targets():
+        nonlocal address_count
 
-            return True
-    except:
-        # Exception: timed out.
-        return False
+        # Host names are resolved again for every pass, from the cache of the resolver
+        for pass_index, ports in enumerate(port_passes):
+            async for addresses in resolve_windows(get_target_hosts(), resolver):
+                if pass_index == 0:
+                    address_count = address_count + len(addresses)
 
+                for target in interleave_targets(addresses, ports, max(len(addresses), 1)):
+                    yield target
 
-def try_connect_range(output_directory: str,
-                      target_host: str,
-                      known_ports: List[multiprocessing.Process],
-                      target_port_start: int,
-                      target_port_end: int):
-    """ Tries to connect to a range of ports one at a time. If connection is successful, an entry
-    will be added to a file ({UUID}_open_ports.txt) in the output directory
-
-    Args:
-        output_directory: The output directory where opened ports will be written too.
-        target_host: The target host (e.g. www.google.com)
-        known_ports: The list of known ports (e.g. 80/HTTP, etc.).
-        target_port_start: The target port range start number (e.g. 1).
-        target_port_end: The target port range end number (e.g. 1000).
+    async with result_sink:
+        # A single connect_all call for all the passes and windows keeps max_concurrency connects
+        #   in flight across window boundaries
+        async for result in connect_all(generate_targets(), max_concurrency, timeout, max_retries,
+                                        rtt_estimators, max_concurrency_per_host):
+            state_counts[result.state] = state_counts[result.state] + 1
 
-    """
+            if port_history is not None:
+                port_history.record(result.port, result.state == PORT_OPEN)
 
-    current_process = multiprocessing.current_process()
-    random_uuid = uuid.uuid4()
-    process_open_port_file_name = "{0}_open_ports.txt".format(random_uuid)
-    process_open_port_file_path = os.path.join(output_directory, process_open_port_file_name)
+            if result.state == PORT_OPEN:
+                print("\n***** Port '{0}' = OPEN *****"
+                      .format(format_endpoint(result.host, result.port)))
 
-    # Scans target host for high ports
-    print("\n[PID {0}] Scanning host '{1}' ports from '{2}' to '{3}'"
-          .format(current_process.pid, target_host, target_port_start, target_port_end))
+            await result_sink.put(result)
 
-    for target_port in range(target_port_start, target_port_end):
-        if target_port not in known_ports:
-            if try_connect(target_host, target_port):
-                # Write opened ports to an output file named with UUID created above
-                with open(process_open_port_file_path, "a") as process_open_port_file:
-                    process_open_port_file.write("{0}\n".format(target_port))
+    print("\n--- Addresses = {0}; Ports => Open = {1}; Closed = {2}; Filtered = {3} ---"
+          .format(address_count, state_counts[PORT_OPEN], state_counts[PORT_CLOSED],
+                  state_counts[PORT_FILTERED]))
 
 
-def try_get_ipv4(target_host: str) -> object:
-    """Returns target host IPv4 address
+def scan(output_directory: str,
+         targets: Union[str, Iterable[str]],
+         max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+         timeout: float = DEFAULT_TIMEOUT,
+         max_retries: int = DEFAULT_MAX_RETRIES,
+         max_concurrency_per_host: Optional[int] = None,
+         family: int = AF_UNSPEC,
+         output_format: str = FORMAT_JSONL,
+         output_states: Iterable[str] = (PORT_OPEN,),
+         write_port_bitmap: bool = False,
+         ports: str = DEFAULT_PORTS,
+         shard_index: int = 0,
+         shard_count: int = 1,
+         port_order: str = ORDER_KNOWN_FIRST,
+         port_budget: Optional[int] = None):
+    """Scans target hosts for opened ports, known ports first (or by frequency)
 
     Args:
-        target_host (string): The target host to try to resolve the IPv4 address
-
-    Returns:
-        The IPv4 address of the target host, if it is able to resolve it. Otherwise, None.
+        output_directory: The output directory where opened ports will be written too.
+        targets: The target host (e.g. www.google.com), CIDR block (e.g. 10.0.0.0/24) or file
+            of targets, or a list of them (see targets.py).
+        max_concurrency: The max number of connects in flight.
+        timeout: The max number of seconds to wait for a connect to complete before the first
+            RTT sample of its host.
+        max_retries: The max number of retries of a connect that timed out (e.g. filtered).
+        max_concurrency_per_host: The max number of connects in flight per host. Defaults to
+            max_concurrency.
+        family: The address family of the addresses scanned (AF_INET, AF_INET6 or AF_UNSPEC for
+            both, e.g. dual-stack hosts).
+        output_format: The format of the results file (FORMAT_JSONL or FORMAT_CSV), written to
+            the output directory (scan_results.jsonl or scan_results.csv).
+        output_states: The port states written to the results file (e.g. open and filtered).
+        write_port_bitmap: True to also write the open ports of every host as bitmaps to the
+            output directory (open_ports.bin). Otherwise, False.
+        ports: The port specification of the ports scanned (e.g. 1-1024,3306,!135 or top-100,
+            see port_set.py).
+        shard_index: The shard of the ports scanned (e.g. by this process or machine).
+        shard_count: The number of shards the ports are split into, with the same number of ports.
+        port_order: The order the ports are probed in: ORDER_KNOWN_FIRST (known ports, then
+            ascending), ORDER_FREQUENCY (most likely open first, from the bundled ranking of the
+            top ports and the hit rates of earlier scans kept in the output directory,
+            port_history.json) or ORDER_NUMERIC (ascending).
+        port_budget: Optional max number of ports probed per host, the first ones in port order
+            (e.g. 100 with ORDER_FREQUENCY for a fast triage sweep).
 
     """
 
-    try:
-        target_ipv4 = gethostbyname(target_host)
+    if not output_directory or output_directory.isspace():
+        raise ValueError("Output directory host cannot be none, empty or whitespace.")
 
-        print("Host '{0}' IPv4 is '{1}'".format(target_host, target_ipv4))
+    if not os.path.exists(output_directory):
+        raise IOError("Output directory '{0}' was not found.".format(output_directory))
 
-        return target_ipv4
-    except Exception as ex:
-        print("Failed to resolve host '{0}' IPv4 address. Exception: {1}."
-              .format(target_host, ex))
+    if not targets or isinstance(targets, str) and targets.isspace():
+        raise ValueError("Targets cannot be none, empty or whitespace.")
 
-        return None
+    if max_concurrency < 1:
+        raise ValueError("Max concurrency must be greater than 0.")
 
+    if max_concurrency_per_host is not None and max_concurrency_per_host < 1:
+        raise ValueError("Max concurrency per host must be greater than 0.")
 
-def scan(output_directory: str,
-         target_host: str):
-    """Scans target host for opened ports using known ports as well as a broader ranges of ports
+    if not 0 <= shard_index < shard_count:
+        raise ValueError("Shard index must be between 0 and the shard count (exclusive).")
 
-    Returns:
-        True: The connection was successfully established to the target host and port
-        False: The connection was not successfully established to the target host and port
-    """
+    if port_order not in (ORDER_KNOWN_FIRST, ORDER_FREQUENCY, ORDER_NUMERIC):
+        raise ValueError("Port order '{0}' is not supported.".format(port_order))
 
-    if not output_directory or output_directory.isspace():
-        raise ValueError("Output directory host cannot be none, empty or whitespace.")
+    if port_budget is not None and port_budget < 1:
+        raise ValueError("Port budget must be greater than 0.")
 
-    if not os.path.exists(output_directory):
-        raise IOError("Output directory '{0}' was not found.".format(output_directory))
+    port_set = PortSet.parse(ports)
 
-    if not target_host or target_host.isspace():
-        raise ValueError("Target host cannot be none, empty or whitespace.")
+    if shard_count > 1:
+        port_set = port_set.shard(shard_count)[shard_index]
 
     start_time = datetime.now()
 
-    # Ensures IPv4 can be resolved
-    target_ipv4 = try_get_ipv4(target_host)
-
-    if not target_ipv4 or target_ipv4 == "255.255.255.255":
-        return
-
-    # Scans target host for common ports
-    print("\n***** Scanning host '{0}' COMMON ports (e.g. FTP, HTTP, etc.) *****"
-          .format(target_host))
-
     known_ports = [
         21,     # FTP
         23,     # Telnet
@@ -313,49 +319,53 @@ def scan(output_directory: str,
         3389,   # RPD (Windows)
     ]
 
-    known_open_port_file_path = os.path.join(output_directory, "known_open_ports.txt")
-
-    for target_port in known_ports:
-        if target_port < 1:
-            raise ValueError("Target must be greater than 0.")
-
-        if try_connect(target_host, target_port):
-            # Write opened ports to an output file
-            with open(known_open_port_file_path, "a") as process_open_port_file:
-                process_open_port_file.write("{0}\n".format(target_port))
-
-    # Max degree of parallelism for resource governance purposes
-    max_degree_of_parallelism = get_max_degree_of_parallelism()
-
-    # Scans target host for high ports
-    print("\n***** Scanning host '{0}' OTHER port ranges (Max Degree of Parallelism = {1}) *****"
-          .format(target_host, max_degree_of_parallelism))
-
-    # List of processes that will run to scan different port ranges
-    running_processes = []
-    completed_processes = []
-
-    target_port_start = 1
-    max_port_number = 65536  # (Exclusive)
-    range_step = 100
-
-    for target_port_end in range(range_step, max_port_number, range_step):
-        start_process_for_range(output_directory, target_host, known_ports, target_port_start,
-                                target_port_end, running_processes)
-
-        target_port_start = target_port_end
-
-        throttle_process_start(start_time, running_processes, completed_processes,
-                               max_degree_of_parallelism)
-
-    # Run the remaining port range
-    start_process_for_range(output_directory, target_host, known_ports, target_port_start,
-                            target_port_end, running_processes)
-
-    for process in running_processes:
-        process.join()
+    # Hit rates of earlier scans are kept along with the results
+    port_history = PortHistory(os.path.join(output_directory, "port_history.json"))
+    known_port_set = PortSet(known_ports)
+
+    if port_order == ORDER_FREQUENCY:
+        ordered_ports = prioritize_ports(port_set, port_history)
+    elif port_order == ORDER_NUMERIC:
+        ordered_ports = list(port_set)
+    else:
+        # Scans target hosts for common ports first, then all the other ports
+        ordered_ports = [p for p in known_ports if p in port_set] + [p for p in port_set
+                                                                     if p not in known_port_set]
+
+    if port_budget is not None:
+        ordered_ports = ordered_ports[:port_budget]
+
+    # The first ports are probed on all the hosts before the next ones (not only on the hosts of a
+    #   window, e.g. large CIDR blocks)
+    if port_order == ORDER_FREQUENCY:
+        port_passes = split_port_passes(ordered_ports)
+    elif port_order == ORDER_NUMERIC:
+        port_passes = [ordered_ports]
+    else:
+        known_port_count = sum(1 for p in ordered_ports if p in known_port_set)
+        port_passes = [port_pass for port_pass in (ordered_ports[:known_port_count],
+                                                   ordered_ports[known_port_count:]) if port_pass]
+
+    print("\n***** Scanning {0} ports, {1} order "
+          "(Max Concurrency = {2}; Per Host = {3}) *****"
+          .format(len(ordered_ports), port_order.upper(), max_concurrency,
+                  max_concurrency_per_host or max_concurrency))
+
+    # Hosts are expanded and resolved as the scan goes (e.g. large CIDR blocks), once per pass
+    if not isinstance(targets, str):
+        targets = list(targets)
+
+    result_sink = ResultSink(
+        os.path.join(output_directory, "scan_results.{0}".format(output_format)), output_format,
+        output_states,
+        os.path.join(output_directory, "open_ports.bin") if write_port_bitmap else None)
+
+    asyncio.run(scan_ports(result_sink, lambda: expand_targets(targets), port_passes,
+                           max_concurrency, max_concurrency_per_host, timeout, max_retries,
+                           Resolver(family=family), port_history))
+
+    port_history.save()
 
     end_time = datetime.now()
 
     print("\n***** Completed scanning (Elapsed Time => {0}) *****".format(end_time - start_time))
-
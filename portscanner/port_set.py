@@ -0,0 +1,205 @@
+"""
+Sets of ports compiled from a port specification into a 65536-bit bitmap.
+
+Port specification (comma-separated terms, e.g. 1-1024,3306,8000-9000,!135):
+    - 80: a single port.
+    - 8000-9000: a range of ports (inclusive). 8000- ends at 65535, -1024 starts at 1, and - is
+        all the ports (1-65535).
+    - top-100: the most frequently open ports (see port_priority.TOP_PORTS).
+    - !135, !8000-8080, !top-10: ports excluded, whatever their position in the specification.
+
+The bitmap gives O(1) membership checks, iterates the ports in ascending order without gaps or
+    duplicates, and splits into shards with the same number of ports (e.g. one per process or
+    machine).
+
+Example:
+    port_set = PortSet.parse("1-1024,3306,8000-9000,!135")
+
+    if 3306 in port_set:
+        print(len(port_set))
+
+"""
+
+import re
+
+from typing import Iterable, Iterator, List
+
+from port_priority import TOP_PORTS
+
+
+# Max port number (inclusive)
+MAX_PORT_NUMBER = 65535
+
+# Number of bytes of a port bitmap (65536 ports)
+PORT_BITMAP_SIZE = (MAX_PORT_NUMBER + 1) // 8
+
+_RANGE_PATTERN = re.compile(r"^(\d*)-(\d*)$")
+_TOP_PATTERN = re.compile(r"^top-?(\d+)$", re.IGNORECASE)
+
+
+def _parse_port(port: str, term: str) -> int:
+    """Parses the port of a term
+
+    """
+
+    if not port.isdigit() or not 1 <= int(port) <= MAX_PORT_NUMBER:
+        raise ValueError("Port '{0}' of '{1}' must be between 1 and {2}."
+                         .format(port, term, MAX_PORT_NUMBER))
+
+    return int(port)
+
+
+def _parse_term(term: str) -> Iterable[int]:
+    """Parses a term of a port specification (without !)
+
+    Returns:
+        The ports of the term.
+
+    """
+
+    top_match = _TOP_PATTERN.match(term)
+
+    if top_match:
+        top_port_count = int(top_match.group(1))
+
+        if not 1 <= top_port_count <= len(TOP_PORTS):
+            raise ValueError("Top port count of '{0}' must be between 1 and {1}."
+                             .format(term, len(TOP_PORTS)))
+
+        return TOP_PORTS[:top_port_count]
+
+    range_match = _RANGE_PATTERN.match(term)
+
+    if range_match:
+        start, end = range_match.groups()
+        start = _parse_port(start, term) if start else 1
+        end = _parse_port(end, term) if end else MAX_PORT_NUMBER
+
+        if start > end:
+            raise ValueError("Range '{0}' starts after its end.".format(term))
+
+        return range(start, end + 1)
+
+    return [_parse_port(term, term)]
+
+
+class PortSet:
+    """Set of ports stored as a 65536-bit bitmap
+
+    Args:
+        ports: The ports of the set.
+
+    """
+
+    def __init__(self, ports: Iterable[int] = ()):
+        self.bitmap = bytearray(PORT_BITMAP_SIZE)
+        self._count = 0
+
+        for port in ports:
+            self.add(port)
+
+    @classmethod
+    def parse(cls, port_specification: str) -> "PortSet":
+        """Compiles a port specification (e.g. 1-1024,3306,8000-9000,!135)
+
+        Args:
+            port_specification: The port specification.
+
+        Returns:
+            The set of ports.
+
+        """
+
+        if not port_specification or port_specification.isspace():
+            raise ValueError("Port specification cannot be none, empty or whitespace.")
+
+        port_set = cls()
+        excluded_ports = []
+
+        for term in port_specification.split(","):
+            term = term.strip()
+
+            if term.startswith("!"):
+                excluded_ports.extend(_parse_term(term[1:].strip()))
+            else:
+                for port in _parse_term(term):
+                    port_set.add(port)
+
+        for port in excluded_ports:
+            port_set.discard(port)
+
+        return port_set
+
+    @classmethod
+    def from_bytes(cls, bitmap: bytes) -> "PortSet":
+        """Creates a set of ports from a bitmap (see PortSet.bitmap)
+
+        """
+
+        if len(bitmap) != PORT_BITMAP_SIZE:
+            raise ValueError("Port bitmap must have {0} bytes.".format(PORT_BITMAP_SIZE))
+
+        port_set = cls()
+        port_set.bitmap[:] = bitmap
+        port_set._count = sum(bin(byte).count("1") for byte in bitmap)
+
+        return port_set
+
+    def __contains__(self, port: int) -> bool:
+        return 0 <= port <= MAX_PORT_NUMBER and bool(self.bitmap[port >> 3] >> (port & 7) & 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        for i, byte in enumerate(self.bitmap):
+            # Most bytes of sparse sets are empty
+            if byte:
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield i * 8 + bit
+
+    def add(self, port: int):
+        """Adds a port to the set
+
+        """
+
+        if not 0 <= port <= MAX_PORT_NUMBER:
+            raise ValueError("Port must be between 0 and {0}.".format(MAX_PORT_NUMBER))
+
+        mask = 1 << (port & 7)
+
+        if not self.bitmap[port >> 3] & mask:
+            self.bitmap[port >> 3] |= mask
+            self._count = self._count + 1
+
+    def discard(self, port: int):
+        """Removes a port from the set, if present
+
+        """
+
+        if port in self:
+            self.bitmap[port >> 3] &= ~(1 << (port & 7)) & 0xFF
+            self._count = self._count - 1
+
+    def shard(self, shard_count: int) -> List["PortSet"]:
+        """Splits the set into shards with the same number of ports (give or take one)
+
+        Args:
+            shard_count: The number of shards.
+
+        Returns:
+            The shards, each with a contiguous run of the ports in ascending order.
+
+        """
+
+        if shard_count < 1:
+            raise ValueError("Shard count must be greater than 0.")
+
+        shards = [PortSet() for _ in range(shard_count)]
+        count = len(self)
+
+        for rank, port in enumerate(self):
+            shards[rank * shard_count // count].add(port)
+
+        return shards
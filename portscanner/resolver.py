@@ -0,0 +1,175 @@
+"""
+Asynchronous bulk name resolution with a TTL cache.
+
+Host names are resolved with getaddrinfo on the event loop's thread pool, so many hosts are
+    resolved concurrently without blocking the connects in flight:
+    - Both IPv4 (A) and IPv6 (AAAA) addresses are returned (unless a single address family is
+        requested), so dual-stack hosts are scanned on both.
+    - Answers are cached for ttl seconds, and concurrent lookups of the same host share a single
+        getaddrinfo call.
+    - IP addresses are returned as is (no lookup).
+
+Example:
+    resolver = Resolver()
+
+    for host, addresses in await resolver.resolve_many(["www.google.com", "10.0.0.1"]):
+        print(host, addresses)
+
+Attention:
+    - getaddrinfo does not return the TTL of the DNS records, so every answer is cached for the
+        same (configurable) number of seconds.
+
+"""
+
+import asyncio
+import ipaddress
+import time
+
+from socket import AF_INET, AF_INET6, AF_UNSPEC, SOCK_STREAM
+from typing import Dict, Iterable, List, Tuple
+
+
+# Number of seconds answers are cached
+DEFAULT_TTL = 300
+
+# Max number of lookups in flight
+DEFAULT_MAX_CONCURRENCY = 64
+
+# Max number of answers cached (the oldest answers are evicted first)
+_MAX_CACHE_SIZE = 65536
+
+_FAMILY_VERSIONS = {AF_INET: 4, AF_INET6: 6}
+
+
+class Resolver:
+    """Asynchronous resolver with a TTL cache
+
+    Args:
+        ttl: The number of seconds answers are cached.
+        family: The address family (AF_INET, AF_INET6 or AF_UNSPEC for both).
+        max_concurrency: The max number of lookups in flight.
+
+    """
+
+    def __init__(self,
+                 ttl: float = DEFAULT_TTL,
+                 family: int = AF_UNSPEC,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        if ttl < 0:
+            raise ValueError("TTL cannot be negative.")
+
+        if family not in (AF_INET, AF_INET6, AF_UNSPEC):
+            raise ValueError("Address family '{0}' is not supported.".format(family))
+
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be greater than 0.")
+
+        self.ttl = ttl
+        self.family = family
+        self.max_concurrency = max_concurrency
+        self.lookup_count = 0
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+        self._pending_lookups: Dict[str, asyncio.Future] = {}
+
+    def _get_cached(self, host: str):
+        """Returns the cached addresses of a host, if they did not expire
+
+        """
+
+        cached = self._cache.get(host)
+
+        if cached is None:
+            return None
+
+        expiration_time, addresses = cached
+
+        if expiration_time <= time.monotonic():
+            del self._cache[host]
+            return None
+
+        return addresses
+
+    async def _lookup(self, host: str) -> List[str]:
+        """Resolves a host name with getaddrinfo and caches the answer
+
+        """
+
+        self.lookup_count = self.lookup_count + 1
+        loop = asyncio.get_running_loop()
+
+        try:
+            address_infos = await loop.getaddrinfo(host, None, family=self.family,
+                                                   type=SOCK_STREAM)
+
+            # Several entries per address are returned on some platforms (e.g. one per protocol)
+            addresses = list(dict.fromkeys(address_info[4][0] for address_info in address_infos))
+        except OSError as ex:
+            print("Failed to resolve host '{0}'. Exception: {1}.".format(host, ex))
+
+            # Failures are cached too, so unresolvable hosts are not looked up again
+            addresses = []
+        finally:
+            del self._pending_lookups[host]
+
+        if len(self._cache) >= _MAX_CACHE_SIZE:
+            del self._cache[next(iter(self._cache))]
+
+        self._cache[host] = (time.monotonic() + self.ttl, addresses)
+
+        return addresses
+
+    async def resolve(self, host: str) -> List[str]:
+        """Resolves a host to its IP addresses
+
+        Args:
+            host: The host name or IP address (e.g. www.google.com).
+
+        Returns:
+            The IP addresses of the host, or an empty list if the host cannot be resolved.
+
+        """
+
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            address = None
+
+        if address is not None:
+            if self.family != AF_UNSPEC and address.version != _FAMILY_VERSIONS[self.family]:
+                return []
+
+            return [str(address)]
+
+        addresses = self._get_cached(host)
+
+        if addresses is not None:
+            return addresses
+
+        # Concurrent lookups of the same host share the first one
+        pending_lookup = self._pending_lookups.get(host)
+
+        if pending_lookup is None:
+            pending_lookup = self._pending_lookups[host] = asyncio.ensure_future(
+                self._lookup(host))
+
+        # Cancelling a caller does not cancel the lookup shared with the other callers
+        return await asyncio.shield(pending_lookup)
+
+    async def resolve_many(self, hosts: Iterable[str]) -> List[Tuple[str, List[str]]]:
+        """Resolves hosts concurrently, with up to max_concurrency lookups in flight
+
+        Args:
+            hosts: The host names or IP addresses.
+
+        Returns:
+            The (host, IP addresses) of every host, in order.
+
+        """
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def resolve(host):
+            async with semaphore:
+                return host, await self.resolve(host)
+
+        return list(await asyncio.gather(*(resolve(host) for host in hosts)))
@@ -0,0 +1,228 @@
+"""
+Single writer of scan results.
+
+All the results of a scan are fed to one sink through a queue, and a single task writes them:
+    - Results are written as JSON lines or CSV rows (host, port, state, latency, timestamp) to a
+        single file opened once for the whole scan.
+    - Writes are batched: a batch is written and flushed once batch_size results are queued, or
+        flush_interval seconds after the previous flush, whichever comes first.
+    - Optionally, the open ports of every host are also written as a compact binary bitmap (one
+        bit per port, 8 KB per host) once the scan completes.
+
+Results file (JSON lines):
+    {"host": "10.0.0.1", "port": 22, "state": "open", "latency": 0.000412,
+     "timestamp": "2024-01-01T10:00:00.123"}
+
+Port bitmap file (one record per host with open ports):
+    - Host length (unsigned short, little-endian), host (UTF-8).
+    - 8192 bytes: bit (port % 8) of byte (port // 8) is set if the port is open.
+
+Example:
+    async with ResultSink("c:\\temp\\scan\\results.jsonl") as result_sink:
+        async for result in connect_all(targets):
+            await result_sink.put(result)
+
+"""
+
+import asyncio
+import csv
+import json
+import struct
+import time
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from connect_engine import PORT_OPEN, ConnectResult
+from port_set import PORT_BITMAP_SIZE, PortSet
+
+
+# Output formats
+FORMAT_JSONL = "jsonl"
+FORMAT_CSV = "csv"
+
+# Max number of results per write
+DEFAULT_BATCH_SIZE = 1000
+
+# Max number of seconds between two flushes
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_FIELDS = ("host", "port", "state", "latency", "timestamp")
+
+
+def read_port_bitmaps(port_bitmap_path: str) -> Iterator[Tuple[str, List[int]]]:
+    """Reads a port bitmap file
+
+    Args:
+        port_bitmap_path: The port bitmap file path (e.g. c:\\temp\\scan\\open_ports.bin).
+
+    Yields:
+        The (host, open ports) of every host.
+
+    """
+
+    with open(port_bitmap_path, "rb") as port_bitmap_file:
+        while True:
+            header = port_bitmap_file.read(2)
+
+            if not header:
+                return
+
+            host = port_bitmap_file.read(struct.unpack("<H", header)[0]).decode()
+
+            yield host, list(PortSet.from_bytes(port_bitmap_file.read(PORT_BITMAP_SIZE)))
+
+
+class ResultSink:
+    """Single writer of scan results, fed through a queue
+
+    Args:
+        output_path: The results file path (e.g. c:\\temp\\scan\\results.jsonl).
+        output_format: The format of the results file (FORMAT_JSONL or FORMAT_CSV).
+        states: The port states written to the results file (e.g. PORT_OPEN).
+        port_bitmap_path: Optional file path the open ports of every host are written to as
+            bitmaps (e.g. c:\\temp\\scan\\open_ports.bin).
+        batch_size: The max number of results per write.
+        flush_interval: The max number of seconds between two flushes.
+
+    """
+
+    def __init__(self,
+                 output_path: str,
+                 output_format: str = FORMAT_JSONL,
+                 states: Iterable[str] = (PORT_OPEN,),
+                 port_bitmap_path: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        if output_format not in (FORMAT_JSONL, FORMAT_CSV):
+            raise ValueError("Output format '{0}' is not supported.".format(output_format))
+
+        if batch_size < 1:
+            raise ValueError("Batch size must be greater than 0.")
+
+        if flush_interval <= 0:
+            raise ValueError("Flush interval must be greater than 0.")
+
+        self.output_path = output_path
+        self.output_format = output_format
+        self.states = frozenset(states)
+        self.port_bitmap_path = port_bitmap_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written_count = 0
+        self.write_count = 0
+        self._open_ports: Dict[str, PortSet] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def start(self):
+        """Starts the writer task
+
+        """
+
+        self._queue = asyncio.Queue(maxsize=self.batch_size * 2)
+        self._writer_task = asyncio.ensure_future(self._write_results())
+
+    async def put(self, result: ConnectResult):
+        """Queues a result, timestamped now (waits if the writer is behind)
+
+        Args:
+            result: The result of a connect.
+
+        """
+
+        if self._writer_task.done():
+            # Raises the failure of the writer (e.g. disk full)
+            self._writer_task.result()
+
+        if result.state in self.states or result.state == PORT_OPEN and self.port_bitmap_path:
+            await self._queue.put((result, datetime.now().isoformat(timespec="milliseconds")))
+
+    async def close(self):
+        """Writes the results queued, then the port bitmaps, and stops the writer task
+
+        """
+
+        await self._queue.put(None)
+        await self._writer_task
+
+        if self.port_bitmap_path:
+            with open(self.port_bitmap_path, "wb") as port_bitmap_file:
+                for host, open_ports in self._open_ports.items():
+                    encoded_host = host.encode()
+                    port_bitmap_file.write(struct.pack("<H", len(encoded_host)) + encoded_host)
+                    port_bitmap_file.write(open_ports.bitmap)
+
+    async def _write_results(self):
+        """Writes the queued results in batches until None is queued
+
+        """
+
+        with open(self.output_path, "a", newline="") as output_file:
+            csv_writer = None
+            rows = []
+
+            if self.output_format == FORMAT_CSV:
+                csv_writer = csv.writer(output_file)
+
+                # Appending to an existing file keeps its header
+                if output_file.tell() == 0:
+                    csv_writer.writerow(_FIELDS)
+
+            def write_rows():
+                if csv_writer is not None:
+                    csv_writer.writerows(rows)
+                else:
+                    output_file.write("".join(json.dumps(dict(zip(_FIELDS, row))) + "\n"
+                                              for row in rows))
+
+                output_file.flush()
+
+                self.written_count = self.written_count + len(rows)
+                self.write_count = self.write_count + 1
+                rows.clear()
+
+            flush_time = time.monotonic() + self.flush_interval
+            is_closed = False
+
+            while not is_closed:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(),
+                                                  max(flush_time - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    item = ()
+
+                if item is None:
+                    is_closed = True
+                elif item:
+                    result, timestamp = item
+
+                    if result.state == PORT_OPEN and self.port_bitmap_path:
+                        open_ports = self._open_ports.get(result.host)
+
+                        if open_ports is None:
+                            open_ports = self._open_ports[result.host] = PortSet()
+
+                        open_ports.add(result.port)
+
+                    # Results only kept in the bitmaps do not flush a partial batch
+                    if result.state not in self.states:
+                        continue
+
+                    rows.append((result.host, result.port, result.state,
+                                 round(result.latency, 6), timestamp))
+
+                    if len(rows) < self.batch_size:
+                        continue
+
+                if rows:
+                    write_rows()
+
+                flush_time = time.monotonic() + self.flush_interval
@@ -0,0 +1,96 @@
+"""
+Round-trip time (RTT) estimation of a host, to adapt the connect timeout to the network.
+
+The timeout is computed the way TCP computes its retransmission timeout (RFC 6298):
+    - Every connect that completes (accepted or refused) is an RTT sample.
+    - The smoothed RTT and the RTT variance are updated with each sample, and the timeout is the
+        smoothed RTT plus 4 times the variance, bounded by min_timeout and max_timeout.
+    - The initial timeout is used until the first sample, and each retry of a connect that timed
+        out doubles the timeout (up to max_timeout).
+
+Example:
+    rtt_estimator = RttEstimator()
+    rtt_estimator.add_sample(0.0008)
+    timeout = rtt_estimator.get_timeout()
+
+"""
+
+from typing import Optional
+
+
+# Timeout before the first RTT sample (seconds)
+DEFAULT_INITIAL_TIMEOUT = 1.0
+
+# Bounds of the timeout (seconds). The lower bound absorbs the event loop latency of scans with
+#   thousands of connects in flight, which is added to the RTT of LAN hosts.
+DEFAULT_MIN_TIMEOUT = 0.1
+DEFAULT_MAX_TIMEOUT = 3.0
+
+# Gains of the smoothed RTT and RTT variance (RFC 6298)
+_ALPHA = 1 / 8
+_BETA = 1 / 4
+
+
+class RttEstimator:
+    """Smoothed RTT and RTT variance of a host
+
+    Args:
+        initial_timeout: The timeout before the first RTT sample (seconds).
+        min_timeout: The min timeout (seconds).
+        max_timeout: The max timeout (seconds).
+
+    """
+
+    def __init__(self,
+                 initial_timeout: float = DEFAULT_INITIAL_TIMEOUT,
+                 min_timeout: float = DEFAULT_MIN_TIMEOUT,
+                 max_timeout: float = DEFAULT_MAX_TIMEOUT):
+        if not 0 < min_timeout <= max_timeout:
+            raise ValueError("Min timeout must be greater than 0 and lower than max timeout.")
+
+        if initial_timeout <= 0:
+            raise ValueError("Initial timeout must be greater than 0.")
+
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.smoothed_rtt: Optional[float] = None
+        self.rtt_variance: Optional[float] = None
+        self.sample_count = 0
+
+    def add_sample(self, rtt: float):
+        """Updates the smoothed RTT and RTT variance with an RTT sample
+
+        Args:
+            rtt: The RTT of a connect that completed (seconds).
+
+        """
+
+        if self.smoothed_rtt is None:
+            self.smoothed_rtt = rtt
+            self.rtt_variance = rtt / 2
+        else:
+            self.rtt_variance = (1 - _BETA) * self.rtt_variance + _BETA * abs(
+                self.smoothed_rtt - rtt)
+            self.smoothed_rtt = (1 - _ALPHA) * self.smoothed_rtt + _ALPHA * rtt
+
+        self.sample_count = self.sample_count + 1
+
+    def get_timeout(self, attempt: int = 0) -> float:
+        """Returns the timeout of a connect attempt
+
+        Args:
+            attempt: The number of attempts that timed out before (0 = first attempt).
+
+        Returns:
+            The timeout (seconds).
+
+        """
+
+        if self.smoothed_rtt is None:
+            timeout = self.initial_timeout
+        else:
+            timeout = self.smoothed_rtt + 4 * self.rtt_variance
+
+        # Backs off exponentially on retries
+        return min(max(timeout * 2 ** attempt, self.min_timeout), self.max_timeout)
@@ -0,0 +1,118 @@
+"""
+Lazy expansion of scan targets.
+
+Targets can be any mix of:
+    - Host names or IP addresses (e.g. www.google.com, 10.0.0.1).
+    - CIDR blocks (e.g. 10.0.0.0/24), expanded to their usable host addresses.
+    - Files with one target (host, IP address or CIDR block) per line, where empty lines and
+        lines starting with # are ignored.
+
+Targets are expanded lazily (generators all the way down), so scanning a /8 never materializes its
+    16 million addresses. (host, port) pairs are interleaved across a window of hosts, so each
+    host only sees a fraction of the connects in flight.
+
+Example:
+    hosts = expand_targets(["10.0.0.0/24", "c:\\temp\\hosts.txt", "www.google.com"])
+
+    for host, port in interleave_targets(hosts, range(1, 1025)):
+        print(host, port)
+
+"""
+
+import ipaddress
+import itertools
+import os
+
+from typing import Iterable, Iterator, Sequence, Tuple, Union
+
+
+# Number of hosts whose ports are interleaved
+DEFAULT_HOST_WINDOW = 256
+
+
+def _expand_target(target: str) -> Iterator[str]:
+    """Expands a target to hosts
+
+    Args:
+        target: The host, IP address, CIDR block or file path.
+
+    Yields:
+        The hosts (host names or IP addresses).
+
+    """
+
+    target = target.strip()
+
+    if not target or target.startswith("#"):
+        return
+
+    if os.path.isfile(target):
+        with open(target) as target_file:
+            for line in target_file:
+                yield from _expand_target(line)
+
+        return
+
+    if "/" in target:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError as ex:
+            raise ValueError("Target '{0}' is not a valid CIDR block.".format(target)) from ex
+
+        yield from (str(address) for address in network.hosts())
+
+        return
+
+    yield target
+
+
+def expand_targets(targets: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Expands targets (hosts, IP addresses, CIDR blocks and files) to hosts, lazily
+
+    Args:
+        targets: The target, or targets.
+
+    Yields:
+        The hosts (host names or IP addresses), in order.
+
+    """
+
+    if isinstance(targets, str):
+        targets = [targets]
+
+    for target in targets:
+        yield from _expand_target(target)
+
+
+def interleave_targets(hosts: Iterable[str],
+                       ports: Sequence[int],
+                       host_window: int = DEFAULT_HOST_WINDOW) -> Iterator[Tuple[str, int]]:
+    """Interleaves the ports of a window of hosts, so consecutive connects target different hosts
+
+    Only host_window hosts are taken from the hosts at a time (the next hosts are taken once all
+        the ports of the window are yielded).
+
+    Args:
+        hosts: The hosts (e.g. see expand_targets).
+        ports: The ports of every host, in order.
+        host_window: The number of hosts interleaved.
+
+    Yields:
+        The (host, port) targets.
+
+    """
+
+    if host_window < 1:
+        raise ValueError("Host window must be greater than 0.")
+
+    hosts = iter(hosts)
+
+    while True:
+        window = list(itertools.islice(hosts, host_window))
+
+        if not window:
+            return
+
+        for port in ports:
+            for host in window:
+                yield host, port
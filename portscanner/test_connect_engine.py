@@ -0,0 +1,366 @@
+"""Tests for the asynchronous connect engine.
+
+"""
+
+import asyncio
+import errno
+import os
+import socket
+import unittest
+
+import pytest
+
+import connect_engine
+
+from connect_engine import (PORT_CLOSED, PORT_FILTERED, PORT_OPEN, connect_all,
+                            try_connect_async)
+from rtt import RttEstimator
+
+
+def get_closed_port() -> int:
+    """Returns a local port nothing listens on
+
+    """
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as soc:
+        soc.bind(("127.0.0.1", 0))
+
+        return soc.getsockname()[1]
+
+
+async def collect(targets, max_concurrency, timeout=1.0, max_retries=1, rtt_estimators=None,
+                  max_concurrency_per_host=None):
+    """Returns the results of connect_all, in completion order
+
+    """
+
+    return [result async for result in connect_all(targets, max_concurrency, timeout, max_retries,
+                                                   rtt_estimators, max_concurrency_per_host)]
+
+
+class TestConnectEngine(unittest.TestCase):
+    """Connect engine tests.
+
+    """
+
+    def setUp(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(100)
+        self.open_port = self.listener.getsockname()[1]
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_try_connect_async(self):
+        """Test connecting to an open and a closed port.
+
+        """
+
+        rtt_estimator = RttEstimator()
+        result = asyncio.run(try_connect_async("127.0.0.1", self.open_port, rtt_estimator))
+
+        assert result.is_open
+        assert result.state == PORT_OPEN
+        assert result.port == self.open_port
+        assert result.attempts == 1
+
+        result = asyncio.run(try_connect_async("127.0.0.1", get_closed_port(), rtt_estimator))
+
+        assert result.state == PORT_CLOSED
+        assert not result.is_open
+
+        # Both the accepted and the refused connects were RTT samples
+        assert rtt_estimator.sample_count == 2
+        assert rtt_estimator.get_timeout() == rtt_estimator.min_timeout
+
+    def test_try_connect_async_ipv6(self):
+        """Test connecting to an IPv6 address.
+
+        """
+
+        with socket.socket(socket.AF_INET6, socket.SOCK_STREAM) as listener:
+            listener.bind(("::1", 0))
+            listener.listen(1)
+
+            result = asyncio.run(try_connect_async("::1", listener.getsockname()[1]))
+
+        assert result.state == PORT_OPEN
+
+    def test_filtered(self):
+        """Test retrying connects that time out before reporting the port as filtered.
+
+        """
+
+        timeouts = []
+
+        async def timed_out_try_connect_once(target_host, target_port, timeout):
+            timeouts.append(timeout)
+            return None, timeout
+
+        try_connect_once = connect_engine._try_connect_once
+        connect_engine._try_connect_once = timed_out_try_connect_once
+
+        try:
+            rtt_estimator = RttEstimator(0.2)
+            result = asyncio.run(try_connect_async("127.0.0.1", 80, rtt_estimator, 2))
+        finally:
+            connect_engine._try_connect_once = try_connect_once
+
+        assert result.state == PORT_FILTERED
+        assert result.attempts == 3
+        assert timeouts == [0.2, 0.4, 0.8]
+        assert rtt_estimator.sample_count == 0
+
+    def test_connect_errors(self):
+        """Test only unreachable hosts and networks report the port as filtered.
+
+        """
+
+        async def connect(error):
+            async def failing_sock_connect(soc, address):
+                raise OSError(error, os.strerror(error))
+
+            asyncio.get_running_loop().sock_connect = failing_sock_connect
+
+            return await try_connect_async("127.0.0.1", 80)
+
+        for error in (errno.EHOSTUNREACH, errno.ENETUNREACH):
+            assert asyncio.run(connect(error)).state == PORT_FILTERED
+
+        # Local faults (e.g. out of file descriptors) fail the connect
+        with pytest.raises(OSError):
+            asyncio.run(connect(errno.EMFILE))
+
+    def test_connect_all(self):
+        """Test connecting to every target with a concurrency cap.
+
+        """
+
+        closed_port = get_closed_port()
+        targets = [("127.0.0.1", self.open_port)] + [("127.0.0.1", closed_port)] * 50
+        in_flight_counts = []
+        in_flight_count = 0
+        try_connect = connect_engine.try_connect_async
+
+        async def counting_try_connect(target_host, target_port, rtt_estimator, max_retries):
+            nonlocal in_flight_count
+            in_flight_count = in_flight_count + 1
+            in_flight_counts.append(in_flight_count)
+
+            try:
+                await asyncio.sleep(0.01)
+                return await try_connect(target_host, target_port, rtt_estimator, max_retries)
+            finally:
+                in_flight_count = in_flight_count - 1
+
+        connect_engine.try_connect_async = counting_try_connect
+
+        rtt_estimators = {}
+
+        try:
+            results = asyncio.run(collect(iter(targets), 8, rtt_estimators=rtt_estimators))
+        finally:
+            connect_engine.try_connect_async = try_connect
+
+        assert len(results) == len(targets)
+        assert [r.port for r in results if r.is_open] == [self.open_port]
+        assert max(in_flight_counts) == 8
+
+        # The RTT estimator of the host is shared by all its connects
+        assert list(rtt_estimators) == ["127.0.0.1"]
+        assert rtt_estimators["127.0.0.1"].sample_count == len(targets)
+
+    def test_connect_all_async_targets(self):
+        """Test the connects stay in flight while the next asynchronous targets are awaited.
+
+        """
+
+        closed_port = get_closed_port()
+        in_flight_count = 0
+        window_in_flight_counts = []
+        try_connect = connect_engine.try_connect_async
+
+        async def counting_try_connect(target_host, target_port, rtt_estimator, max_retries):
+            nonlocal in_flight_count
+            in_flight_count = in_flight_count + 1
+
+            try:
+                await asyncio.sleep(0.05)
+                return await try_connect(target_host, target_port, rtt_estimator, max_retries)
+            finally:
+                in_flight_count = in_flight_count - 1
+
+        # Windows of targets resolved as the scan goes
+        async def generate_targets():
+            for _ in range(3):
+                window_in_flight_counts.append(in_flight_count)
+                await asyncio.sleep(0)
+
+                for _ in range(6):
+                    yield "127.0.0.1", closed_port
+
+        connect_engine.try_connect_async = counting_try_connect
+
+        try:
+            results = asyncio.run(collect(generate_targets(), 4))
+        finally:
+            connect_engine.try_connect_async = try_connect
+
+        assert len(results) == 18
+        assert all(r.state == PORT_CLOSED for r in results)
+
+        # The connects of a window are still in flight when the next window is awaited
+        assert window_in_flight_counts[0] == 0
+        assert all(count > 0 for count in window_in_flight_counts[1:])
+
+    def test_connect_all_closes_async_targets(self):
+        """Test asynchronous targets are closed when the caller stops early.
+
+        """
+
+        closed_port = get_closed_port()
+        is_closed = False
+
+        async def generate_targets():
+            nonlocal is_closed
+
+            try:
+                for _ in range(1000):
+                    await asyncio.sleep(0)
+                    yield "127.0.0.1", closed_port
+            finally:
+                is_closed = True
+
+        async def connect_first():
+            results = connect_all(generate_targets(), 4)
+
+            try:
+                return await results.__anext__()
+            finally:
+                await results.aclose()
+
+        assert asyncio.run(connect_first()).state == PORT_CLOSED
+        assert is_closed
+
+    def test_max_concurrency_per_host(self):
+        """Test bounding the connects in flight per host.
+
+        """
+
+        closed_port = get_closed_port()
+        hosts = ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+        targets = [(host, closed_port) for host in hosts for _ in range(20)]
+        in_flight_counts = {host: [0] for host in hosts}
+        try_connect = connect_engine.try_connect_async
+
+        async def counting_try_connect(target_host, target_port, rtt_estimator, max_retries):
+            counts = in_flight_counts[target_host]
+            counts[0] = counts[0] + 1
+            counts.append(counts[0])
+
+            try:
+                await asyncio.sleep(0.01)
+                return await try_connect(target_host, target_port, rtt_estimator, max_retries)
+            finally:
+                counts[0] = counts[0] - 1
+
+        connect_engine.try_connect_async = counting_try_connect
+
+        try:
+            results = asyncio.run(collect(targets, 12, max_concurrency_per_host=3))
+        finally:
+            connect_engine.try_connect_async = try_connect
+
+        assert len(results) == len(targets)
+        assert all(max(counts[1:]) == 3 for counts in in_flight_counts.values())
+
+        with pytest.raises(ValueError):
+            asyncio.run(collect(targets, 12, max_concurrency_per_host=0))
+
+    def test_max_concurrency_per_host_busy_host(self):
+        """Test a host at its cap does not hold the workers of the other hosts.
+
+        """
+
+        closed_port = get_closed_port()
+
+        # The targets of a busy host come first (e.g. a slow host of a window)
+        targets = [("127.0.0.1", closed_port)] * 20 + [
+            ("127.0.0.{0}".format(i), closed_port) for i in range(2, 10) for _ in range(5)]
+        in_flight_count = 0
+        in_flight_counts = []
+        try_connect = connect_engine.try_connect_async
+
+        async def counting_try_connect(target_host, target_port, rtt_estimator, max_retries):
+            nonlocal in_flight_count
+            in_flight_count = in_flight_count + 1
+            in_flight_counts.append(in_flight_count)
+
+            try:
+                await asyncio.sleep(0.05)
+                return await try_connect(target_host, target_port, rtt_estimator, max_retries)
+            finally:
+                in_flight_count = in_flight_count - 1
+
+        connect_engine.try_connect_async = counting_try_connect
+
+        try:
+            results = asyncio.run(collect(iter(targets), 12, max_concurrency_per_host=3))
+        finally:
+            connect_engine.try_connect_async = try_connect
+
+        assert len(results) == len(targets)
+        assert sorted((r.host, r.port) for r in results) == sorted(targets)
+
+        # The other hosts use the workers the busy host cannot, from the start
+        assert in_flight_counts[:12] == list(range(1, 13))
+        assert max(in_flight_counts) == 12
+
+    def test_results_as_completed(self):
+        """Test results are reported as soon as each connect completes.
+
+        """
+
+        closed_port = get_closed_port()
+        targets = [("127.0.0.1", self.open_port)] + [("127.0.0.1", closed_port)] * 3
+        try_connect = connect_engine.try_connect_async
+
+        # The connect to the open port completes after the others (e.g. a distant host)
+        async def slow_try_connect(target_host, target_port, rtt_estimator, max_retries):
+            if target_port == self.open_port:
+                await asyncio.sleep(0.2)
+
+            return await try_connect(target_host, target_port, rtt_estimator, max_retries)
+
+        connect_engine.try_connect_async = slow_try_connect
+
+        try:
+            results = asyncio.run(collect(targets, 4))
+        finally:
+            connect_engine.try_connect_async = try_connect
+
+        assert [result.is_open for result in results] == [False, False, False, True]
+
+    def test_invalid_max_concurrency(self):
+        """Test connecting without any connect in flight.
+
+        """
+
+        with pytest.raises(ValueError):
+            asyncio.run(collect([("127.0.0.1", self.open_port)], 0))
+
+        with pytest.raises(ValueError):
+            asyncio.run(collect([("127.0.0.1", self.open_port)], 1, max_retries=-1))
+
+    def test_invalid_target(self):
+        """Test an invalid target fails the scan.
+
+        """
+
+        with pytest.raises(OverflowError):
+            asyncio.run(collect([("127.0.0.1", 70000)], 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
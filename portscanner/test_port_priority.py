@@ -0,0 +1,103 @@
+"""Tests for the port priority.
+
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from port_priority import (DEFAULT_PRIOR, TOP_PORT_PRIOR, TOP_PORTS, PortHistory, get_prior,
+                           prioritize_ports, split_port_passes)
+
+
+class TestPortPriority(unittest.TestCase):
+    """Port priority tests.
+
+    """
+
+    def test_prioritize_ports_by_frequency(self):
+        """Test ordering ports by the bundled ranking, unranked ports last.
+
+        """
+
+        assert TOP_PORTS[:2] == (80, 23)
+        assert len(set(TOP_PORTS)) == len(TOP_PORTS) == 100
+        assert get_prior(80) == TOP_PORT_PRIOR and get_prior(23) == TOP_PORT_PRIOR / 2
+        assert prioritize_ports([40000, 22, 30000, 443, 80]) == [80, 443, 22, 30000, 40000]
+
+        # Ranked ports come first, most frequent first, then the other ports ascending
+        top_ports = [port for port in TOP_PORTS if port <= 1024]
+        ordered_ports = prioritize_ports(range(1, 1025))
+
+        assert ordered_ports[:len(top_ports)] == top_ports
+        assert ordered_ports[len(top_ports):len(top_ports) + 2] == [1, 2]
+
+    def test_split_port_passes(self):
+        """Test splitting ordered ports into passes of growing size.
+
+        """
+
+        ordered_ports = prioritize_ports(range(1, 2001))
+        port_passes = split_port_passes(ordered_ports)
+
+        assert [len(port_pass) for port_pass in port_passes] == [10, 90, 900, 1000]
+        assert [port for port_pass in port_passes for port in port_pass] == ordered_ports
+        assert port_passes[0] == [port for port in TOP_PORTS if port <= 2000][:10]
+
+        assert split_port_passes([80, 443], 1) == [[80], [443]]
+        assert split_port_passes([]) == []
+
+        with pytest.raises(ValueError):
+            split_port_passes([80], 0)
+
+    def test_history_hit_rates(self):
+        """Test hit rates of earlier scans taking over the bundled ranking.
+
+        """
+
+        port_history = PortHistory()
+
+        assert port_history.get_priority(22) == get_prior(22)
+        assert port_history.get_priority(40000) == DEFAULT_PRIOR
+
+        # A port found open on every host outranks the most frequent ports, and a frequent port
+        # found closed on every host falls behind
+        for _ in range(100):
+            port_history.record(40000, True)
+            port_history.record(80, False)
+
+        assert prioritize_ports([80, 22, 40000], port_history) == [40000, 22, 80]
+
+    def test_history_save_and_load(self):
+        """Test saving the hit rates and loading them back.
+
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            history_path = os.path.join(directory, "port_history.json")
+            port_history = PortHistory(history_path)
+            port_history.record(22, True)
+            port_history.record(22, False)
+            port_history.record(8080, False)
+            port_history.save()
+
+            with open(history_path) as history_file:
+                assert json.load(history_file) == {
+                    "version": 1,
+                    "ports": {"22": {"probe_count": 2, "open_count": 1},
+                              "8080": {"probe_count": 1, "open_count": 0}}}
+
+            loaded_history = PortHistory(history_path)
+
+            assert loaded_history.get_priority(22) == port_history.get_priority(22)
+            assert loaded_history.get_priority(8080) == port_history.get_priority(8080)
+
+        with pytest.raises(ValueError):
+            PortHistory().save()
+
+
+if __name__ == '__main__':
+    unittest.main()
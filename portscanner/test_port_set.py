@@ -0,0 +1,99 @@
+"""Tests for the port sets.
+
+"""
+
+import unittest
+
+import pytest
+
+from port_set import MAX_PORT_NUMBER, TOP_PORTS, PortSet
+
+
+class TestPortSet(unittest.TestCase):
+    """Port set tests.
+
+    """
+
+    def test_parse(self):
+        """Test compiling ports, ranges and exclusions.
+
+        """
+
+        port_set = PortSet.parse("1-1024, 3306,8000-9000,!135,80")
+
+        assert len(port_set) == 1024 + 1 + 1001 - 1
+        assert 1 in port_set and 1024 in port_set and 3306 in port_set and 9000 in port_set
+        assert 135 not in port_set and 1025 not in port_set and 9001 not in port_set
+        assert list(port_set)[:3] == [1, 2, 3]
+
+        # Exclusions apply whatever their position
+        assert list(PortSet.parse("!22,20-23")) == [20, 21, 23]
+
+    def test_parse_open_ranges(self):
+        """Test ranges without start or end, up to the last port.
+
+        """
+
+        assert len(PortSet.parse("-")) == MAX_PORT_NUMBER
+        assert list(PortSet.parse("65530-")) == [65530, 65531, 65532, 65533, 65534, 65535]
+        assert list(PortSet.parse("-3")) == [1, 2, 3]
+
+    def test_parse_top(self):
+        """Test the most frequently open ports.
+
+        """
+
+        assert len(set(TOP_PORTS)) == len(TOP_PORTS)
+        assert list(PortSet.parse("top-3")) == sorted(TOP_PORTS[:3])
+        assert list(PortSet.parse("top10,!top-2")) == sorted(TOP_PORTS[2:10])
+        assert len(PortSet.parse("top-{0}".format(len(TOP_PORTS)))) == len(TOP_PORTS)
+
+        # More ports than ranked, or none at all
+        for port_specification in ("top-0", "top-{0}".format(len(TOP_PORTS) + 1), "!top-1000"):
+            with pytest.raises(ValueError):
+                PortSet.parse(port_specification)
+
+    def test_parse_invalid(self):
+        """Test compiling invalid port specifications.
+
+        """
+
+        for port_specification in ("", " ", "0", "65536", "http", "10-5", "1-2-3", "1,,2"):
+            with pytest.raises(ValueError):
+                PortSet.parse(port_specification)
+
+    def test_shard(self):
+        """Test shards have the same number of ports, without gaps or duplicates.
+
+        """
+
+        port_set = PortSet.parse("1-1000,!500-599")
+        shards = port_set.shard(7)
+
+        assert sorted(len(shard) for shard in shards) == [128] * 3 + [129] * 4
+        assert [port for shard in shards for port in shard] == list(port_set)
+
+        with pytest.raises(ValueError):
+            port_set.shard(0)
+
+    def test_bitmap(self):
+        """Test the set round-trips through its bitmap.
+
+        """
+
+        port_set = PortSet([0, 7, 8, 65535])
+        port_set.discard(7)
+        port_set.discard(9)
+
+        assert list(PortSet.from_bytes(bytes(port_set.bitmap))) == [0, 8, 65535]
+        assert len(PortSet.from_bytes(bytes(port_set.bitmap))) == 3
+
+        with pytest.raises(ValueError):
+            PortSet.from_bytes(b"\x00")
+
+        with pytest.raises(ValueError):
+            port_set.add(65536)
+
+
+if __name__ == '__main__':
+    unittest.main()
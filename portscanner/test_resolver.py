@@ -0,0 +1,99 @@
+"""Tests for the asynchronous resolver.
+
+"""
+
+import asyncio
+import socket
+import unittest
+
+import pytest
+
+from resolver import Resolver
+
+
+class TestResolver(unittest.TestCase):
+    """Resolver tests.
+
+    """
+
+    def test_ip_addresses(self):
+        """Test IP addresses are returned without any lookup, filtered by address family.
+
+        """
+
+        resolver = Resolver()
+
+        assert asyncio.run(resolver.resolve("10.0.0.1")) == ["10.0.0.1"]
+        assert asyncio.run(resolver.resolve("::1")) == ["::1"]
+        assert asyncio.run(Resolver(family=socket.AF_INET).resolve("::1")) == []
+        assert asyncio.run(Resolver(family=socket.AF_INET6).resolve("10.0.0.1")) == []
+        assert resolver.lookup_count == 0
+
+    def test_cache(self):
+        """Test answers are cached, and concurrent lookups of a host share a single lookup.
+
+        """
+
+        resolver = Resolver()
+
+        async def resolve():
+            first = await resolver.resolve_many(["localhost", "localhost", "127.0.0.2"])
+            second = await resolver.resolve("localhost")
+
+            return first, second
+
+        first, second = asyncio.run(resolve())
+
+        assert "127.0.0.1" in first[0][1]
+        assert first[1] == first[0]
+        assert first[2] == ("127.0.0.2", ["127.0.0.2"])
+        assert second == first[0][1]
+        assert resolver.lookup_count == 1
+
+    def test_ttl(self):
+        """Test expired answers are looked up again.
+
+        """
+
+        resolver = Resolver(ttl=0)
+
+        asyncio.run(resolver.resolve("localhost"))
+        asyncio.run(resolver.resolve("localhost"))
+
+        assert resolver.lookup_count == 2
+
+    def test_failure(self):
+        """Test hosts that cannot be resolved have no addresses, and are not looked up again.
+
+        """
+
+        resolver = Resolver()
+
+        async def resolve():
+            async def getaddrinfo(*args, **kwargs):
+                raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+            asyncio.get_running_loop().getaddrinfo = getaddrinfo
+
+            return [await resolver.resolve("unknown.example.com") for _ in range(2)]
+
+        assert asyncio.run(resolve()) == [[], []]
+        assert resolver.lookup_count == 1
+
+    def test_invalid_resolver(self):
+        """Test creating a resolver with invalid settings.
+
+        """
+
+        with pytest.raises(ValueError):
+            Resolver(ttl=-1)
+
+        with pytest.raises(ValueError):
+            Resolver(family=socket.AF_UNIX)
+
+        with pytest.raises(ValueError):
+            Resolver(max_concurrency=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for the scan result sink.
+
+"""
+
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from connect_engine import PORT_CLOSED, PORT_FILTERED, PORT_OPEN, ConnectResult
+from result_sink import FORMAT_CSV, FORMAT_JSONL, ResultSink, read_port_bitmaps
+
+
+class TestResultSink(unittest.TestCase):
+    """Result sink tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.directory.name, "results")
+        self.port_bitmap_path = os.path.join(self.directory.name, "open_ports.bin")
+        self.results = [ConnectResult("10.0.0.{0}".format(i % 3), port, state, 0.001)
+                        for i, (port, state) in enumerate([(22, PORT_OPEN), (23, PORT_CLOSED),
+                                                           (80, PORT_OPEN), (1, PORT_OPEN),
+                                                           (65535, PORT_OPEN),
+                                                           (135, PORT_FILTERED)])]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, result_sink):
+        """Writes the results to a sink
+
+        """
+
+        async def write():
+            async with result_sink:
+                for result in self.results:
+                    await result_sink.put(result)
+
+        asyncio.run(write())
+
+    def test_jsonl(self):
+        """Test writing the results of some states as JSON lines, in batches.
+
+        """
+
+        result_sink = ResultSink(self.output_path, FORMAT_JSONL, (PORT_OPEN, PORT_FILTERED),
+                                 batch_size=2)
+        self.write(result_sink)
+
+        with open(self.output_path) as output_file:
+            rows = [json.loads(line) for line in output_file]
+
+        assert [(r["host"], r["port"], r["state"]) for r in rows] == [
+            ("10.0.0.0", 22, PORT_OPEN), ("10.0.0.2", 80, PORT_OPEN), ("10.0.0.0", 1, PORT_OPEN),
+            ("10.0.0.1", 65535, PORT_OPEN), ("10.0.0.2", 135, PORT_FILTERED)]
+        assert rows[0]["latency"] == 0.001
+        assert rows[0]["timestamp"]
+        assert result_sink.written_count == 5
+        assert result_sink.write_count == 3
+
+    def test_csv(self):
+        """Test appending the results as CSV rows, with a single header.
+
+        """
+
+        for _ in range(2):
+            self.write(ResultSink(self.output_path, FORMAT_CSV, (PORT_CLOSED,)))
+
+        with open(self.output_path, newline="") as output_file:
+            rows = list(csv.reader(output_file))
+
+        assert rows[0] == ["host", "port", "state", "latency", "timestamp"]
+        assert [row[:4] for row in rows[1:]] == [["10.0.0.1", "23", PORT_CLOSED, "0.001"]] * 2
+
+    def test_flush_interval(self):
+        """Test results are flushed after the flush interval, before a batch is full.
+
+        """
+
+        result_sink = ResultSink(self.output_path, flush_interval=0.05)
+
+        async def write():
+            async with result_sink:
+                await result_sink.put(self.results[0])
+                await asyncio.sleep(0.2)
+
+                with open(self.output_path) as output_file:
+                    return len(output_file.readlines())
+
+        assert asyncio.run(write()) == 1
+
+    def test_port_bitmaps(self):
+        """Test writing the open ports of every host as bitmaps.
+
+        """
+
+        self.write(ResultSink(self.output_path, states=(), port_bitmap_path=self.port_bitmap_path))
+
+        assert os.path.getsize(self.output_path) == 0
+        assert dict(read_port_bitmaps(self.port_bitmap_path)) == {
+            "10.0.0.0": [1, 22], "10.0.0.1": [65535], "10.0.0.2": [80]}
+
+    def test_batches_with_port_bitmaps(self):
+        """Test results only kept in the bitmaps do not flush partial batches.
+
+        """
+
+        result_sink = ResultSink(self.output_path, FORMAT_JSONL, (PORT_CLOSED, PORT_FILTERED),
+                                 port_bitmap_path=self.port_bitmap_path, batch_size=2)
+        self.write(result_sink)
+
+        assert result_sink.written_count == 2
+        assert result_sink.write_count == 1
+        assert dict(read_port_bitmaps(self.port_bitmap_path)) == {
+            "10.0.0.0": [1, 22], "10.0.0.1": [65535], "10.0.0.2": [80]}
+
+    def test_invalid_sink(self):
+        """Test creating a sink with invalid settings.
+
+        """
+
+        with pytest.raises(ValueError):
+            ResultSink(self.output_path, "xml")
+
+        with pytest.raises(ValueError):
+            ResultSink(self.output_path, batch_size=0)
+
+        with pytest.raises(ValueError):
+            ResultSink(self.output_path, flush_interval=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
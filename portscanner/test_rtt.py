@@ -0,0 +1,84 @@
+"""Tests for the RTT estimation.
+
+"""
+
+import unittest
+
+import pytest
+
+from rtt import RttEstimator
+
+
+class TestRttEstimator(unittest.TestCase):
+    """RTT estimator tests.
+
+    """
+
+    def test_initial_timeout(self):
+        """Test the initial timeout is used until the first RTT sample.
+
+        """
+
+        rtt_estimator = RttEstimator(1.0, 0.1, 3.0)
+
+        assert rtt_estimator.get_timeout() == 1.0
+        assert rtt_estimator.get_timeout(1) == 2.0
+        assert rtt_estimator.get_timeout(2) == 3.0
+
+    def test_add_sample(self):
+        """Test the timeout follows the smoothed RTT and RTT variance.
+
+        """
+
+        rtt_estimator = RttEstimator(1.0, 0.001, 3.0)
+        rtt_estimator.add_sample(0.1)
+
+        assert rtt_estimator.smoothed_rtt == 0.1
+        assert rtt_estimator.rtt_variance == 0.05
+        assert rtt_estimator.get_timeout() == pytest.approx(0.3)
+
+        # A steady RTT decreases the variance, so the timeout gets closer to the RTT
+        for _ in range(50):
+            rtt_estimator.add_sample(0.1)
+
+        assert rtt_estimator.smoothed_rtt == pytest.approx(0.1)
+        assert rtt_estimator.get_timeout() == pytest.approx(0.1, abs=0.001)
+
+        # A slower RTT increases both
+        rtt_estimator.add_sample(0.5)
+
+        assert rtt_estimator.smoothed_rtt == pytest.approx(0.15)
+        assert rtt_estimator.get_timeout() == pytest.approx(0.15 + 4 * 0.1, abs=0.001)
+
+    def test_bounds(self):
+        """Test the timeout is bounded by min and max timeout.
+
+        """
+
+        rtt_estimator = RttEstimator(1.0, 0.1, 3.0)
+        rtt_estimator.add_sample(0.0005)
+
+        assert rtt_estimator.get_timeout() == 0.1
+        assert rtt_estimator.get_timeout(10) == pytest.approx(0.0015 * 2 ** 10)
+
+        rtt_estimator.add_sample(10)
+
+        assert rtt_estimator.get_timeout() == 3.0
+
+    def test_invalid_timeouts(self):
+        """Test creating an estimator with invalid timeouts.
+
+        """
+
+        with pytest.raises(ValueError):
+            RttEstimator(1.0, 0, 3.0)
+
+        with pytest.raises(ValueError):
+            RttEstimator(1.0, 3.0, 1.0)
+
+        with pytest.raises(ValueError):
+            RttEstimator(0, 0.1, 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Tests for the scan targets expansion.
+
+"""
+
+import itertools
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from targets import expand_targets, interleave_targets
+
+
+class TestTargets(unittest.TestCase):
+    """Targets tests.
+
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_expand_targets(self):
+        """Test expanding hosts, CIDR blocks and files of targets.
+
+        """
+
+        targets_path = os.path.join(self.directory.name, "targets.txt")
+
+        with open(targets_path, "w") as targets_file:
+            targets_file.write("# Lab\n10.0.1.1\n\n  10.0.2.0/31 \nwww.google.com\n")
+
+        assert list(expand_targets("10.0.0.1")) == ["10.0.0.1"]
+        assert list(expand_targets(["10.0.0.0/30", targets_path, "localhost"])) == [
+            "10.0.0.1", "10.0.0.2", "10.0.1.1", "10.0.2.0", "10.0.2.1", "www.google.com",
+            "localhost"]
+
+        with pytest.raises(ValueError):
+            list(expand_targets("10.0.0.0/33"))
+
+    def test_expand_targets_is_lazy(self):
+        """Test large CIDR blocks are never materialized.
+
+        """
+
+        hosts = expand_targets(["10.0.0.0/8", "11.0.0.0/8"])
+
+        assert list(itertools.islice(hosts, 3)) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+    def test_interleave_targets(self):
+        """Test interleaving the ports of a window of hosts.
+
+        """
+
+        hosts = iter(["a", "b", "c"])
+
+        assert list(interleave_targets(hosts, [80, 443], 2)) == [
+            ("a", 80), ("b", 80), ("a", 443), ("b", 443), ("c", 80), ("c", 443)]
+
+        with pytest.raises(ValueError):
+            list(interleave_targets(["a"], [80], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()